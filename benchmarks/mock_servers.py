@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from src.http_server import MAX_BODY_BYTES, Request, Response, start_http_server
+
+# Local stand-ins for the Bright Data, Phantombuster and LinkedIn APIs, served
+# from one port. They implement just enough of each API for the worker's
+# functions: jobs become ready after a configurable delay and return records
+# padded to a configurable size. Point the worker at them with
+#
+#   BRIGHT_DATA_API_URL=http://127.0.0.1:<port>
+#   PHANTOMBUSTER_API_URL=http://127.0.0.1:<port>
+#   LINKEDIN_API_URL=http://127.0.0.1:<port>
+#
+# Phantombuster results are served the way --phantombuster-output says: inline
+# in the result object, or as a CSV or JSON output file the result object links
+# to.
+#
+# LinkedIn media uploads are registered, received and committed like the real
+# assets API. Multipart video uploads are split into parts of at most
+# MAX_BODY_BYTES, the largest body the mock server reads; a single upload
+# larger than that is rejected.
+
+
+@dataclass
+class MockConfig:
+    ready_delay: float = 5.0
+    payload_bytes: int = 4096
+    records: int = 1
+    phantombuster_output: str = "inline"
+
+
+@dataclass
+class MockJob:
+    job_id: str
+    ready_at: float
+    inputs: list[dict[str, Any]]
+    notify: str | None = None
+    auth_header: str | None = None
+
+
+@dataclass
+class MockStats:
+    requests: dict[str, int] = field(default_factory=dict)
+
+    def count(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+
+class MockProviders:
+    """In-memory state of the mocked providers' jobs."""
+
+    def __init__(self, config: MockConfig) -> None:
+        self.config = config
+        self.stats = MockStats()
+        self._jobs: dict[str, MockJob] = {}
+        self._ids = itertools.count(1)
+        self._notify_tasks: set[asyncio.Task] = set()
+
+    def _new_job(self, prefix: str, inputs: list[dict[str, Any]], **kwargs: Any) -> MockJob:
+        job = MockJob(f"{prefix}_{next(self._ids)}", time.time() + self.config.ready_delay, inputs, **kwargs)
+        self._jobs[job.job_id] = job
+        return job
+
+    def _records(self, job: MockJob) -> list[dict[str, Any]]:
+        # Spread payload_bytes over the records requested for every input
+        count = max(1, len(job.inputs)) * self.config.records
+        padding = "x" * max(0, self.config.payload_bytes // count - 100)
+        records = []
+        for item in job.inputs or [{}]:
+            for index in range(self.config.records):
+                url = item.get("url") or item.get("spreadsheetUrl") or ""
+                records.append({"id": f"{job.job_id}-{len(records)}", "url": url, "input": {"url": url}, "index": index, "padding": padding})
+        return records
+
+    def routes(self) -> dict[tuple[str, str], Any]:
+        return {
+            ("POST", "/datasets/v3/trigger"): self.brightdata_trigger,
+            ("GET", "/datasets/v3/progress/"): self.brightdata_progress,
+            ("GET", "/datasets/v3/snapshot/"): self.brightdata_snapshot,
+            ("POST", "/api/v1/agent/"): self.phantombuster_launch,
+            ("GET", "/api/v2/containers/fetch"): self.phantombuster_fetch,
+            ("GET", "/api/v2/containers/fetch-result-object"): self.phantombuster_result_object,
+            ("GET", "/storage/"): self.phantombuster_storage,
+            ("POST", "/api/v2/org-storage/leads/save"): self.phantombuster_save_lead,
+            ("POST", "/v2/ugcPosts"): self.linkedin_post,
+            ("POST", "/v2/assets"): self.linkedin_assets,
+            ("GET", "/v2/assets/"): self.linkedin_asset_status,
+            ("PUT", "/mock-upload/"): self.linkedin_upload,
+            ("GET", "/stats"): self.get_stats,
+        }
+
+    # Bright Data
+
+    async def brightdata_trigger(self, request: Request) -> Response:
+        self.stats.count("brightdata.trigger")
+        inputs = request.json()
+        if not isinstance(inputs, list):
+            return Response.json({"error": "expected a list of inputs"}, 400)
+        job = self._new_job(
+            "s",
+            inputs,
+            notify=request.query.get("notify", [None])[0],
+            auth_header=request.query.get("auth_header", [None])[0],
+        )
+        if job.notify:
+            task = asyncio.create_task(self._notify(job))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+        return Response.json({"snapshot_id": job.job_id})
+
+    async def _notify(self, job: MockJob) -> None:
+        await asyncio.sleep(max(0.0, job.ready_at - time.time()))
+        headers = {"Authorization": job.auth_header} if job.auth_header else {}
+        try:
+            async with httpx.AsyncClient() as client:
+                await client.post(job.notify, json={"snapshot_id": job.job_id, "status": "ready"}, headers=headers)
+            self.stats.count("brightdata.notify")
+        except httpx.HTTPError as e:
+            logging.warning("Notification for %s failed: %s", job.job_id, e)
+
+    def _snapshot(self, request: Request) -> MockJob | None:
+        return self._jobs.get(request.path.rsplit("/", 1)[-1])
+
+    async def brightdata_progress(self, request: Request) -> Response:
+        self.stats.count("brightdata.progress")
+        job = self._snapshot(request)
+        if job is None:
+            return Response.json({"error": "snapshot not found"}, 404)
+        status = "ready" if time.time() >= job.ready_at else "running"
+        return Response.json({"snapshot_id": job.job_id, "status": status})
+
+    async def brightdata_snapshot(self, request: Request) -> Response:
+        self.stats.count("brightdata.snapshot")
+        job = self._snapshot(request)
+        if job is None:
+            return Response.json({"error": "snapshot not found"}, 404)
+        if time.time() < job.ready_at:
+            return Response.json({"status": "running", "message": "Snapshot is not ready yet, try again in 10s"}, 202)
+        records = self._records(job)
+        if request.query.get("format", ["json"])[0] == "ndjson":
+            body = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+            return Response(body=body, content_type="application/x-ndjson")
+        return Response.json(records)
+
+    # Phantombuster
+
+    async def phantombuster_launch(self, request: Request) -> Response:
+        self.stats.count("phantombuster.launch")
+        argument = (request.json() or {}).get("argument") or {}
+        job = self._new_job("c", [argument])
+        return Response.json({"status": "success", "data": {"containerId": job.job_id}})
+
+    async def phantombuster_fetch(self, request: Request) -> Response:
+        self.stats.count("phantombuster.fetch")
+        job = self._jobs.get(request.query.get("id", [""])[0])
+        if job is None:
+            return Response.json({"error": "container not found"}, 404)
+        if time.time() < job.ready_at:
+            return Response.json({"id": job.job_id, "status": "running"})
+        return Response.json({"id": job.job_id, "status": "finished"})
+
+    async def phantombuster_result_object(self, request: Request) -> Response:
+        self.stats.count("phantombuster.result_object")
+        job = self._jobs.get(request.query.get("id", [""])[0])
+        if job is None:
+            return Response.json({"error": "container not found"}, 404)
+        output = self.config.phantombuster_output
+        if output in ("csv", "json"):
+            url = f"http://{request.headers.get('host')}/storage/{job.job_id}/result.{output}"
+            return Response.json({"resultObject": json.dumps([{f"{output}URL" if output == "csv" else "jsonUrl": url}])})
+        return Response.json({"resultObject": json.dumps(self._records(job))})
+
+    async def phantombuster_storage(self, request: Request) -> Response:
+        self.stats.count("phantombuster.storage")
+        _, _, job_id, file_name = request.path.split("/", 3)
+        job = self._jobs.get(job_id)
+        if job is None or time.time() < job.ready_at:
+            return Response.json({"error": "no such file"}, 404)
+        records = self._records(job)
+        if file_name.endswith(".json"):
+            return Response.json(records)
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=list(records[0]))
+        writer.writeheader()
+        for record in records:
+            writer.writerow({key: json.dumps(value) if isinstance(value, dict) else value for key, value in record.items()})
+        return Response(body=out.getvalue().encode(), content_type="text/csv")
+
+    async def phantombuster_save_lead(self, request: Request) -> Response:
+        self.stats.count("phantombuster.save_lead")
+        return Response.json({"id": f"lead_{next(self._ids)}"})
+
+    # LinkedIn
+
+    async def linkedin_post(self, request: Request) -> Response:
+        self.stats.count("linkedin.ugc_posts")
+        return Response(status=201, body=b"{}", headers={"X-RestLi-Id": f"urn:li:share:{next(self._ids)}"})
+
+    async def linkedin_assets(self, request: Request) -> Response:
+        action = request.query.get("action", [""])[0]
+        if action == "completeMultiPartUpload":
+            self.stats.count("linkedin.complete_upload")
+            return Response.json({})
+        if action != "registerUpload":
+            return Response.json({"error": f"unknown action {action}"}, 400)
+
+        self.stats.count("linkedin.register_upload")
+        register = request.json()["registerUploadRequest"]
+        asset_id = next(self._ids)
+        upload_url = f"http://{request.headers.get('host', '127.0.0.1')}/mock-upload/{asset_id}"
+        if "MULTIPART_UPLOAD" in register.get("supportedUploadMechanism", []):
+            size = register["fileSize"]
+            parts = [
+                {
+                    "url": f"{upload_url}/part/{index}",
+                    "byteRange": {"firstByte": first, "lastByte": min(first + MAX_BODY_BYTES, size) - 1},
+                    "headers": {"Content-Type": "application/octet-stream"},
+                }
+                for index, first in enumerate(range(0, size, MAX_BODY_BYTES))
+            ]
+            mechanism = {
+                "com.linkedin.digitalmedia.uploading.MultipartUpload": {
+                    "partUploadRequests": parts,
+                    "metadata": f"metadata-{asset_id}",
+                }
+            }
+        else:
+            mechanism = {
+                "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest": {"uploadUrl": upload_url, "headers": {}}
+            }
+        return Response.json(
+            {
+                "value": {
+                    "asset": f"urn:li:digitalmediaAsset:{asset_id}",
+                    "mediaArtifact": f"urn:li:digitalmediaMediaArtifact:{asset_id}",
+                    "uploadMechanism": mechanism,
+                }
+            }
+        )
+
+    async def linkedin_asset_status(self, request: Request) -> Response:
+        self.stats.count("linkedin.asset_status")
+        asset_id = request.path.rsplit("/", 1)[-1]
+        return Response.json(
+            {
+                "id": asset_id,
+                "recipes": [{"recipe": "urn:li:digitalmediaRecipe:feedshare-video", "status": "AVAILABLE"}],
+            }
+        )
+
+    async def linkedin_upload(self, request: Request) -> Response:
+        self.stats.count("linkedin.upload")
+        return Response(status=201, headers={"ETag": f"etag-{len(request.body)}"})
+
+    async def get_stats(self, request: Request) -> Response:
+        return Response.json({"jobs": len(self._jobs), "requests": self.stats.requests})
+
+
+async def start_mock_servers(host: str, port: int, config: MockConfig) -> tuple[asyncio.Server, MockProviders]:
+    providers = MockProviders(config)
+    server = await start_http_server(host, port, providers.routes())
+    return server, providers
+
+
+async def serve(args: argparse.Namespace) -> None:
+    config = MockConfig(args.ready_delay, args.payload_bytes, args.records, args.phantombuster_output)
+    server, _ = await start_mock_servers(args.host, args.port, config)
+    logging.info("Mock providers listening on %s:%s", args.host, args.port)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve mock Bright Data, Phantombuster and LinkedIn APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ready-delay", type=float, default=5.0, help="Seconds until a snapshot or container is ready")
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="Approximate size of each job's result")
+    parser.add_argument("--records", type=int, default=1, help="Records returned per job input")
+    parser.add_argument(
+        "--phantombuster-output",
+        choices=["inline", "csv", "json"],
+        default="inline",
+        help="How containers return their results",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
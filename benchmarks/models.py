@@ -0,0 +1,196 @@
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from src.models import decode, encode, to_builtins, to_models
+
+# Memory and speed of the normalised models (src/models.py) against the raw
+# provider dicts they replace, for a batch of synthetic records shaped like
+# Bright Data's profile and posts datasets:
+#
+#   python -m benchmarks.models --records 10000
+#
+# Memory is what tracemalloc sees still allocated for the records once built,
+# so it covers the containers and the strings they hold. Times are measured
+# separately, without tracing.
+
+
+def brightdata_profile(index: int) -> dict[str, Any]:
+    slug = f"bench-{index}"
+    return {
+        "id": slug,
+        "linkedin_id": slug,
+        "linkedin_num_id": str(100000 + index),
+        "name": f"Bench Person {index}",
+        "first_name": "Bench",
+        "last_name": f"Person {index}",
+        "city": "Seattle, Washington, United States",
+        "country_code": "US",
+        "position": "Co-chair, Bill & Melinda Gates Foundation",
+        "about": "Sharing things I'm learning through my foundation work and other interests. " * 3,
+        "url": f"https://www.linkedin.com/in/{slug}",
+        "input_url": f"https://www.linkedin.com/in/{slug}/",
+        "input": {"url": f"https://www.linkedin.com/in/{slug}/"},
+        "avatar": f"https://media.licdn.com/dms/image/{slug}/profile-displayphoto-shrink_200_200/0/",
+        "banner_image": f"https://media.licdn.com/dms/image/{slug}/profile-displaybackgroundimage-shrink_350_1400/0/",
+        "followers": 35000000 + index,
+        "connections": 500,
+        "current_company": {
+            "name": "Gates Foundation",
+            "link": "https://www.linkedin.com/company/gates-foundation",
+            "company_id": "gates-foundation",
+            "title": "Co-chair",
+        },
+        "current_company_name": "Gates Foundation",
+        "current_company_company_id": "gates-foundation",
+        "experience": [
+            {
+                "title": title,
+                "company": company,
+                "company_id": company.lower().replace(" ", "-"),
+                "url": f"https://www.linkedin.com/company/{company.lower().replace(' ', '-')}",
+                "location": "Seattle",
+                "start_date": start,
+                "end_date": end,
+                "description_html": None,
+                "company_logo_url": f"https://media.licdn.com/dms/image/{company}/logo/0/",
+            }
+            for title, company, start, end in (
+                ("Co-chair", "Gates Foundation", "2000", "Present"),
+                ("Founder", "Breakthrough Energy", "2015", "Present"),
+                ("Co-founder", "Microsoft", "1975", "2020"),
+            )
+        ],
+        "education": [
+            {
+                "title": "Harvard University",
+                "url": "https://www.linkedin.com/school/harvard-university/",
+                "start_year": "1973",
+                "end_year": "1975",
+                "description_html": None,
+                "institute_logo_url": "https://media.licdn.com/dms/image/harvard/logo/0/",
+            }
+        ],
+        "activity": [
+            {
+                "interaction": "Liked by Bench",
+                "link": f"https://www.linkedin.com/posts/{slug}-activity-{n}",
+                "title": "A post this profile reacted to",
+                "img": f"https://media.licdn.com/dms/image/{slug}/feedshare/{n}/",
+                "id": str(7000000000 + n),
+            }
+            for n in range(5)
+        ],
+        "people_also_viewed": [
+            {"profile_link": f"https://www.linkedin.com/in/other-{n}", "name": f"Other {n}", "about": None, "location": "US"}
+            for n in range(5)
+        ],
+        "languages": [],
+        "certifications": None,
+        "recommendations_count": None,
+        "timestamp": "2026-01-01T00:00:00.000Z",
+    }
+
+
+def brightdata_post(index: int) -> dict[str, Any]:
+    return {
+        "url": f"https://www.linkedin.com/posts/bench-activity-{index}",
+        "id": str(7100000000 + index),
+        "user_id": "bench",
+        "use_url": "https://www.linkedin.com/in/bench",
+        "title": "Bench post",
+        "headline": "Co-chair, Bill & Melinda Gates Foundation",
+        "post_text": "Progress on global health depends on new tools and new ideas. " * 4,
+        "post_text_html": "<p>" + "Progress on global health depends on new tools and new ideas. " * 4 + "</p>",
+        "hashtags": ["#health", "#innovation"],
+        "embedded_links": ["https://www.gatesnotes.com/"],
+        "images": [f"https://media.licdn.com/dms/image/post-{index}/feedshare/0/"],
+        "videos": None,
+        "date_posted": "2026-01-01T00:00:00.000Z",
+        "num_likes": 1200 + index,
+        "num_comments": 80,
+        "top_visible_comments": [
+            {
+                "user_name": f"Commenter {n}",
+                "comment": "Great to see this progress!",
+                "user_url": f"https://www.linkedin.com/in/commenter-{n}",
+                "comment_date": "2026-01-01T01:00:00.000Z",
+                "num_reactions": 3,
+                "tagged_users": [],
+            }
+            for n in range(3)
+        ],
+        "post_type": "post",
+        "account_type": "Person",
+        "user_followers": 35000000,
+        "user_posts": 4000,
+        "user_articles": 50,
+        "input": {"url": "https://www.linkedin.com/in/bench/"},
+        "timestamp": "2026-01-01T00:00:00.000Z",
+    }
+
+
+DATASETS: dict[str, tuple[str, Callable[[int], dict[str, Any]]]] = {
+    "profile": ("profile", brightdata_profile),
+    "posts": ("post", brightdata_post),
+}
+
+
+def measure(build: Callable[[], Any]) -> tuple[int, float]:
+    """Bytes still allocated for what build returns, and the seconds it takes untraced."""
+    gc.collect()
+    started = time.perf_counter()
+    build()
+    seconds = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return allocated, seconds
+
+
+def run(dataset: str, records: int) -> list[tuple[str, int | None, float | None]]:
+    kind, make = DATASETS[dataset]
+    raw_json = json.dumps([make(index) for index in range(records)]).encode()
+    raw = json.loads(raw_json)
+    started = time.perf_counter()
+    normalised_json = encode(list(to_models(kind, "brightdata", raw)))
+    mapping_seconds = time.perf_counter() - started
+    del raw
+
+    return [
+        ("raw dicts (json.loads)", *measure(lambda: json.loads(raw_json))),
+        ("models (msgspec decode)", *measure(lambda: decode(normalised_json, kind))),
+        ("normalised dicts", *measure(lambda: to_builtins(decode(normalised_json, kind)))),
+        ("raw -> models -> JSON", None, mapping_seconds),
+        ("raw JSON", len(raw_json), None),
+        ("normalised JSON", len(normalised_json), None),
+    ]
+
+
+def report(dataset: str, records: int, rows: list[tuple[str, int | None, float | None]]) -> str:
+    lines = [f"{dataset}: {records} records", f"  {'':<26}{'total':>12}{'per record':>14}{'time':>10}"]
+    for label, size, seconds in rows:
+        size_text = f"{size / 1024 / 1024:>9.1f} MB{size / records:>12.0f} B" if size is not None else f"{'-':>26}"
+        time_text = f"{seconds * 1000:.0f} ms" if seconds is not None else "-"
+        lines.append(f"  {label:<26}{size_text}{time_text:>10}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the memory of normalised models and raw provider records")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--dataset", choices=[*DATASETS, "all"], default="all")
+    args = parser.parse_args()
+    for dataset in DATASETS if args.dataset == "all" else [args.dataset]:
+        print(report(dataset, args.records, run(dataset, args.records)))
+
+
+if __name__ == "__main__":
+    main()
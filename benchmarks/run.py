@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from benchmarks.mock_servers import MockConfig, start_mock_servers
+
+# Drives N concurrent workflows through one worker started from src.services,
+# with every provider replaced by the local mock servers, and reports
+# throughput, latency percentiles and the worker's CPU time and memory.
+# Results can be saved as JSON and compared with a previous run:
+#
+#   python -m benchmarks.run --workflow brightdata-profile --requests 200 --concurrency 50 --output before.json
+#   python -m benchmarks.run --workflow brightdata-profile --requests 200 --concurrency 50 --compare before.json
+#
+# A Restack engine must be running (see "Start Restack" in the README).
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _profile_url(run_id: str, index: int | str) -> str:
+    return f"https://www.linkedin.com/in/bench-{run_id}-{index}/"
+
+
+# name: (workflow, input for request index)
+WORKLOADS: dict[str, tuple[str, Callable[[str, int], dict[str, Any]]]] = {
+    "profile-router": (
+        "GetLinkedinProfileWorkflow",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "brightdata-profile": (
+        "GetLinkedinProfileWorkflowBrightdata",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "brightdata-batch": (
+        "BatchGetLinkedinProfilesWorkflowBrightdata",
+        lambda run_id, i: {"profile_urls": [_profile_url(run_id, f"{i}-{n}") for n in range(10)]},
+    ),
+    "brightdata-posts": (
+        "GetLinkedinProfilePostsWorkflowBrightdata",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "brightdata-reactions": (
+        "GetLinkedinProfileReactionsWorkflowBrightdata",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "phantombuster-profile": (
+        "GetLinkedinProfileWorkflowPhantombuster",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "phantombuster-posts": (
+        "GetLinkedinProfilePostsWorkflowPhantombuster",
+        lambda run_id, i: {"profile_url": _profile_url(run_id, i)},
+    ),
+    "linkedin-post": (
+        "CreatePostOnLinkedinWorkflow",
+        lambda run_id, i: {"text": f"Benchmark post {run_id} #{i}"},
+    ),
+}
+
+
+@dataclass
+class ProcessSample:
+    cpu_seconds: float
+    rss_bytes: int
+    peak_rss_bytes: int
+
+
+def sample_process(pid: int) -> ProcessSample | None:
+    """Read a process's CPU time and memory from /proc (Linux only)."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name; utime and stime are 14 and 15
+    fields = stat.rsplit(")", 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    memory = {}
+    for line in status.splitlines():
+        name, _, value = line.partition(":")
+        if name in ("VmRSS", "VmHWM"):
+            memory[name] = int(value.split()[0]) * 1024
+    return ProcessSample(cpu_seconds, memory.get("VmRSS", 0), memory.get("VmHWM", 0))
+
+
+def child_pids(pid: int) -> list[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # The parent PID is the second field after the command name
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return children
+
+
+def sample_workers(pid: int) -> ProcessSample | None:
+    """CPU time and memory of the worker, summed with its worker processes under --workers."""
+    samples = [sample for sample in map(sample_process, [pid, *child_pids(pid)]) if sample]
+    if not samples:
+        return None
+    return ProcessSample(
+        sum(sample.cpu_seconds for sample in samples),
+        sum(sample.rss_bytes for sample in samples),
+        sum(sample.peak_rss_bytes for sample in samples),
+    )
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@dataclass
+class BenchmarkResult:
+    workload: str
+    requests: int
+    concurrency: int
+    ready_delay: float
+    payload_bytes: int
+    completed: int = 0
+    failed: int = 0
+    duration_seconds: float = 0.0
+    throughput_per_second: float = 0.0
+    latency_p50: float | None = None
+    latency_p99: float | None = None
+    latency_max: float | None = None
+    worker_cpu_seconds: float | None = None
+    worker_cpu_percent: float | None = None
+    worker_rss_bytes: int | None = None
+    worker_peak_rss_bytes: int | None = None
+    mock_requests: dict[str, int] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    python: str = platform.python_version()
+
+
+def start_worker(env: dict[str, str], workers: int) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "src.services", "--workers", str(workers)], cwd=ROOT, env=env)
+
+
+def worker_env(args: argparse.Namespace, mock_url: str, workdir: Path) -> dict[str, str]:
+    env = {
+        **os.environ,
+        "BRIGHT_DATA_API_URL": mock_url,
+        "BRIGHT_DATA_API_TOKEN": "benchmark",
+        "BRIGHT_DATA_REACTION_DATASET_ID": "benchmark-reactions",
+        "PHANTOMBUSTER_API_URL": mock_url,
+        "PHANTOMBUSTER_API_KEY": "benchmark",
+        "PHANTOMBUSTER_PROFILE_AGENT_ID": "benchmark-profile",
+        "PHANTOMBUSTER_POSTS_AGENT_ID": "benchmark-posts",
+        "PHANTOMBUSTER_REACTIONS_AGENT_ID": "benchmark-reactions",
+        "LINKEDIN_API_URL": mock_url,
+        "LINKEDIN_ACCESS_TOKEN": "benchmark",
+        "LINKEDIN_AUTHOR_URN": "urn:li:person:benchmark",
+        # Every request must reach the providers, and nothing from earlier runs
+        # (cached results, learned readiness times) may leak into this one
+        "CACHE_ENABLED": "false",
+        "CACHE_PATH": str(workdir / "cache.sqlite3"),
+        "POLLING_STATS_PATH": str(workdir / "polling.sqlite3"),
+        "BRIGHT_DATA_NOTIFY_STORE": str(workdir / "notifications.sqlite3"),
+        "ROUTING_STATS_PATH": str(workdir / "routing.sqlite3"),
+        "SPOOL_DIR": str(workdir / "spool"),
+        "PAYLOAD_STORE": "file",
+        "PAYLOAD_STORE_PATH": str(workdir / "payloads"),
+    }
+    if args.notify:
+        env["BRIGHT_DATA_NOTIFY_URL"] = f"http://127.0.0.1:{args.notify_port}/brightdata/notify"
+        env["BRIGHT_DATA_NOTIFY_PORT"] = str(args.notify_port)
+    else:
+        # Empty rather than unset, so a value in .env does not apply either
+        env["BRIGHT_DATA_NOTIFY_URL"] = ""
+        env["BRIGHT_DATA_NOTIFY_PORT"] = ""
+    return env
+
+
+async def run_workflow(workload: str, run_id: str, index: int) -> float:
+    from src.client import TASK_QUEUE, client
+
+    workflow_name, build_input = WORKLOADS[workload]
+    workflow_id = f"bench-{run_id}-{index}"
+    started = time.perf_counter()
+    workflow_run_id = await client.schedule_workflow(
+        workflow_name=workflow_name,
+        workflow_id=workflow_id,
+        workflow_input=build_input(run_id, index),
+        task_queue=TASK_QUEUE,
+    )
+    await client.get_workflow_result(workflow_id=workflow_id, run_id=workflow_run_id)
+    return time.perf_counter() - started
+
+
+async def drive(args: argparse.Namespace, result: BenchmarkResult, worker_pid: int) -> None:
+    run_id = uuid.uuid4().hex[:8]
+
+    # Warm up: the first run waits for the worker to connect and start polling
+    for index in range(args.warmup):
+        await asyncio.wait_for(run_workflow(args.workflow, f"{run_id}-warmup", index), args.timeout)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            try:
+                latencies.append(await asyncio.wait_for(run_workflow(args.workflow, run_id, index), args.timeout))
+            except Exception as e:
+                result.failed += 1
+                if len(result.errors) < 10:
+                    result.errors.append(f"{type(e).__name__}: {e}")
+
+    before = sample_workers(worker_pid)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(args.requests)))
+    result.duration_seconds = time.perf_counter() - started
+    after = sample_workers(worker_pid)
+
+    result.completed = len(latencies)
+    result.throughput_per_second = result.completed / result.duration_seconds if result.duration_seconds else 0.0
+    result.latency_p50 = percentile(latencies, 0.50)
+    result.latency_p99 = percentile(latencies, 0.99)
+    result.latency_max = max(latencies, default=None)
+    if before and after:
+        result.worker_cpu_seconds = after.cpu_seconds - before.cpu_seconds
+        result.worker_cpu_percent = 100 * result.worker_cpu_seconds / result.duration_seconds
+        result.worker_rss_bytes = after.rss_bytes
+        result.worker_peak_rss_bytes = after.peak_rss_bytes
+
+
+async def benchmark(args: argparse.Namespace) -> BenchmarkResult:
+    config = MockConfig(args.ready_delay, args.payload_bytes, args.records, args.phantombuster_output)
+    server, providers = await start_mock_servers("127.0.0.1", args.mock_port, config)
+    mock_port = server.sockets[0].getsockname()[1]
+    result = BenchmarkResult(args.workflow, args.requests, args.concurrency, args.ready_delay, args.payload_bytes)
+
+    with tempfile.TemporaryDirectory(prefix="linkedin-mcp-bench-") as workdir:
+        worker = start_worker(worker_env(args, f"http://127.0.0.1:{mock_port}", Path(workdir)), args.workers)
+        try:
+            await drive(args, result, worker.pid)
+        finally:
+            worker.terminate()
+            try:
+                worker.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+            server.close()
+    result.mock_requests = dict(providers.stats.requests)
+    return result
+
+
+def _format(value: Any, unit: str = "") -> str:
+    if value is None:
+        return "n/a"
+    if unit == "bytes":
+        return f"{value / (1024 * 1024):.1f} MiB"
+    if isinstance(value, float):
+        return f"{value:.3f}{unit}"
+    return f"{value}{unit}"
+
+
+REPORTED = [
+    ("throughput_per_second", "Throughput", "/s"),
+    ("latency_p50", "Latency p50", "s"),
+    ("latency_p99", "Latency p99", "s"),
+    ("latency_max", "Latency max", "s"),
+    ("worker_cpu_seconds", "Worker CPU", "s"),
+    ("worker_cpu_percent", "Worker CPU use", "%"),
+    ("worker_rss_bytes", "Worker RSS", "bytes"),
+    ("worker_peak_rss_bytes", "Worker peak RSS", "bytes"),
+]
+
+
+def report(result: BenchmarkResult, baseline: dict[str, Any] | None = None) -> str:
+    lines = [
+        f"{result.workload}: {result.completed}/{result.requests} completed, {result.failed} failed "
+        f"in {result.duration_seconds:.1f}s (concurrency {result.concurrency}, "
+        f"ready delay {result.ready_delay}s, payload {result.payload_bytes} bytes)"
+    ]
+    for key, label, unit in REPORTED:
+        value = getattr(result, key)
+        line = f"  {label:<16} {_format(value, unit):>14}"
+        previous = (baseline or {}).get(key)
+        if previous and value is not None:
+            line += f"   {_format(previous, unit):>14} before ({(value - previous) / previous:+.1%})"
+        lines.append(line)
+    lines.append(f"  Mock requests    {json.dumps(result.mock_requests, sort_keys=True)}")
+    lines.extend(f"  Error: {error}" for error in result.errors)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark a worker against mock provider APIs")
+    parser.add_argument("--workflow", choices=sorted(WORKLOADS), default="brightdata-profile")
+    parser.add_argument("--requests", type=int, default=100, help="Workflows to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Workflows running at the same time")
+    parser.add_argument("--ready-delay", type=float, default=5.0, help="Seconds until a mock job is ready")
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="Approximate size of each job's result")
+    parser.add_argument("--records", type=int, default=1, help="Records returned per job input")
+    parser.add_argument(
+        "--phantombuster-output",
+        choices=["inline", "csv", "json"],
+        default="inline",
+        help="How mock Phantombuster containers return their results",
+    )
+    parser.add_argument("--notify", action="store_true", help="Have the mock Bright Data send completion notifications")
+    parser.add_argument("--notify-port", type=int, default=8899)
+    parser.add_argument("--mock-port", type=int, default=0, help="Port of the mock servers (0 picks a free one)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (services --workers)")
+    parser.add_argument("--warmup", type=int, default=1, help="Workflows run before measuring")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before a workflow counts as failed")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    parser.add_argument("--compare", type=Path, help="Previous JSON result to compare with")
+    args = parser.parse_args()
+
+    result = asyncio.run(benchmark(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(report(result, baseline))
+    if args.output:
+        args.output.write_text(json.dumps(asdict(result), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Startup cost of a worker per provider selection: the time to import
+# src.services and load the workflows and functions ENABLED_PROVIDERS selects,
+# and the process's peak RSS once they are loaded. Each selection runs in
+# fresh interpreters, so nothing is shared through the import cache:
+#
+#   python -m benchmarks.startup --runs 10
+#
+# The worker is not started and no Restack engine is needed. Peak RSS is read
+# from getrusage and is reported in MB on Linux.
+
+SELECTIONS = ["all", "brightdata", "phantombuster", "linkedin"]
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from src.config import enabled_providers
+from src.services import registrations
+workflows, functions = registrations(enabled_providers())
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "workflows": len(workflows),
+    "functions": sum(map(len, functions.values())),
+}))
+"""
+
+
+def probe(selection: str) -> dict[str, float]:
+    env = {**os.environ, "ENABLED_PROVIDERS": selection}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(selection: str, runs: int) -> dict[str, float]:
+    probes = [probe(selection) for _ in range(runs)]
+    return {
+        "seconds": statistics.median(p["seconds"] for p in probes),
+        "rss": statistics.median(p["rss"] for p in probes),
+        "modules": probes[-1]["modules"],
+        "workflows": probes[-1]["workflows"],
+        "functions": probes[-1]["functions"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure worker startup time and memory per provider selection")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--providers", nargs="+", default=SELECTIONS, help="ENABLED_PROVIDERS values to compare")
+    args = parser.parse_args()
+
+    print(f"{'providers':<28}{'import':>10}{'peak RSS':>12}{'modules':>10}{'workflows':>11}{'functions':>11}")
+    for selection in args.providers:
+        result = run(selection, args.runs)
+        print(
+            f"{selection:<28}{result['seconds'] * 1000:>7.0f} ms{result['rss']:>9.1f} MB"
+            f"{result['modules']:>10}{result['workflows']:>11}{result['functions']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Local persistent result cache keyed by (kind, canonical profile URL).
+# Kinds are namespaced by provider, e.g. "brightdata:profile" or
+# "phantombuster:posts"; the TTL is chosen from the entity part after the colon.
+# Entries are stored under the kind and CACHE_VERSION ("brightdata:profile:v2"),
+# which changes whenever the shape of cached results does, so a lookup never
+# returns a result of an older shape. Entries of other versions are dropped
+# when the cache is opened.
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "linkedin_mcp" / "cache.sqlite3"
+
+# v2: results are the normalised models of src/models.py, not raw provider records
+CACHE_VERSION = "v2"
+
+_VERSION = re.compile(r"^v\d+$")
+
+DEFAULT_TTLS = {
+    "profile": 24 * 3600,
+    "posts": 3600,
+}
+
+
+def ttl_for(kind: str) -> int:
+    """TTL in seconds for a cache kind, from CACHE_TTL_<ENTITY> or the defaults."""
+    parts = kind.split(":")
+    if len(parts) > 1 and _VERSION.match(parts[-1]):
+        parts.pop()
+    entity = parts[-1]
+    value = os.environ.get(f"CACHE_TTL_{entity.upper()}")
+    if value:
+        return int(value)
+    return DEFAULT_TTLS.get(entity, 3600)
+
+
+class ResultCache:
+    """SQLite-backed cache with per-kind TTLs and LRU eviction by total size."""
+
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        self._db.execute("DELETE FROM results WHERE kind NOT LIKE ?", (f"%:{CACHE_VERSION}",))
+
+    def namespace(self, kind: str) -> str:
+        return f"{kind}:{CACHE_VERSION}"
+
+    def get(self, kind: str, key: str) -> dict[str, Any] | None:
+        """Return ``{"data", "fetched_at", "age"}`` for an entry, fresh or not."""
+        now = time.time()
+        kind = self.namespace(kind)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, fetched_at FROM results WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE results SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+        data, fetched_at = row
+        return {"data": json.loads(data), "fetched_at": fetched_at, "age": now - fetched_at}
+
+    def put(self, kind: str, key: str, data: Any) -> None:
+        encoded = json.dumps(data, separators=(",", ":")).encode()
+        now = time.time()
+        kind = self.namespace(kind)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (kind, key, data, size, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, encoded, len(encoded), now, now),
+            )
+            self._evict()
+
+    def delete(self, kind: str, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE kind = ? AND key = ?", (self.namespace(kind), key))
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit
+        rows = self._db.execute("SELECT kind, key, size FROM results ORDER BY accessed_at").fetchall()
+        evicted = []
+        for kind, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((kind, key))
+            total -= size
+        self._db.executemany("DELETE FROM results WHERE kind = ? AND key = ?", evicted)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM results GROUP BY kind"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "max_bytes": self.max_bytes,
+            "kinds": {kind: {"entries": count, "bytes": size} for kind, count, size in rows},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: ResultCache | None = None
+
+
+def get_cache() -> ResultCache:
+    """Return the worker's cache, opened once on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(
+            os.environ.get("CACHE_PATH") or DEFAULT_CACHE_PATH,
+            int(os.environ.get("CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+        )
+    return _cache
@@ -1,14 +1,25 @@
 import os
 
-from dotenv import load_dotenv
 from restack_ai import Restack
 from restack_ai.restack import CloudConnectionOptions
 
+from src.config import load_config
+
 # Load environment variables from a .env file
-load_dotenv()
+load_config()
 
 TASK_QUEUE = "linkedin-mcp"
 
+# Workflows run on TASK_QUEUE. Their function steps run on the queue of their
+# workload class, and each queue has its own concurrency cap (see src.services).
+# A slow snapshot download therefore never holds a slot that a post or a
+# cache lookup needs.
+INTERACTIVE_QUEUE = f"{TASK_QUEUE}-interactive"  # sub-second steps a caller waits on
+TRIGGER_QUEUE = f"{TASK_QUEUE}-triggers"  # starting provider jobs
+SUPERVISION_QUEUE = f"{TASK_QUEUE}-supervision"  # checking on and waiting for running jobs
+DOWNLOAD_QUEUE = f"{TASK_QUEUE}-downloads"  # downloading, parsing and storing results
+UPLOAD_QUEUE = f"{TASK_QUEUE}-uploads"  # publishing posts with media, uploading the media first
+
 engine_id = os.getenv("RESTACK_ENGINE_ID")
 address = os.getenv("RESTACK_ENGINE_ADDRESS")
 api_key = os.getenv("RESTACK_ENGINE_API_KEY")
@@ -0,0 +1,39 @@
+import os
+
+from dotenv import load_dotenv
+
+# Worker configuration read from the environment. The .env file is loaded once,
+# by load_config(), which src.client calls on import. Everything else reads
+# os.environ when it needs a setting.
+#
+# ENABLED_PROVIDERS selects the providers a worker registers, e.g.
+# "brightdata" or "brightdata,linkedin"; by default all of them. Only the
+# modules of enabled providers are imported (see src.services).
+
+PROVIDERS = ("brightdata", "phantombuster", "linkedin")
+
+_loaded = False
+
+
+def load_config() -> None:
+    """Load the .env file into the environment, once; variables already set win."""
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
+
+
+def enabled_providers() -> list[str]:
+    """The providers selected by ENABLED_PROVIDERS, in PROVIDERS order."""
+    load_config()
+    value = os.environ.get("ENABLED_PROVIDERS", "").strip().lower()
+    if value in ("", "all"):
+        return list(PROVIDERS)
+    selected = {provider.strip() for provider in value.split(",") if provider.strip()}
+    unknown = selected - set(PROVIDERS)
+    if unknown:
+        raise ValueError(
+            f"Unknown provider(s) in ENABLED_PROVIDERS: {', '.join(sorted(unknown))}. "
+            f"Choose from {', '.join(PROVIDERS)}."
+        )
+    return [provider for provider in PROVIDERS if provider in selected]
@@ -0,0 +1,174 @@
+import json
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+
+from src.functions.brightdata.notifications import notify_secret, notify_url
+from src.ratelimit import rate_limited
+from src.transport import get_http_client
+
+# asyncio-native Bright Data dataset API client (trigger, progress, download).
+# It replaces the blocking brightdata SDK that had to run on the default thread
+# pool: requests go through the worker's shared connection pool instead, so
+# hundreds of concurrent snapshot downloads need no thread each.
+
+BRIGHT_DATA_API_URL = "https://api.brightdata.com"
+
+# Dataset IDs used by the Bright Data SDK, overridable per account. Reactions
+# have no public dataset: BRIGHT_DATA_REACTION_DATASET_ID must name the
+# account's reactions scraper
+DATASET_IDS = {
+    "profile": "gd_l1viktl72bvl7bjuj0",
+    "post": "gd_lyy3tktm25m4avu764",
+}
+
+
+class BrightDataError(Exception):
+    """Raised when the Bright Data API returns an error response."""
+
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def dataset_id(kind: str) -> str:
+    env = f"BRIGHT_DATA_{kind.upper()}_DATASET_ID"
+    value = os.environ.get(env) or DATASET_IDS.get(kind)
+    if not value:
+        raise BrightDataError(f"{env} is not set")
+    return value
+
+
+class BrightDataClient:
+    """Thin async wrapper over the Bright Data datasets v3 API."""
+
+    def __init__(self, api_token: str, base_url: str | None = None) -> None:
+        self.api_token = api_token
+        self.base_url = (base_url or os.environ.get("BRIGHT_DATA_API_URL") or BRIGHT_DATA_API_URL).rstrip("/")
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_token}"}
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        client = get_http_client()
+        response = await client.request(
+            method, f"{self.base_url}{path}", headers=self.headers, extensions=self._rate_limit(path), **kwargs
+        )
+        return self._check(response, method, path)
+
+    @staticmethod
+    def _rate_limit(path: str) -> dict[str, str]:
+        # /datasets/v3/<endpoint>/... -> brightdata:<endpoint>
+        return rate_limited(f"brightdata:{path.split('/')[3]}")
+
+    @staticmethod
+    def _check(response: httpx.Response, method: str, path: str) -> httpx.Response:
+        if response.status_code == 401:
+            raise BrightDataError("Invalid Bright Data API token or insufficient permissions", 401)
+        if response.status_code == 404:
+            raise BrightDataError(f"Bright Data resource not found: {path}", 404)
+        if response.status_code >= 400:
+            raise BrightDataError(
+                f"Bright Data request {method} {path} failed with status {response.status_code}: {response.text}",
+                response.status_code,
+            )
+        return response
+
+    async def trigger(
+        self, dataset: str, inputs: list[dict[str, Any]], params: dict[str, str] | None = None
+    ) -> dict[str, Any]:
+        """Start a collection job and return Bright Data's response (with snapshot_id).
+
+        When BRIGHT_DATA_NOTIFY_URL is set, Bright Data is asked to call it back
+        once the snapshot is ready.
+        """
+        query = {"dataset_id": dataset_id(dataset), "include_errors": "true", **(params or {})}
+        if notify_url():
+            query["notify"] = notify_url()
+            if notify_secret():
+                query["auth_header"] = notify_secret()
+        response = await self._request("POST", "/datasets/v3/trigger", params=query, json=inputs)
+        return response.json()
+
+    async def trigger_profiles(self, urls: list[str]) -> dict[str, Any]:
+        return await self.trigger("profile", [{"url": url} for url in urls])
+
+    async def trigger_posts_discovery(self, profile_urls: list[str], start_date: str = "") -> dict[str, Any]:
+        inputs = []
+        for url in profile_urls:
+            item = {"url": url}
+            if start_date:
+                item["start_date"] = start_date
+            inputs.append(item)
+        return await self.trigger(
+            "post", inputs, {"type": "discover_new", "discover_by": "profile_url"}
+        )
+
+    async def trigger_reactions(self, post_urls: list[str]) -> dict[str, Any]:
+        return await self.trigger("reaction", [{"url": url} for url in post_urls])
+
+    async def progress(self, snapshot_id: str) -> dict[str, Any]:
+        """Return the snapshot status: starting, running, ready or failed."""
+        response = await self._request("GET", f"/datasets/v3/progress/{snapshot_id}")
+        return response.json()
+
+    async def download(self, snapshot_id: str) -> list[dict[str, Any]] | dict[str, Any]:
+        """Download a snapshot.
+
+        Returns the list of records when the snapshot is ready, or a status dict
+        (``{"status": "not_ready", ...}``) while Bright Data is still collecting.
+        """
+        response = await self._request(
+            "GET", f"/datasets/v3/snapshot/{snapshot_id}", params={"format": "json"}
+        )
+        if response.status_code == 202:
+            try:
+                message = response.json().get("message", "Snapshot is not ready yet")
+            except ValueError:
+                message = "Snapshot is not ready yet"
+            return {"status": "not_ready", "message": message, "snapshot_id": snapshot_id}
+
+        text = response.text
+        stripped = text.strip()
+        # Some snapshots come back as NDJSON even when JSON is requested
+        if stripped.startswith("{") and "\n{" in stripped:
+            return [json.loads(line) for line in stripped.splitlines() if line.strip()]
+        return response.json()
+
+    @asynccontextmanager
+    async def stream_snapshot(self, snapshot_id: str) -> AsyncIterator[httpx.Response]:
+        """Open a snapshot download as NDJSON without reading the body.
+
+        The response status is 202 while the snapshot is not ready yet; otherwise
+        the body can be consumed incrementally with ``aiter_bytes()``.
+        """
+        client = get_http_client()
+        path = f"/datasets/v3/snapshot/{snapshot_id}"
+        async with client.stream(
+            "GET",
+            f"{self.base_url}{path}",
+            headers=self.headers,
+            params={"format": "ndjson"},
+            extensions=self._rate_limit(path),
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+            yield self._check(response, "GET", path)
+
+
+_client: BrightDataClient | None = None
+
+
+def get_brightdata_client() -> BrightDataClient:
+    """Return the worker's Bright Data client, created once on first use."""
+    global _client
+    api_token = os.environ.get("BRIGHT_DATA_API_TOKEN")
+    if not api_token:
+        raise BrightDataError("BRIGHT_DATA_API_TOKEN is not set")
+    if _client is None or _client.api_token != api_token:
+        _client = BrightDataClient(api_token)
+    return _client
@@ -1,12 +1,20 @@
 import os
+import time
+from collections.abc import Iterable
 from typing import Any
-from dotenv import load_dotenv
 import asyncio
 from pydantic import BaseModel, Field
-from restack_ai.function import NonRetryableError, function, log
-from brightdata import bdclient
-
-load_dotenv()
+from restack_ai.function import NonRetryableError, RetryableError, function, log
+
+from src.functions.brightdata.api import get_brightdata_client
+from src.functions.brightdata.notifications import get_notification_store, notify_url
+from src.functions.cache import cache_result
+from src.models import line_transform, to_builtins, to_model, to_models
+from src.payloads import is_payload_ref, load, offload, offload_threshold, store_payload
+from src.projection import project
+from src.singleflight import get_single_flight, join_window
+from src.spool import get_spool
+from src.urls import canonical_profile_url
 
 # Changes to this file should also be reflected in the Phantombuster version
 
@@ -27,6 +35,55 @@ class GetProfileInput(BaseModel):
         description="The URL of the LinkedIn profile.",
         example="https://www.linkedin.com/in/williamhgates/",
     )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each record, as dotted paths such as 'headline' or 'experience.title'. Applies to cached results too; by default every field is returned.",
+        min_length=1,
+        example=["name", "headline", "company"],
+    )
+    report_cached: bool = Field(
+        default=False,
+        title="Report Cached",
+        description="Return {\"cached\": <bool>, \"result\": <result>} instead of the bare result, telling cache hits apart from scrapes.",
+    )
+
+
+class GetProfilesInput(BaseModel):
+    """Input parameters for getting many LinkedIn profiles in batched snapshots."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    profile_urls: list[str] = Field(
+        ...,
+        title="LinkedIn Profile URLs",
+        description="The URLs of the LinkedIn profiles.",
+        min_length=1,
+        example=["https://www.linkedin.com/in/williamhgates/", "https://www.linkedin.com/in/satyanadella/"],
+    )
+    batch_size: int = Field(
+        default=100,
+        title="Batch Size",
+        description="Maximum number of profile URLs collected by a single Bright Data snapshot.",
+        ge=1,
+        le=5000,
+    )
 
 
 class SnapshotIdInput(BaseModel):
@@ -44,6 +101,123 @@ class SnapshotIdInput(BaseModel):
         title="Snapshot ID",
         description="The snapshot ID returned by Bright Data.",
     )
+    kind: str | None = Field(
+        default=None,
+        title="Kind",
+        description="Return the records as normalised 'profile', 'post' or 'reaction' models instead of Bright Data's raw records.",
+        pattern="^(profile|post|reaction)$",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each record. The cached result keeps every field.",
+        min_length=1,
+    )
+    cache_kind: str | None = Field(
+        default=None,
+        title="Cache Kind",
+        description="Store the full result in the cache under this kind, e.g. 'brightdata:profile', keyed by profile_url.",
+    )
+    profile_url: str | None = Field(
+        default=None,
+        title="LinkedIn Profile URL",
+        description="The profile the result is cached under.",
+    )
+
+
+class ProfilesSnapshotInput(BaseModel):
+    """Input parameters for downloading a batched profile snapshot."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    snapshot_id: str = Field(
+        ...,
+        title="Snapshot ID",
+        description="The snapshot ID returned by Bright Data.",
+    )
+    profile_urls: list[str] = Field(
+        ...,
+        title="LinkedIn Profile URLs",
+        description="The profile URLs that were submitted with this snapshot.",
+    )
+    normalise: bool = Field(
+        default=False,
+        title="Normalise",
+        description="Return each profile as a normalised profile model instead of Bright Data's raw record.",
+    )
+    cache_kind: str | None = Field(
+        default=None,
+        title="Cache Kind",
+        description="Store each collected profile in the cache under this kind, e.g. 'brightdata:profile', keyed by its URL.",
+    )
+
+
+class ProfileBatchesInput(BaseModel):
+    """Input parameters for combining the downloaded chunks of a profile batch."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    profile_urls: list[str] = Field(
+        ...,
+        title="LinkedIn Profile URLs",
+        description="All profile URLs of the batch, in the order results are returned.",
+    )
+    batches: list[Any] = Field(
+        ...,
+        title="Batches",
+        description="Each downloaded chunk's results keyed by URL, inline or as a payload reference.",
+    )
+    errors: dict[str, Any] = Field(
+        default_factory=dict,
+        title="Errors",
+        description="Results of URLs whose chunk could not be triggered or downloaded.",
+    )
+
+
+class SnapshotPageInput(BaseModel):
+    """Input parameters for reading a page of a spooled snapshot."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    snapshot_id: str = Field(
+        ...,
+        title="Snapshot ID",
+        description="The snapshot ID returned by Bright Data.",
+    )
+    cursor: int = Field(
+        default=0,
+        title="Cursor",
+        description="Position to read from, as returned in next_cursor by the previous page.",
+        ge=0,
+    )
+    limit: int = Field(
+        default=500,
+        title="Limit",
+        description="Maximum number of records to return.",
+        ge=1,
+        le=5000,
+    )
+    kind: str | None = Field(
+        default=None,
+        title="Kind",
+        description="Return the records as normalised 'profile', 'post' or 'reaction' models instead of Bright Data's raw records.",
+        pattern="^(profile|post|reaction)$",
+    )
 
 
 def raise_exception(message: str) -> None:
@@ -51,6 +225,19 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+def normalise_records(records: list[Any], kind: str | None) -> list[Any]:
+    """Bright Data's raw records as they are, or mapped onto the kind's model when kind is set."""
+    if kind is None:
+        return records
+    return to_builtins(list(to_models(kind, "brightdata", records)))
+
+
+def cache_snapshot_result(function_input: SnapshotIdInput, result: Any) -> None:
+    """Store a snapshot's full result in the cache, when the input names a cache entry."""
+    if function_input.cache_kind and function_input.profile_url:
+        cache_result(function_input.cache_kind, function_input.profile_url, result)
+
+
 @function.defn()
 async def trigger_linkedin_profile_scrape(function_input: GetProfileInput) -> dict[str, Any]:
     """Trigger a LinkedIn profile scrape and return the snapshot_id."""
@@ -59,19 +246,33 @@ async def trigger_linkedin_profile_scrape(function_input: GetProfileInput) -> di
         if not api_token:
             raise_exception("BRIGHT_DATA_API_TOKEN is not set")
 
-        bd = bdclient(api_token)
-        log.info(f"Initiating scrape for {function_input.profile_url}")
-
-        # Use sync=False to get snapshot_id immediately
-        initial_response = await asyncio.to_thread(
-            bd.scrape_linkedin.profiles, function_input.profile_url, sync=False
+        bd = get_brightdata_client()
+        initial_response: dict[str, Any] = {}
+
+        async def trigger() -> str | None:
+            nonlocal initial_response
+            log.info(f"Initiating scrape for {function_input.profile_url}")
+            # Trigger returns the snapshot_id immediately
+            initial_response = await bd.trigger_profiles([function_input.profile_url])
+            log.info(f"Initial response from Bright Data: {initial_response}")
+            return initial_response.get("snapshot_id")
+
+        # Attach to a pending snapshot for the same profile instead of paying for a new one
+        flight = get_single_flight("brightdata")
+        snapshot_id, coalesced = await flight.run(
+            f"profile:{canonical_profile_url(function_input.profile_url)}",
+            trigger,
+            max_join_age=join_window("brightdata:profile", function_input.max_age),
         )
-        
-        log.info(f"Initial response from Bright Data: {initial_response}")
+        if coalesced:
+            log.info(f"Joined in-flight scrape for {function_input.profile_url}. Snapshot ID: {snapshot_id}")
+            return {
+                "snapshot_id": snapshot_id,
+                "coalesced": True,
+                "notify": bool(notify_url()),
+                "triggered_at": flight.started_at(snapshot_id) or time.time(),
+            }
 
-        # Extract snapshot_id from the response
-        snapshot_id = initial_response.get("snapshot_id")
-        
         # Check if we got a direct result (no snapshot_id means it completed synchronously)
         if not snapshot_id:
             status = initial_response.get("status")
@@ -83,39 +284,79 @@ async def trigger_linkedin_profile_scrape(function_input: GetProfileInput) -> di
             return initial_response
 
         log.info(f"Scrape initiated. Snapshot ID: {snapshot_id}")
-        return {"snapshot_id": snapshot_id}
+        return {"snapshot_id": snapshot_id, "notify": bool(notify_url()), "triggered_at": time.time()}
 
     except Exception as e:
         error_message = f"trigger_linkedin_profile_scrape failed: {e}"
         raise NonRetryableError(error_message) from e
 
 
+@function.defn()
+async def check_brightdata_notification(function_input: SnapshotIdInput) -> dict[str, Any]:
+    """Look up Bright Data's completion notification for a snapshot, as received by any worker.
+
+    Returns ``{"status": "ready" | "failed" | ...}`` as notified, or
+    ``{"status": "pending"}`` when none has arrived yet.
+    """
+    try:
+        snapshot_id = function_input.snapshot_id
+        status = await asyncio.to_thread(get_notification_store().status, snapshot_id)
+        if status is None:
+            return {"status": "pending"}
+        log.info(f"Snapshot {snapshot_id} notified with status: {status}")
+        return {"status": status}
+
+    except Exception as e:
+        error_message = f"check_brightdata_notification failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def release_brightdata_snapshot(function_input: SnapshotIdInput) -> dict[str, Any]:
+    """Stop coalescing new scrapes onto a snapshot that failed or was given up on.
+
+    Runs on the triggers queue, where the snapshot was registered when it was triggered.
+    """
+    try:
+        get_single_flight("brightdata").release(function_input.snapshot_id)
+        return {"released": True}
+
+    except Exception as e:
+        error_message = f"release_brightdata_snapshot failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def download_brightdata_snapshot(function_input: SnapshotIdInput) -> Any:
     """Download a Bright Data snapshot. Raises RetryableError if snapshot is not ready yet.
+
+    With cache_kind, the full records are cached before they are projected onto fields.
     
     Returns:
         - list: When snapshot is ready, returns the list of records
         - dict: When snapshot is still processing, returns status dict (will raise RetryableError)
     """
-    from restack_ai.function import RetryableError
-    
     try:
         api_token = os.environ.get("BRIGHT_DATA_API_TOKEN")
         if not api_token:
             raise_exception("BRIGHT_DATA_API_TOKEN is not set")
 
-        bd = bdclient(api_token)
+        bd = get_brightdata_client()
         snapshot_id = function_input.snapshot_id
         
         log.info(f"Downloading snapshot {snapshot_id}...")
-        snapshot_data = await asyncio.to_thread(bd.download_snapshot, snapshot_id=snapshot_id)
+        snapshot_data = await bd.download(snapshot_id)
         
         # Bright Data returns a list when the snapshot is ready (the actual data)
         # or a dict with status when it's still processing
         if isinstance(snapshot_data, list):
             log.info(f"Snapshot {snapshot_id} is ready. Retrieved {len(snapshot_data)} record(s).")
-            return snapshot_data
+            get_single_flight("brightdata").release(snapshot_id)
+            records = normalise_records(snapshot_data, function_input.kind)
+            result = await offload(records)
+            cache_snapshot_result(function_input, result)
+            # Only the requested fields reach the workflow
+            return await offload(project(records, function_input.fields)) if function_input.fields else result
         
         # If it's a dict, check the status
         if isinstance(snapshot_data, dict):
@@ -124,8 +365,10 @@ async def download_brightdata_snapshot(function_input: SnapshotIdInput) -> Any:
 
             if status == "done":
                 log.info(f"Snapshot {snapshot_id} is ready.")
+                get_single_flight("brightdata").release(snapshot_id)
                 return snapshot_data
             elif status == "failed":
+                get_single_flight("brightdata").release(snapshot_id)
                 raise_exception(f"Bright Data snapshot {snapshot_id} failed. Details: {snapshot_data}")
             else:
                 # Status is "starting", "not_ready", or similar - not ready yet, retry
@@ -143,6 +386,215 @@ async def download_brightdata_snapshot(function_input: SnapshotIdInput) -> Any:
         raise NonRetryableError(error_message) from e
 
 
+async def spool_snapshot(snapshot_id: str) -> dict[str, Any]:
+    """Stream a ready snapshot to the local spool unless it is already there."""
+    spool = get_spool()
+    if spool.exists(snapshot_id):
+        return spool.info(snapshot_id)
+
+    bd = get_brightdata_client()
+    log.info(f"Streaming snapshot {snapshot_id} to the spool...")
+    async with bd.stream_snapshot(snapshot_id) as response:
+        if response.status_code == 202:
+            raise RetryableError(f"Snapshot {snapshot_id} is not ready yet.")
+        info = await spool.write(snapshot_id, response.aiter_bytes())
+    get_single_flight("brightdata").release(snapshot_id)
+    log.info(f"Snapshot {snapshot_id} spooled: {info['records']} record(s), {info['bytes']} bytes")
+    return info
+
+
+@function.defn()
+async def spool_brightdata_snapshot(function_input: SnapshotIdInput) -> dict[str, Any]:
+    """Stream a ready snapshot to disk and return its record count, without returning the records.
+
+    Raises RetryableError while the snapshot is not ready yet.
+    """
+    try:
+        return await spool_snapshot(function_input.snapshot_id)
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"spool_brightdata_snapshot failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def read_brightdata_snapshot_page(function_input: SnapshotPageInput) -> dict[str, Any]:
+    """Return one page of a spooled snapshot and the cursor of the next page (None at the end).
+
+    The snapshot is spooled again if this worker does not have it.
+    """
+    try:
+        spool = get_spool()
+        if not spool.exists(function_input.snapshot_id):
+            await spool_snapshot(function_input.snapshot_id)
+        records, next_cursor = spool.read_page(
+            function_input.snapshot_id, function_input.cursor, function_input.limit
+        )
+        return {"records": normalise_records(records, function_input.kind), "next_cursor": next_cursor}
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"read_brightdata_snapshot_page failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def offload_brightdata_snapshot(function_input: SnapshotIdInput) -> Any:
+    """Return a snapshot's records, or a payload reference when they exceed the offload threshold.
+
+    Large snapshots are copied from the spool to the payload store without
+    being parsed, unless they are normalised on the way. With cache_kind, the
+    full result is cached, and only the fields requested are returned. Raises
+    RetryableError while the snapshot is not ready yet.
+    """
+    try:
+        snapshot_id = function_input.snapshot_id
+        info = await spool_snapshot(snapshot_id)
+        spool = get_spool()
+        kind = function_input.kind
+        if info["bytes"] <= offload_threshold():
+            result = normalise_records([record for page in spool.iter_records(snapshot_id) for record in page], kind)
+        else:
+            transform = line_transform(kind, "brightdata") if kind else None
+            result = await store_payload(spool.iter_json_array(snapshot_id, transform=transform), info["records"])
+            log.info(f"Snapshot {snapshot_id} stored as payload {result['payload_ref']}")
+        cache_snapshot_result(function_input, result)
+        if not function_input.fields:
+            return result
+
+        # Project page by page from the spool, so the full records are never all in memory
+        projected = [
+            record
+            for page in spool.iter_records(snapshot_id)
+            for record in project(normalise_records(page, kind), function_input.fields)
+        ]
+        return await offload(projected)
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"offload_brightdata_snapshot failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+def _record_urls(record: dict[str, Any]) -> list[str]:
+    urls = []
+    record_input = record.get("input")
+    if isinstance(record_input, dict) and record_input.get("url"):
+        urls.append(record_input["url"])
+    for key in ("input_url", "url"):
+        if record.get(key):
+            urls.append(record[key])
+    return urls
+
+
+def demultiplex_profile_records(records: Iterable[dict[str, Any]], profile_urls: list[str]) -> dict[str, Any]:
+    """Map snapshot records back to the input URLs they were requested for.
+
+    Every input URL gets an entry, either ``{"status": "success", "data": ...}``
+    or ``{"status": "error", "error": ...}`` when Bright Data returned an error
+    record or nothing at all for it.
+    """
+    wanted = {canonical_profile_url(url) for url in profile_urls}
+    by_key: dict[str, Any] = {}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        key = next((key for key in map(canonical_profile_url, _record_urls(record)) if key in wanted), None)
+        # A successful record wins over an error record for the same profile
+        if key is None or by_key.get(key, {}).get("status") == "success":
+            continue
+        if record.get("error") or record.get("error_code"):
+            by_key[key] = {"status": "error", "error": record.get("error") or record.get("error_code")}
+        else:
+            by_key[key] = {"status": "success", "data": record}
+
+    missing = {"status": "error", "error": "No record returned by Bright Data"}
+    return {url: by_key.get(canonical_profile_url(url), missing) for url in profile_urls}
+
+
+@function.defn()
+async def trigger_linkedin_profiles_scrape(function_input: GetProfilesInput) -> dict[str, Any]:
+    """Trigger one Bright Data snapshot collecting all the given profiles."""
+    try:
+        api_token = os.environ.get("BRIGHT_DATA_API_TOKEN")
+        if not api_token:
+            raise_exception("BRIGHT_DATA_API_TOKEN is not set")
+
+        bd = get_brightdata_client()
+        log.info(f"Initiating batch scrape for {len(function_input.profile_urls)} profile(s)")
+        initial_response = await bd.trigger_profiles(function_input.profile_urls)
+
+        snapshot_id = initial_response.get("snapshot_id")
+        if not snapshot_id:
+            raise_exception(f"No snapshot_id found in Bright Data response: {initial_response}")
+
+        log.info(f"Batch scrape initiated. Snapshot ID: {snapshot_id}")
+        return {"snapshot_id": snapshot_id, "notify": bool(notify_url()), "triggered_at": time.time()}
+
+    except Exception as e:
+        error_message = f"trigger_linkedin_profiles_scrape failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def download_brightdata_profiles_snapshot(function_input: ProfilesSnapshotInput) -> dict[str, Any]:
+    """Download a batched profile snapshot and key its records by input URL.
+
+    The snapshot is streamed to the spool and demultiplexed page by page. With
+    cache_kind, each collected profile is cached here. Returns each URL's status
+    and the results keyed by URL, as a payload reference when large.
+    Raises RetryableError while the snapshot is not ready yet.
+    """
+    try:
+        await spool_snapshot(function_input.snapshot_id)
+        pages = get_spool().iter_records(function_input.snapshot_id)
+        results = demultiplex_profile_records(
+            (record for page in pages for record in page), function_input.profile_urls
+        )
+        # Profiles above the offload threshold are kept as payload references
+        for url, result in results.items():
+            if result["status"] == "success":
+                if function_input.normalise:
+                    result["data"] = to_builtins(to_model("profile", "brightdata", result["data"]))
+                result["data"] = await offload(result["data"])
+                if function_input.cache_kind:
+                    # Cached the way single-profile workflows store it, as a list of records
+                    data = result["data"]
+                    cache_result(function_input.cache_kind, url, data if is_payload_ref(data) else [data])
+        statuses = {url: result["status"] for url, result in results.items()}
+        reference = await offload(results)
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"download_brightdata_profiles_snapshot failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+    failed = sum(1 for status in statuses.values() if status == "error")
+    log.info(
+        f"Snapshot {function_input.snapshot_id}: {len(results) - failed} profile(s) collected, {failed} failed"
+    )
+    return {"statuses": statuses, "results": reference}
+
+
+@function.defn()
+async def combine_brightdata_profile_batches(function_input: ProfileBatchesInput) -> Any:
+    """Merge a batch's chunk results in input URL order, as a payload reference when large."""
+    try:
+        combined: dict[str, Any] = dict(function_input.errors)
+        for batch in function_input.batches:
+            combined.update(await load(batch))
+        missing = {"status": "error", "error": "No result collected"}
+        return await offload({url: combined.get(url, missing) for url in function_input.profile_urls})
+
+    except Exception as e:
+        error_message = f"combine_brightdata_profile_batches failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def get_linkedin_profile_brightdata(function_input: GetProfileInput) -> Any:
     """Legacy function - kept for backward compatibility. Use trigger_linkedin_profile_scrape + download_brightdata_snapshot instead."""
@@ -151,13 +603,11 @@ async def get_linkedin_profile_brightdata(function_input: GetProfileInput) -> An
         if not api_token:
             raise_exception("BRIGHT_DATA_API_TOKEN is not set")
 
-        bd = bdclient(api_token)
+        bd = get_brightdata_client()
         log.info(f"Initiating scrape for {function_input.profile_url}")
 
-        # Use sync=False to get snapshot_id immediately, then poll for completion
-        initial_response = await asyncio.to_thread(
-            bd.scrape_linkedin.profiles, function_input.profile_url, sync=False
-        )
+        # Get snapshot_id immediately, then poll for completion
+        initial_response = await bd.trigger_profiles([function_input.profile_url])
         
         log.info(f"Initial response from Bright Data: {initial_response}")
 
@@ -182,12 +632,12 @@ async def get_linkedin_profile_brightdata(function_input: GetProfileInput) -> An
         while attempt < max_attempts:
             attempt += 1
             log.info(f"Checking status for snapshot {snapshot_id} (attempt {attempt}/{max_attempts})...")
-            status_response = await asyncio.to_thread(bd.download_snapshot, snapshot_id=snapshot_id)
+            status_response = await bd.download(snapshot_id)
             
             # Bright Data returns a list when ready, or a dict with status when processing
             if isinstance(status_response, list):
                 log.info(f"Snapshot {snapshot_id} is ready. Retrieved {len(status_response)} record(s).")
-                return status_response
+                return project(status_response, function_input.fields)
             
             if isinstance(status_response, dict):
                 status = status_response.get("status")
@@ -204,7 +654,7 @@ async def get_linkedin_profile_brightdata(function_input: GetProfileInput) -> An
             raise_exception(f"Timeout waiting for Bright Data snapshot {snapshot_id} to complete after {max_attempts} attempts")
         
         log.info(f"Snapshot {snapshot_id} is ready. Downloading result.")
-        profile_data = await asyncio.to_thread(bd.download_snapshot, snapshot_id=snapshot_id)
+        profile_data = await bd.download(snapshot_id)
 
         if not profile_data:
             raise_exception("Failed to download profile data from Bright Data snapshot.")
@@ -214,4 +664,4 @@ async def get_linkedin_profile_brightdata(function_input: GetProfileInput) -> An
         raise NonRetryableError(error_message) from e
     else:
         log.info(f"Successfully scraped profile for {function_input.profile_url}")
-        return profile_data
+        return project(profile_data, function_input.fields)
@@ -1,12 +1,20 @@
 import os
+import time
 from typing import Any
-from dotenv import load_dotenv
 import asyncio
 from pydantic import BaseModel, Field
-from restack_ai.function import NonRetryableError, function, log
-from brightdata import bdclient
+from restack_ai.function import NonRetryableError, RetryableError, function, log
 
-load_dotenv()
+from src.functions.brightdata.api import get_brightdata_client
+from src.functions.brightdata.get_linkedin_profile import spool_snapshot
+from src.functions.brightdata.notifications import notify_url
+from src.models import to_builtins, to_model
+from src.payloads import offload
+from src.post_history import get_post_history
+from src.projection import project
+from src.singleflight import get_single_flight, join_window
+from src.spool import get_spool
+from src.urls import canonical_profile_url
 
 
 class GetProfilePostsInput(BaseModel):
@@ -25,6 +33,64 @@ class GetProfilePostsInput(BaseModel):
         description="The URL of the LinkedIn profile's post section.",
         example="https://www.linkedin.com/in/williamhgates/recent-activity/all/",
     )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each post, as dotted paths such as 'text' or 'likes'. Applies to cached results too; by default every field is returned.",
+        min_length=1,
+        example=["url", "text", "posted_at"],
+    )
+    incremental: bool = Field(
+        default=False,
+        title="Incremental",
+        description="Only discover posts published since the newest post seen by the previous incremental run for this profile, and return just the posts not seen before. The first run stores the full history.",
+    )
+    start_date: str | None = Field(
+        default=None,
+        title="Start Date",
+        description="Only discover posts published on or after this date (ISO 8601). Set from the stored high-water mark in incremental runs.",
+        example="2026-01-01T00:00:00.000Z",
+    )
+
+
+class PostsSyncInput(BaseModel):
+    """Input parameters for an incremental posts sync of one profile."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    profile_url: str = Field(
+        ...,
+        title="LinkedIn Profile URL",
+        description="The URL of the LinkedIn profile.",
+        example="https://www.linkedin.com/in/williamhgates/",
+    )
+    snapshot_id: str | None = Field(
+        default=None,
+        title="Snapshot ID",
+        description="The posts snapshot to merge into the profile's stored posts.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each new post. The stored posts keep every field.",
+        min_length=1,
+    )
 
 
 def raise_exception(message: str) -> None:
@@ -40,16 +106,35 @@ async def trigger_linkedin_profile_posts_scrape(function_input: GetProfilePostsI
         if not api_token:
             raise_exception("BRIGHT_DATA_API_TOKEN is not set")
 
-        bd = bdclient(api_token)
+        bd = get_brightdata_client()
         
         profile_url = function_input.profile_url.split('recent-activity')[0]
-        log.info(f"Initiating post discovery for profile {profile_url}")
+        initial_response: dict[str, Any] = {}
 
-        initial_response = await asyncio.to_thread(
-            bd.search_linkedin.posts, profile_url=profile_url
+        async def trigger() -> str | None:
+            nonlocal initial_response
+            since = f" since {function_input.start_date}" if function_input.start_date else ""
+            log.info(f"Initiating post discovery for profile {profile_url}{since}")
+            initial_response = await bd.trigger_posts_discovery([profile_url], function_input.start_date or "")
+            return initial_response.get("snapshot_id")
+
+        # Attach to a pending discovery for the same profile instead of paying for a new one
+        flight = get_single_flight("brightdata")
+        flight_key = f"posts:{canonical_profile_url(profile_url)}"
+        if function_input.start_date:
+            flight_key = f"{flight_key}:{function_input.start_date}"
+        snapshot_id, coalesced = await flight.run(
+            flight_key, trigger, max_join_age=join_window("brightdata:posts", function_input.max_age)
         )
+        if coalesced:
+            log.info(f"Joined in-flight post discovery for {profile_url}. Snapshot ID: {snapshot_id}")
+            return {
+                "snapshot_id": snapshot_id,
+                "coalesced": True,
+                "notify": bool(notify_url()),
+                "triggered_at": flight.started_at(snapshot_id) or time.time(),
+            }
 
-        snapshot_id = initial_response.get("snapshot_id")
         if not snapshot_id:
             status = initial_response.get("status")
             # If status is "starting" without snapshot_id, that's an error condition
@@ -60,13 +145,67 @@ async def trigger_linkedin_profile_posts_scrape(function_input: GetProfilePostsI
             return initial_response
 
         log.info(f"Post discovery initiated. Snapshot ID: {snapshot_id}")
-        return {"snapshot_id": snapshot_id}
+        return {"snapshot_id": snapshot_id, "notify": bool(notify_url()), "triggered_at": time.time()}
 
     except Exception as e:
         error_message = f"trigger_linkedin_profile_posts_scrape failed: {e}"
         raise NonRetryableError(error_message) from e
 
 
+def _profile_key(profile_url: str) -> str:
+    return canonical_profile_url(profile_url.split("recent-activity")[0])
+
+
+@function.defn()
+async def get_posts_sync_start(function_input: PostsSyncInput) -> dict[str, Any]:
+    """Return the start date for a profile's next incremental sync (None before the first) and its mark."""
+    try:
+        history = get_post_history()
+        key = _profile_key(function_input.profile_url)
+        return {"start_date": history.start_date(key), "watermark": history.watermark(key)}
+
+    except Exception as e:
+        error_message = f"get_posts_sync_start failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def merge_brightdata_posts(function_input: PostsSyncInput) -> dict[str, Any]:
+    """Merge a spooled posts snapshot into the profile's stored posts and return only the new ones.
+
+    Returns ``{"new", "stored", "watermark", "posts"}``, where posts are the
+    new posts, newest first, inline or as a payload reference when large.
+    Raises RetryableError while the snapshot is not ready yet.
+    """
+    try:
+        snapshot_id = function_input.snapshot_id
+        if not snapshot_id:
+            raise_exception("snapshot_id is required to merge posts")
+        await spool_snapshot(snapshot_id)
+        history = get_post_history()
+        key = _profile_key(function_input.profile_url)
+        posts = (
+            to_builtins(to_model("post", "brightdata", record))
+            for page in get_spool().iter_records(snapshot_id)
+            for record in page
+        )
+        new_posts = history.merge(key, posts, snapshot_id)
+        watermark = history.watermark(key)
+        log.info(f"{len(new_posts)} new post(s) for {key}, {watermark['stored']} stored")
+        return {
+            "new": len(new_posts),
+            "stored": watermark["stored"],
+            "watermark": {"posted_at": watermark["posted_at"], "post_id": watermark["post_id"]},
+            "posts": await offload(project(new_posts, function_input.fields)),
+        }
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"merge_brightdata_posts failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def get_linkedin_profile_posts_brightdata(function_input: GetProfilePostsInput) -> Any:
     """Legacy function - kept for backward compatibility. Use trigger_linkedin_profile_posts_scrape + download_brightdata_snapshot instead."""
@@ -75,14 +214,12 @@ async def get_linkedin_profile_posts_brightdata(function_input: GetProfilePostsI
         if not api_token:
             raise_exception("BRIGHT_DATA_API_TOKEN is not set")
 
-        bd = bdclient(api_token)
+        bd = get_brightdata_client()
         
         profile_url = function_input.profile_url.split('recent-activity')[0]
         log.info(f"Initiating post discovery for profile {profile_url}")
 
-        initial_response = await asyncio.to_thread(
-            bd.search_linkedin.posts, profile_url=profile_url
-        )
+        initial_response = await bd.trigger_posts_discovery([profile_url], function_input.start_date or "")
 
         snapshot_id = initial_response.get("snapshot_id")
         if not snapshot_id:
@@ -97,12 +234,12 @@ async def get_linkedin_profile_posts_brightdata(function_input: GetProfilePostsI
         while attempt < max_attempts:
             attempt += 1
             log.info(f"Checking status for snapshot {snapshot_id} (attempt {attempt}/{max_attempts})...")
-            status_response = await asyncio.to_thread(bd.download_snapshot, snapshot_id=snapshot_id)
+            status_response = await bd.download(snapshot_id)
             
             # Bright Data returns a list when ready, or a dict with status when processing
             if isinstance(status_response, list):
                 log.info(f"Snapshot {snapshot_id} is ready. Retrieved {len(status_response)} record(s).")
-                return status_response
+                return project(status_response, function_input.fields)
             
             if isinstance(status_response, dict):
                 status = status_response.get("status")
@@ -119,7 +256,7 @@ async def get_linkedin_profile_posts_brightdata(function_input: GetProfilePostsI
             raise_exception(f"Timeout waiting for Bright Data snapshot {snapshot_id} to complete after {max_attempts} attempts")
 
         log.info(f"Snapshot {snapshot_id} is ready. Downloading result.")
-        posts_data = await asyncio.to_thread(bd.download_snapshot, snapshot_id=snapshot_id)
+        posts_data = await bd.download(snapshot_id)
 
         if not posts_data:
             raise_exception("Failed to download posts data from Bright Data snapshot.")
@@ -129,4 +266,4 @@ async def get_linkedin_profile_posts_brightdata(function_input: GetProfilePostsI
         raise NonRetryableError(error_message) from e
     else:
         log.info(f"Successfully discovered posts for {profile_url}")
-        return posts_data
+        return project(posts_data, function_input.fields)
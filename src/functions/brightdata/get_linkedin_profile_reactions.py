@@ -1,6 +1,21 @@
+import os
+import time
 from typing import Any
 from pydantic import BaseModel, Field
-from restack_ai.function import NonRetryableError, function, log
+from restack_ai.function import NonRetryableError, RetryableError, function, log
+
+from src.functions.brightdata.api import get_brightdata_client
+from src.functions.brightdata.get_linkedin_profile import normalise_records, spool_snapshot
+from src.functions.brightdata.notifications import notify_url
+from src.models import line_transform
+from src.payloads import offload_threshold, store_payload
+from src.spool import get_spool
+
+# Reactions are collected in two stages: the profile's posts are discovered
+# with the posts dataset, then the reactions on those posts are collected in
+# batches of post URLs, each batch one snapshot of the reactions dataset. The
+# workflow runs a bounded number of batches at a time and combines the spooled
+# batch snapshots into one result at the end.
 
 
 class GetReactionsInput(BaseModel):
@@ -19,6 +34,102 @@ class GetReactionsInput(BaseModel):
         description="The URL of the LinkedIn profile.",
         example="https://www.linkedin.com/in/williamhgates/",
     )
+    max_posts: int = Field(
+        default=20,
+        title="Max Posts",
+        description="Collect reactions on at most this many of the profile's most recent posts.",
+        ge=1,
+        le=500,
+    )
+    batch_size: int = Field(
+        default=10,
+        title="Batch Size",
+        description="Number of posts whose reactions are collected in one Bright Data snapshot.",
+        ge=1,
+        le=100,
+    )
+    max_concurrency: int = Field(
+        default=4,
+        title="Max Concurrency",
+        description="Maximum number of reaction snapshots running at the same time.",
+        ge=1,
+        le=20,
+    )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+
+
+class PostUrlsInput(BaseModel):
+    """Input parameters for listing the posts of a spooled posts snapshot."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    snapshot_id: str = Field(
+        ...,
+        title="Snapshot ID",
+        description="The posts snapshot ID returned by Bright Data.",
+    )
+    limit: int = Field(
+        ...,
+        title="Limit",
+        description="Maximum number of post URLs to return.",
+        ge=1,
+    )
+
+
+class ReactionsBatchInput(BaseModel):
+    """Input parameters for collecting the reactions on a batch of posts."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    post_urls: list[str] = Field(
+        ...,
+        title="Post URLs",
+        description="The LinkedIn post URLs to collect reactions for.",
+        min_length=1,
+    )
+
+
+class SnapshotIdsInput(BaseModel):
+    """Input parameters for combining several spooled snapshots."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    snapshot_ids: list[str] = Field(
+        ...,
+        title="Snapshot IDs",
+        description="The snapshot IDs returned by Bright Data.",
+    )
+    kind: str | None = Field(
+        default=None,
+        title="Kind",
+        description="Return the records as normalised 'profile', 'post' or 'reaction' models instead of Bright Data's raw records.",
+        pattern="^(profile|post|reaction)$",
+    )
 
 
 def raise_exception(message: str) -> None:
@@ -26,15 +137,89 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+def _post_url(record: Any) -> str | None:
+    if not isinstance(record, dict) or record.get("error") or record.get("error_code"):
+        return None
+    return record.get("url") or record.get("post_url")
+
+
 @function.defn()
-async def get_linkedin_profile_reactions_brightdata(function_input: GetReactionsInput) -> Any:
+async def list_brightdata_snapshot_post_urls(function_input: PostUrlsInput) -> dict[str, Any]:
+    """Return the unique post URLs of a posts snapshot, in snapshot order, up to limit.
+
+    Raises RetryableError while the snapshot is not ready yet.
     """
-    NOTE: Scraping reactions is a complex, multi-step task (get posts, then get
-    reactions for each post) that requires a more advanced scraping solution.
-    This functionality is not implemented in this version.
+    try:
+        snapshot_id = function_input.snapshot_id
+        await spool_snapshot(snapshot_id)
+        post_urls: dict[str, None] = {}
+        for page in get_spool().iter_records(snapshot_id):
+            for record in page:
+                url = _post_url(record)
+                if url:
+                    post_urls[url] = None
+            if len(post_urls) >= function_input.limit:
+                break
+        return {"post_urls": list(post_urls)[: function_input.limit]}
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"list_brightdata_snapshot_post_urls failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def trigger_linkedin_post_reactions_scrape(function_input: ReactionsBatchInput) -> dict[str, Any]:
+    """Trigger one Bright Data snapshot collecting the reactions on a batch of posts."""
+    try:
+        api_token = os.environ.get("BRIGHT_DATA_API_TOKEN")
+        if not api_token:
+            raise_exception("BRIGHT_DATA_API_TOKEN is not set")
+
+        bd = get_brightdata_client()
+        log.info(f"Initiating reactions scrape for {len(function_input.post_urls)} post(s)")
+        initial_response = await bd.trigger_reactions(function_input.post_urls)
+
+        snapshot_id = initial_response.get("snapshot_id")
+        if not snapshot_id:
+            raise_exception(f"No snapshot_id found in Bright Data response: {initial_response}")
+
+        log.info(f"Reactions scrape initiated. Snapshot ID: {snapshot_id}")
+        return {"snapshot_id": snapshot_id, "notify": bool(notify_url()), "triggered_at": time.time()}
+
+    except Exception as e:
+        error_message = f"trigger_linkedin_post_reactions_scrape failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def combine_brightdata_snapshots(function_input: SnapshotIdsInput) -> Any:
+    """Return the records of several snapshots as one list, or a payload reference when large.
+
+    Snapshots missing from this worker's spool are downloaded again.
     """
-    log.warn("get_linkedin_profile_reactions_brightdata is not implemented.")
-    raise NonRetryableError(
-        "Scraping reactions from a LinkedIn profile is a premium feature "
-        "and is not yet supported in this implementation."
-    )
+    try:
+        spool = get_spool()
+        infos = [await spool_snapshot(snapshot_id) for snapshot_id in function_input.snapshot_ids]
+        kind = function_input.kind
+        if sum(info["bytes"] for info in infos) <= offload_threshold():
+            records = [
+                record
+                for snapshot_id in function_input.snapshot_ids
+                for page in spool.iter_records(snapshot_id)
+                for record in page
+            ]
+            return normalise_records(records, kind)
+
+        transform = line_transform(kind, "brightdata") if kind else None
+        chunks = spool.iter_json_array(*function_input.snapshot_ids, transform=transform)
+        reference = await store_payload(chunks, sum(info["records"] for info in infos))
+        log.info(f"{len(infos)} snapshot(s) stored as payload {reference['payload_ref']}")
+        return reference
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        error_message = f"combine_brightdata_snapshots failed: {e}"
+        raise NonRetryableError(error_message) from e
@@ -0,0 +1,113 @@
+import asyncio
+import hmac
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.http_server import Request, Response, start_http_server
+
+# Bright Data completion notifications. When BRIGHT_DATA_NOTIFY_URL is set,
+# triggers ask Bright Data to POST to it once a snapshot is ready; the receiver
+# records the notification in a SQLite store shared by every worker process on
+# the host. Workflows check the store with short steps and sleep durably in
+# between, so waiting holds no function slot and it does not matter which
+# process received the webhook. Polling remains the fallback when no
+# notification arrives in time.
+
+NOTIFY_PATH = "/brightdata/notify"
+DEFAULT_STORE_PATH = Path.home() / ".cache" / "linkedin_mcp" / "notifications.sqlite3"
+# Notifications are kept this long, well past the longest notification wait
+RETENTION = 2 * 86400
+
+
+def notify_url() -> str | None:
+    return os.environ.get("BRIGHT_DATA_NOTIFY_URL") or None
+
+
+def notify_secret() -> str | None:
+    return os.environ.get("BRIGHT_DATA_NOTIFY_SECRET") or None
+
+
+class NotificationStore:
+    """Snapshot completions received by any worker process, keyed by snapshot ID."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notifications (
+                snapshot_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                notified_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS notifications_at ON notifications (notified_at)")
+
+    def notify(self, snapshot_id: str, status: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO notifications (snapshot_id, status, notified_at) VALUES (?, ?, ?)",
+                (snapshot_id, status, now),
+            )
+            self._db.execute("DELETE FROM notifications WHERE notified_at < ?", (now - RETENTION,))
+
+    def status(self, snapshot_id: str) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status FROM notifications WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: NotificationStore | None = None
+
+
+def get_notification_store() -> NotificationStore:
+    """Return the host's notification store, opened once on first use."""
+    global _store
+    if _store is None:
+        _store = NotificationStore(os.environ.get("BRIGHT_DATA_NOTIFY_STORE") or DEFAULT_STORE_PATH)
+    return _store
+
+
+async def handle_notification(request: Request) -> Response:
+    secret = notify_secret()
+    if secret and not hmac.compare_digest(request.headers.get("authorization", ""), secret):
+        return Response.json({"error": "unauthorized"}, 401)
+    try:
+        payload = request.json() if request.body else {}
+    except ValueError:
+        return Response.json({"error": "invalid JSON"}, 400)
+    if not isinstance(payload, dict):
+        payload = {}
+    snapshot_id = payload.get("snapshot_id") or request.query.get("snapshot_id", [None])[0]
+    if not snapshot_id:
+        return Response.json({"error": "snapshot_id is required"}, 400)
+    status = payload.get("status") or "ready"
+    logging.info("Bright Data notification for snapshot %s: %s", snapshot_id, status)
+    await asyncio.to_thread(get_notification_store().notify, snapshot_id, status)
+    return Response.json({"ok": True})
+
+
+async def start_notification_receiver() -> asyncio.Server | None:
+    """Start the receiver if BRIGHT_DATA_NOTIFY_PORT is set."""
+    port = os.environ.get("BRIGHT_DATA_NOTIFY_PORT")
+    if not port:
+        return None
+    host = os.environ.get("BRIGHT_DATA_NOTIFY_HOST", "0.0.0.0")
+    server = await start_http_server(host, int(port), {("POST", NOTIFY_PATH): handle_notification})
+    logging.info("Bright Data notification receiver listening on %s:%s%s", host, port, NOTIFY_PATH)
+    return server
@@ -0,0 +1,133 @@
+import time
+from typing import Any
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, RetryableError, function, log
+import httpx
+
+from src.functions.brightdata.api import get_brightdata_client
+from src.metrics import POLLS, POLLS_PER_JOB, TIME_TO_READY
+from src.polling import get_readiness_stats
+from src.singleflight import get_single_flight
+
+
+class SnapshotPollInput(BaseModel):
+    """Input parameters for scheduling and running Bright Data readiness checks."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    snapshot_id: str = Field(
+        ...,
+        title="Snapshot ID",
+        description="The snapshot ID returned by Bright Data.",
+    )
+    dataset: str = Field(
+        ...,
+        title="Dataset",
+        description="Dataset the snapshot belongs to, e.g. 'brightdata:profile' or 'brightdata:posts'.",
+    )
+    batch_size: int = Field(
+        default=1,
+        title="Batch Size",
+        description="Number of inputs collected by the snapshot.",
+        ge=1,
+    )
+    triggered_at: float = Field(
+        ...,
+        title="Triggered At",
+        description="Unix time at which the snapshot was triggered.",
+    )
+    last_check_at: float | None = Field(
+        default=None,
+        title="Last Check At",
+        description="Unix time of the previous readiness check that found the snapshot not ready.",
+    )
+    checks: int = Field(
+        default=0,
+        title="Checks",
+        description="Number of readiness checks already made.",
+        ge=0,
+    )
+    max_wait_seconds: int = Field(
+        default=1800,
+        title="Max Wait",
+        description="Give up once the snapshot has not been ready for this many seconds.",
+        ge=1,
+    )
+
+
+def raise_exception(message: str) -> None:
+    log.error("poll_snapshot function failed", error=message)
+    raise NonRetryableError(message)
+
+
+@function.defn()
+async def plan_snapshot_poll(function_input: SnapshotPollInput) -> dict[str, Any]:
+    """Return the delay before the first readiness check, from learned time-to-ready."""
+    try:
+        elapsed = time.time() - function_input.triggered_at
+        delay = get_readiness_stats().next_delay(function_input.dataset, function_input.batch_size, elapsed)
+        log.info(f"First readiness check for snapshot {function_input.snapshot_id} in {delay:.0f}s")
+        return {"delay": round(delay, 1)}
+
+    except Exception as e:
+        error_message = f"plan_snapshot_poll failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def check_brightdata_snapshot(function_input: SnapshotPollInput) -> dict[str, Any]:
+    """Check a snapshot's progress once.
+
+    When ready, the observed time-to-ready is recorded for future schedules.
+    Otherwise returns the learned delay before the next check, and whether
+    max_wait_seconds has been exceeded.
+    """
+    try:
+        snapshot_id = function_input.snapshot_id
+        bd = get_brightdata_client()
+        progress = await bd.progress(snapshot_id)
+        status = progress.get("status")
+        now = time.time()
+        elapsed = now - function_input.triggered_at
+        log.info(f"Snapshot {snapshot_id} status after {elapsed:.0f}s: {status}")
+        POLLS.inc(dataset=function_input.dataset, status=str(status))
+
+        if status == "ready":
+            # Readiness happened between the previous check and this one
+            became_ready = (function_input.last_check_at + now) / 2 if function_input.last_check_at else now
+            time_to_ready = max(0.0, became_ready - function_input.triggered_at)
+            get_readiness_stats().record(function_input.dataset, function_input.batch_size, time_to_ready)
+            TIME_TO_READY.observe(time_to_ready, dataset=function_input.dataset)
+            POLLS_PER_JOB.observe(function_input.checks + 1, dataset=function_input.dataset)
+            return {"status": "ready", "checked_at": now}
+
+        if status == "failed":
+            # New callers must start a fresh snapshot instead of joining this one
+            get_single_flight("brightdata").release(snapshot_id)
+            raise_exception(f"Bright Data snapshot {snapshot_id} failed. Details: {progress}")
+
+        delay = get_readiness_stats().next_delay(function_input.dataset, function_input.batch_size, elapsed)
+        return {
+            "status": status,
+            "checked_at": now,
+            "next_check_in": round(delay, 1),
+            "give_up": elapsed > function_input.max_wait_seconds,
+        }
+
+    except httpx.TransportError as e:
+        # Network hiccups should not fail the whole scrape, let the step retry
+        raise RetryableError(f"check_brightdata_snapshot failed: {e}") from e
+    except Exception as e:
+        error_message = f"check_brightdata_snapshot failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def get_snapshot_polling_stats() -> list[dict[str, Any]]:
+    """Learned time-to-ready quantiles per dataset and batch size."""
+    return get_readiness_stats().summary()
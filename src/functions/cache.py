@@ -0,0 +1,152 @@
+import os
+from typing import Any
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, function, log
+
+from src.cache import get_cache, ttl_for
+from src.payloads import get_payload_store, is_payload_ref, project_payload
+from src.urls import canonical_profile_url
+
+
+class CacheLookupInput(BaseModel):
+    """Input parameters for looking up a cached scrape result."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    kind: str = Field(
+        ...,
+        title="Cache Kind",
+        description="Provider and entity of the cached result, e.g. 'brightdata:profile'.",
+    )
+    profile_url: str = Field(
+        ...,
+        title="LinkedIn Profile URL",
+        description="The URL of the LinkedIn profile.",
+    )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a result to count as fresh. Defaults to the kind's TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale entry as a hit so the caller can refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each cached record. The entry itself keeps every field.",
+        min_length=1,
+    )
+
+
+class CacheStoreInput(BaseModel):
+    """Input parameters for storing a scrape result in the cache."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    kind: str = Field(
+        ...,
+        title="Cache Kind",
+        description="Provider and entity of the cached result, e.g. 'brightdata:profile'.",
+    )
+    profile_url: str = Field(
+        ...,
+        title="LinkedIn Profile URL",
+        description="The URL of the LinkedIn profile.",
+    )
+    data: Any = Field(
+        ...,
+        title="Data",
+        description="The scrape result to cache.",
+    )
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("CACHE_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def cache_result(kind: str, profile_url: str, data: Any) -> None:
+    """Store a full result from the function that produced it. A cache failure is only logged."""
+    if not cache_enabled():
+        return
+    try:
+        key = canonical_profile_url(profile_url)
+        get_cache().put(kind, key, data)
+        log.info(f"Cached {kind} result for {key}")
+    except Exception as e:
+        log.warning(f"Caching {kind} result failed: {e}")
+
+
+async def project_entry(data: Any, fields: list[str] | None) -> Any:
+    """A cached result projected onto fields. Phantombuster results keep their envelope; only result is projected."""
+    if isinstance(data, dict) and "containerId" in data and "result" in data:
+        return {**data, "result": await project_payload(data["result"], fields)}
+    return await project_payload(data, fields)
+
+
+@function.defn()
+async def lookup_cached_result(function_input: CacheLookupInput) -> dict[str, Any]:
+    """Look up a cached result.
+
+    Returns ``{"hit": False}`` on a miss, otherwise ``{"hit": True, "fresh": bool,
+    "age": seconds, "data": ...}``, with data projected onto fields when given.
+    Stale entries are only returned when stale_while_revalidate is set.
+    """
+    try:
+        if not cache_enabled() or function_input.max_age == 0:
+            return {"hit": False}
+
+        key = canonical_profile_url(function_input.profile_url)
+        entry = get_cache().get(function_input.kind, key)
+        if entry is None:
+            log.info(f"Cache miss for {function_input.kind} {key}")
+            return {"hit": False}
+
+        # The referenced payload may have expired before the cache entry
+        if is_payload_ref(entry["data"]) and not await get_payload_store().exists(entry["data"]["payload_ref"]):
+            log.info(f"Cached payload for {function_input.kind} {key} has expired")
+            return {"hit": False}
+
+        max_age = function_input.max_age if function_input.max_age is not None else ttl_for(function_input.kind)
+        fresh = entry["age"] <= max_age
+        if not fresh and not function_input.stale_while_revalidate:
+            log.info(f"Cache entry for {function_input.kind} {key} is stale ({entry['age']:.0f}s old)")
+            return {"hit": False}
+
+        log.info(f"Cache hit for {function_input.kind} {key} ({entry['age']:.0f}s old, fresh={fresh})")
+        data = await project_entry(entry["data"], function_input.fields)
+        return {"hit": True, "fresh": fresh, "age": entry["age"], "data": data}
+
+    except Exception as e:
+        error_message = f"lookup_cached_result failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def store_cached_result(function_input: CacheStoreInput) -> dict[str, Any]:
+    """Store a scrape result under its canonical profile URL."""
+    try:
+        if not cache_enabled():
+            return {"stored": False}
+
+        key = canonical_profile_url(function_input.profile_url)
+        get_cache().put(function_input.kind, key, function_input.data)
+        log.info(f"Cached {function_input.kind} result for {key}")
+        return {"stored": True}
+
+    except Exception as e:
+        error_message = f"store_cached_result failed: {e}"
+        raise NonRetryableError(error_message) from e
@@ -1,15 +1,24 @@
 import os
+import re
+from datetime import datetime, timezone
 from typing import Any
 
-from dotenv import load_dotenv
-import aiohttp
-
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from restack_ai.function import NonRetryableError, function, log
+from temporalio import activity
 
-load_dotenv()
+from src.functions.linkedin.media import (
+    DEFAULT_PROCESSING_TIMEOUT,
+    LinkedinMediaUploader,
+    linkedin_api_base_url,
+    media_category,
+)
+from src.ratelimit import rate_limited
+from src.transport import get_http_client
 
-from pydantic import BaseModel, Field, ValidationError
+_PUBLISH_AT = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2})(:\d{2})?(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?$")
+# Step time kept back after waiting for a video, to publish the post
+PUBLISH_MARGIN = 30
 
 class CreatePostInput(BaseModel):
     """Input parameters for creating a LinkedIn post.
@@ -34,6 +43,149 @@ class CreatePostInput(BaseModel):
         max_length=3000,
         json_schema_extra={"format": "textarea"}
     )
+    author_urn: str | None = Field(
+        default=None,
+        title="Author URN",
+        description="The person or organization to post as. Defaults to LINKEDIN_AUTHOR_URN.",
+        example="urn:li:person:8675309",
+        pattern=r"^urn:li:(person|organization):[A-Za-z0-9_-]+$",
+    )
+    media_path: str | None = Field(
+        default=None,
+        title="Media File",
+        description="Path, on the worker, of an image or video to attach. It is streamed to LinkedIn, never loaded whole.",
+        example="/data/media/launch.mp4",
+        min_length=1,
+    )
+    media_category: str | None = Field(
+        default=None,
+        title="Media Category",
+        description="IMAGE or VIDEO. By default it follows from the file's extension.",
+        example="VIDEO",
+        pattern=r"^(IMAGE|VIDEO)$",
+    )
+    media_title: str | None = Field(
+        default=None,
+        title="Media Title",
+        description="Title shown with the attached media.",
+        example="Product launch",
+        max_length=200,
+    )
+
+
+class ScheduledPostInput(BaseModel):
+    """A post of a bulk publishing run, with its author and optional publish time."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    text: str = Field(
+        ...,
+        title="Post Content",
+        description="The text content of the LinkedIn post.",
+        min_length=1,
+        max_length=3000,
+        json_schema_extra={"format": "textarea"},
+    )
+    author_urn: str | None = Field(
+        default=None,
+        title="Author URN",
+        description="The person or organization to post as. Defaults to LINKEDIN_AUTHOR_URN.",
+        example="urn:li:person:8675309",
+        pattern=r"^urn:li:(person|organization):[A-Za-z0-9_-]+$",
+    )
+    publish_at: str | None = Field(
+        default=None,
+        title="Publish At",
+        description="When to publish the post, as an ISO 8601 date and time, e.g. '2026-03-02T09:00:00Z'. Times without an offset are UTC. By default the post is published right away.",
+        example="2026-03-02T09:00:00Z",
+        pattern=r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})?$",
+    )
+    media_path: str | None = Field(
+        default=None,
+        title="Media File",
+        description="Path, on the worker, of an image or video to attach.",
+        example="/data/media/launch.mp4",
+        min_length=1,
+    )
+    media_category: str | None = Field(
+        default=None,
+        title="Media Category",
+        description="IMAGE or VIDEO. By default it follows from the file's extension.",
+        example="VIDEO",
+        pattern=r"^(IMAGE|VIDEO)$",
+    )
+    media_title: str | None = Field(
+        default=None,
+        title="Media Title",
+        description="Title shown with the attached media.",
+        example="Product launch",
+        max_length=200,
+    )
+
+    @field_validator("publish_at")
+    @classmethod
+    def normalise_publish_at(cls, value: str | None) -> str | None:
+        """Normalise to UTC with microseconds, e.g. '2026-03-02T09:00:00.123000+00:00'.
+
+        Any number of fractional digits is accepted, which datetime.fromisoformat
+        only does from Python 3.11 on.
+        """
+        if value is None:
+            return None
+        match = _PUBLISH_AT.match(value)
+        if match is None:
+            raise ValueError(f"publish_at is not an ISO 8601 date and time: {value!r}")
+        minutes, seconds, fraction, offset = match.groups()
+        microseconds = (fraction or "").ljust(6, "0")[:6]
+        offset = "+00:00" if offset in (None, "Z") else offset
+        try:
+            when = datetime.fromisoformat(f"{minutes}{seconds or ':00'}.{microseconds}{offset}")
+        except ValueError as e:
+            raise ValueError(f"publish_at is not a valid date and time: {value!r}") from e
+        return when.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+    @property
+    def publish_timestamp(self) -> float | None:
+        """The publish time as a Unix timestamp, None to publish right away."""
+        return None if self.publish_at is None else datetime.fromisoformat(self.publish_at).timestamp()
+
+
+class PublishPostsInput(BaseModel):
+    """Input parameters for publishing many LinkedIn posts."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    posts: list[ScheduledPostInput] = Field(
+        ...,
+        title="Posts",
+        description="The posts to publish, for one or many authors.",
+        min_length=1,
+        max_length=1000,
+    )
+    max_concurrency: int = Field(
+        default=5,
+        title="Max Concurrency",
+        description="Maximum number of posts being published at the same time.",
+        ge=1,
+        le=50,
+    )
+    author_interval: int = Field(
+        default=60,
+        title="Author Interval",
+        description="Minimum number of seconds between two posts of the same author.",
+        ge=0,
+        le=86400,
+    )
 
 # Usage with validation
 def validate_and_use_input(input_data: dict) -> CreatePostInput:
@@ -51,6 +203,18 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+def step_time_left(default: float) -> float:
+    """Seconds left before this step's start-to-close timeout, or default outside a step."""
+    try:
+        info = activity.info()
+    except RuntimeError:
+        return default
+    if info.start_to_close_timeout is None:
+        return default
+    elapsed = (datetime.now(timezone.utc) - info.started_time).total_seconds()
+    return info.start_to_close_timeout.total_seconds() - elapsed
+
+
 @function.defn()
 async def create_post_on_linkedin(function_input: CreatePostInput) -> dict[str, Any]:
     try:
@@ -58,36 +222,55 @@ async def create_post_on_linkedin(function_input: CreatePostInput) -> dict[str,
                 error_message = "LINKEDIN_ACCESS_TOKEN is not set"
                 raise_exception(error_message)
 
-            if os.environ.get("LINKEDIN_AUTHOR_URN") is None:
-                error_message = "LINKEDIN_AUTHOR_URN is not set"
+            author_urn = function_input.author_urn or os.environ.get("LINKEDIN_AUTHOR_URN")
+            if author_urn is None:
+                error_message = "No author_urn given and LINKEDIN_AUTHOR_URN is not set"
                 raise_exception(error_message)
 
             access_token=os.environ.get("LINKEDIN_ACCESS_TOKEN")
-            author_urn=os.environ.get("LINKEDIN_AUTHOR_URN")
-            linkedin_api_url = "https://api.linkedin.com/v2/ugcPosts"
+            linkedin_api_url = f"{linkedin_api_base_url()}/v2/ugcPosts"
             headers = {
                 "Authorization": f"Bearer {access_token}",
                 "Content-Type": "application/json",
                 "X-Restli-Protocol-Version": "2.0.0",
             }
+            share_content: dict[str, Any] = {
+                "shareCommentary": {"text": function_input.text},
+                "shareMediaCategory": "NONE",
+            }
+            if function_input.media_path is not None:
+                if not os.path.isfile(function_input.media_path):
+                    error_message = f"Media file not found: {function_input.media_path}"
+                    raise_exception(error_message)
+                category = media_category(function_input.media_path, function_input.media_category)
+                uploader = LinkedinMediaUploader(access_token, author_urn)
+                asset = await uploader.upload(function_input.media_path, category)
+                log.info(f"Uploaded {function_input.media_path} to LinkedIn as {asset}")
+                if category == "VIDEO":
+                    # A video can only be shared once LinkedIn has finished processing it
+                    await uploader.wait_until_available(
+                        asset, step_time_left(DEFAULT_PROCESSING_TIMEOUT) - PUBLISH_MARGIN
+                    )
+                    log.info(f"{asset} is available")
+                media: dict[str, Any] = {"status": "READY", "media": asset}
+                if function_input.media_title:
+                    media["title"] = {"text": function_input.media_title}
+                share_content["shareMediaCategory"] = category
+                share_content["media"] = [media]
+
             payload = {
                 "author": author_urn,
                 "lifecycleState": "PUBLISHED",
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {"text": function_input.text},
-                        "shareMediaCategory": "NONE",
-                    }
-                },
+                "specificContent": {"com.linkedin.ugc.ShareContent": share_content},
                 "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    linkedin_api_url, json=payload, headers=headers
-                ) as response:
-                    response.raise_for_status()
-                    post_id = response.headers.get("x-restli-id", "Unknown")
+            client = get_http_client()
+            response = await client.post(
+                linkedin_api_url, json=payload, headers=headers, extensions=rate_limited("linkedin:ugcPosts")
+            )
+            response.raise_for_status()
+            post_id = response.headers.get("x-restli-id", "Unknown")
     except Exception as e:
         error_message = f"create_post_on_linkedin failed: {e}"
         raise NonRetryableError(error_message) from e
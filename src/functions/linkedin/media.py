@@ -0,0 +1,195 @@
+import asyncio
+import mimetypes
+import os
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+
+from src.ratelimit import rate_limited
+from src.transport import get_http_client
+
+# LinkedIn media upload for image and video posts: register the upload with the
+# assets API, send the file to the upload URL(s) it returns, and share the
+# asset URN in the post. The file is never read into memory whole. A single
+# upload streams it from disk as the request body, chunk by chunk. Videos of
+# at least LINKEDIN_MULTIPART_THRESHOLD bytes are registered for multipart
+# upload: LinkedIn splits them into byte ranges, which are streamed the same
+# way, LINKEDIN_UPLOAD_CONCURRENCY at a time, and then committed. Memory per
+# upload is bounded by UPLOAD_CHUNK_SIZE times the parts in flight, whatever
+# the size of the file. LinkedIn transcodes videos after the upload, so they
+# are only shared once the asset's recipes are AVAILABLE.
+
+LINKEDIN_API_URL = "https://api.linkedin.com"
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MULTIPART_THRESHOLD = 10 * 1024 * 1024
+DEFAULT_UPLOAD_CONCURRENCY = 4
+DEFAULT_PROCESSING_TIMEOUT = 900
+PROCESSING_POLL_INTERVAL = 5.0
+
+RECIPES = {
+    "IMAGE": "urn:li:digitalmediaRecipe:feedshare-image",
+    "VIDEO": "urn:li:digitalmediaRecipe:feedshare-video",
+}
+SINGLE_UPLOAD = "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"
+MULTIPART_UPLOAD = "com.linkedin.digitalmedia.uploading.MultipartUpload"
+FAILED_RECIPE_STATUSES = {"CLIENT_ERROR", "PROCESSING_FAILED"}
+
+
+def linkedin_api_base_url() -> str:
+    return (os.environ.get("LINKEDIN_API_URL") or LINKEDIN_API_URL).rstrip("/")
+
+
+def multipart_threshold() -> int:
+    return int(os.environ.get("LINKEDIN_MULTIPART_THRESHOLD") or DEFAULT_MULTIPART_THRESHOLD)
+
+
+def upload_concurrency() -> int:
+    return max(1, int(os.environ.get("LINKEDIN_UPLOAD_CONCURRENCY") or DEFAULT_UPLOAD_CONCURRENCY))
+
+
+def media_category(path: str, category: str | None = None) -> str:
+    """IMAGE or VIDEO: the given category, or the one the file's extension implies."""
+    if category is not None:
+        return category
+    mime_type, _ = mimetypes.guess_type(path)
+    kind = (mime_type or "").split("/", 1)[0]
+    if kind in ("image", "video"):
+        return kind.upper()
+    raise ValueError(f"Cannot tell whether {path} is an image or a video; set media_category")
+
+
+async def read_chunks(path: str, offset: int, length: int) -> AsyncIterator[bytes]:
+    """Yield length bytes of the file from offset, reading one chunk at a time off the event loop."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError(f"{path} ended {remaining} bytes before the expected size")
+            remaining -= len(chunk)
+            yield chunk
+
+
+class LinkedinMediaUploader:
+    """Uploads a file from disk as a LinkedIn digital media asset."""
+
+    def __init__(self, access_token: str, owner_urn: str, base_url: str | None = None) -> None:
+        self.access_token = access_token
+        self.owner_urn = owner_urn
+        self.base_url = (base_url or linkedin_api_base_url()).rstrip("/")
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.access_token}", "X-Restli-Protocol-Version": "2.0.0"}
+
+    async def _assets_action(self, action: str, payload: dict[str, Any]) -> dict[str, Any]:
+        client = get_http_client()
+        response = await client.post(
+            f"{self.base_url}/v2/assets",
+            params={"action": action},
+            json=payload,
+            headers=self.headers,
+            extensions=rate_limited("linkedin:assets"),
+        )
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    async def register(self, category: str, size: int) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "recipes": [RECIPES[category]],
+            "owner": self.owner_urn,
+            "serviceRelationships": [
+                {"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}
+            ],
+        }
+        if category == "VIDEO" and size >= multipart_threshold():
+            request["supportedUploadMechanism"] = ["MULTIPART_UPLOAD"]
+            request["fileSize"] = size
+        body = await self._assets_action("registerUpload", {"registerUploadRequest": request})
+        return body["value"]
+
+    async def _put(
+        self, url: str, path: str, offset: int, length: int, headers: dict[str, str]
+    ) -> httpx.Response:
+        client = get_http_client()
+        # An explicit Content-Length keeps httpx from falling back to chunked encoding
+        response = await client.put(
+            url,
+            content=read_chunks(path, offset, length),
+            headers={"Content-Type": "application/octet-stream", **headers, "Content-Length": str(length)},
+        )
+        response.raise_for_status()
+        return response
+
+    async def upload_single(self, mechanism: dict[str, Any], path: str, size: int) -> None:
+        await self._put(
+            mechanism["uploadUrl"],
+            path,
+            0,
+            size,
+            {**mechanism.get("headers", {}), "Authorization": f"Bearer {self.access_token}"},
+        )
+
+    async def upload_multipart(
+        self, registration: dict[str, Any], mechanism: dict[str, Any], path: str
+    ) -> None:
+        slots = asyncio.Semaphore(upload_concurrency())
+
+        async def upload_part(part: dict[str, Any]) -> dict[str, Any]:
+            first, last = part["byteRange"]["firstByte"], part["byteRange"]["lastByte"]
+            async with slots:
+                response = await self._put(part["url"], path, first, last - first + 1, part.get("headers", {}))
+            return {
+                "httpStatusCode": response.status_code,
+                "headers": {"ETag": response.headers.get("etag", "")},
+            }
+
+        part_responses = await asyncio.gather(*(upload_part(part) for part in mechanism["partUploadRequests"]))
+        await self._assets_action(
+            "completeMultiPartUpload",
+            {
+                "completeMultipartUploadRequest": {
+                    "mediaArtifact": registration["mediaArtifact"],
+                    "metadata": mechanism["metadata"],
+                    "partUploadResponses": part_responses,
+                }
+            },
+        )
+
+    async def upload(self, path: str, category: str) -> str:
+        """Upload the file and return its asset URN, ready to share in a post."""
+        size = os.path.getsize(path)
+        if size == 0:
+            raise ValueError(f"{path} is empty")
+        registration = await self.register(category, size)
+        mechanisms = registration["uploadMechanism"]
+        if MULTIPART_UPLOAD in mechanisms:
+            await self.upload_multipart(registration, mechanisms[MULTIPART_UPLOAD], path)
+        else:
+            await self.upload_single(mechanisms[SINGLE_UPLOAD], path, size)
+        return registration["asset"]
+
+    async def wait_until_available(self, asset: str, timeout: float) -> None:
+        """Poll the asset until all its recipes are AVAILABLE, for at most timeout seconds."""
+        client = get_http_client()
+        asset_id = asset.rsplit(":", 1)[-1]
+        deadline = time.monotonic() + timeout
+        while True:
+            response = await client.get(
+                f"{self.base_url}/v2/assets/{asset_id}",
+                headers=self.headers,
+                extensions=rate_limited("linkedin:assets"),
+            )
+            response.raise_for_status()
+            statuses = [recipe.get("status") for recipe in response.json().get("recipes", [])]
+            if statuses and all(status == "AVAILABLE" for status in statuses):
+                return
+            if FAILED_RECIPE_STATUSES.intersection(statuses):
+                raise ValueError(f"LinkedIn could not process {asset}: {statuses}")
+            if time.monotonic() + PROCESSING_POLL_INTERVAL > deadline:
+                raise TimeoutError(f"{asset} was still processing after {timeout:.0f}s: {statuses}")
+            await asyncio.sleep(PROCESSING_POLL_INTERVAL)
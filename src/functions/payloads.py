@@ -0,0 +1,36 @@
+from typing import Any
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, function, log
+
+from src.payloads import is_payload_ref, resolve
+
+
+class ResolvePayloadInput(BaseModel):
+    """Input parameters for resolving payload references."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    value: Any = Field(
+        ...,
+        title="Value",
+        description="A workflow result, or any value containing payload references.",
+        example={"payload_ref": "sha256:9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08", "size": 183204, "records": 412},
+    )
+
+
+@function.defn()
+async def resolve_payload(function_input: ResolvePayloadInput) -> Any:
+    """Replace payload references in a value with the data they point to."""
+    try:
+        if is_payload_ref(function_input.value):
+            log.info(f"Resolving payload {function_input.value['payload_ref']}")
+        return await resolve(function_input.value)
+
+    except Exception as e:
+        error_message = f"resolve_payload failed: {e}"
+        raise NonRetryableError(error_message) from e
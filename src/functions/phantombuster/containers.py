@@ -0,0 +1,193 @@
+import os
+import time
+from typing import Any
+import httpx
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, RetryableError, function, log
+
+from src.metrics import POLLS, POLLS_PER_JOB, TIME_TO_READY
+from src.polling import get_readiness_stats
+from src.ratelimit import rate_limited
+from src.singleflight import get_single_flight, join_window
+from src.transport import get_http_client
+from src.urls import canonical_profile_url
+
+# Phantombuster agents run as containers that can take minutes. Launch and
+# status checks are separate short functions; the workflows wait between
+# checks with durable sleeps, so a running container holds no worker slot.
+
+PHANTOMBUSTER_API_URL = "https://api.phantombuster.com"
+
+
+def phantombuster_api_url() -> str:
+    return (os.environ.get("PHANTOMBUSTER_API_URL") or PHANTOMBUSTER_API_URL).rstrip("/")
+
+
+class ContainerPollInput(BaseModel):
+    """Input parameters for checking a Phantombuster container."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    container_id: str = Field(
+        ...,
+        title="Container ID",
+        description="The container ID returned by the agent launch.",
+    )
+    dataset: str = Field(
+        ...,
+        title="Dataset",
+        description="Kind of scrape the container runs, e.g. 'phantombuster:profile'.",
+    )
+    triggered_at: float = Field(
+        ...,
+        title="Triggered At",
+        description="Unix time at which the container was launched.",
+    )
+    last_check_at: float | None = Field(
+        default=None,
+        title="Last Check At",
+        description="Unix time of the previous check that found the container still running.",
+    )
+    checks: int = Field(
+        default=0,
+        title="Checks",
+        description="Number of readiness checks already made.",
+        ge=0,
+    )
+    max_wait_seconds: int = Field(
+        default=1800,
+        title="Max Wait",
+        description="Give up once the container has been running for this many seconds.",
+        ge=1,
+    )
+
+
+def raise_exception(message: str) -> None:
+    log.error("phantombuster container function failed", error=message)
+    raise NonRetryableError(message)
+
+
+def phantombuster_headers() -> dict[str, str]:
+    api_key = os.environ.get("PHANTOMBUSTER_API_KEY")
+    if not api_key:
+        raise_exception("PHANTOMBUSTER_API_KEY is not set")
+    return {
+        "X-Phantombuster-Key-1": api_key,
+        "Content-Type": "application/json",
+    }
+
+
+async def launch_agent(agent_env: str, dataset: str, profile_url: str, max_age: int | None = None) -> dict[str, Any]:
+    """Launch the agent configured in agent_env for a profile.
+
+    Returns the container ID, when it was launched and when to check it first.
+    A container already running for the same agent and profile is joined
+    instead of launching a new one, unless max_age is 0 or it has been running
+    longer than such containers usually take.
+    """
+    headers = phantombuster_headers()
+    agent_id = os.environ.get(agent_env)
+    if not agent_id:
+        raise_exception(f"{agent_env} is not set")
+
+    argument = {
+        "sessionCookie": os.environ.get("LINKEDIN_SESSION_COOKIE"),
+        "spreadsheetUrl": profile_url,
+        "homerun": True,
+    }
+    client = get_http_client()
+
+    async def launch() -> str | None:
+        log.info(f"Initiating scrape for {profile_url}")
+        launch_url = f"{phantombuster_api_url()}/api/v1/agent/{agent_id}/launch"
+        response = await client.post(
+            launch_url, headers=headers, json={"argument": argument}, extensions=rate_limited("phantombuster:launch")
+        )
+        response.raise_for_status()
+
+        response_json = response.json()
+        log.info(f"Phantombuster launch response: {response_json}")
+        return response_json.get("data", {}).get("containerId")
+
+    flight = get_single_flight("phantombuster")
+    container_id, coalesced = await flight.run(
+        f"{agent_id}:{canonical_profile_url(profile_url)}", launch, max_join_age=join_window(dataset, max_age)
+    )
+    if not container_id:
+        raise_exception("Failed to get containerId from Phantombuster launch response.")
+
+    triggered_at = (flight.started_at(container_id) if coalesced else None) or time.time()
+    next_check_in = get_readiness_stats().next_delay(dataset, 1, time.time() - triggered_at)
+    result = {
+        "container_id": container_id,
+        "triggered_at": triggered_at,
+        "next_check_in": round(next_check_in, 1),
+    }
+    if coalesced:
+        log.info(f"Joined in-flight scrape. Container ID: {container_id}")
+        result["coalesced"] = True
+    else:
+        log.info(f"Scrape initiated. Container ID: {container_id}")
+    return result
+
+
+@function.defn()
+async def fetch_phantombuster_container(function_input: ContainerPollInput) -> dict[str, Any]:
+    """Check a container's status once.
+
+    When finished, records the observed run time for future schedules; the
+    results are collected separately with collect_phantombuster_results. Otherwise returns the learned delay before the next
+    check, and whether max_wait_seconds has been exceeded.
+    """
+    try:
+        container_id = function_input.container_id
+        client = get_http_client()
+        output_url = f"{phantombuster_api_url()}/api/v2/containers/fetch"
+        response = await client.get(
+            output_url,
+            headers=phantombuster_headers(),
+            params={"id": container_id},
+            extensions=rate_limited("phantombuster:fetch"),
+        )
+        response.raise_for_status()
+
+        status_response = response.json()
+        status = status_response.get("status")
+        now = time.time()
+        elapsed = now - function_input.triggered_at
+        log.info(f"Container {container_id} status after {elapsed:.0f}s: {status}")
+        POLLS.inc(dataset=function_input.dataset, status=str(status))
+
+        if status == "finished":
+            get_single_flight("phantombuster").release(container_id)
+            # The container finished between the previous check and this one
+            finished = (function_input.last_check_at + now) / 2 if function_input.last_check_at else now
+            time_to_ready = max(0.0, finished - function_input.triggered_at)
+            get_readiness_stats().record(function_input.dataset, 1, time_to_ready)
+            TIME_TO_READY.observe(time_to_ready, dataset=function_input.dataset)
+            POLLS_PER_JOB.observe(function_input.checks + 1, dataset=function_input.dataset)
+            return {"status": "finished", "checked_at": now}
+
+        if status == "failed":
+            get_single_flight("phantombuster").release(container_id)
+            raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
+
+        delay = get_readiness_stats().next_delay(function_input.dataset, 1, elapsed)
+        return {
+            "status": status,
+            "checked_at": now,
+            "next_check_in": round(delay, 1),
+            "give_up": elapsed > function_input.max_wait_seconds,
+        }
+
+    except httpx.TransportError as e:
+        # Network hiccups should not fail the whole scrape, let the step retry
+        raise RetryableError(f"fetch_phantombuster_container failed: {e}") from e
+    except Exception as e:
+        error_message = f"fetch_phantombuster_container failed: {e}"
+        raise NonRetryableError(error_message) from e
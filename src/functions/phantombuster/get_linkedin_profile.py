@@ -1,12 +1,13 @@
-import os
 from typing import Any
-from dotenv import load_dotenv
 import asyncio
 from pydantic import BaseModel, Field
 from restack_ai.function import NonRetryableError, function, log
-import httpx
 
-load_dotenv()
+from src.functions.phantombuster.containers import launch_agent, phantombuster_api_url, phantombuster_headers
+from src.functions.phantombuster.results import container_results
+from src.ratelimit import rate_limited
+from src.singleflight import get_single_flight
+from src.transport import get_http_client
 
 
 class GetProfileInput(BaseModel):
@@ -25,6 +26,29 @@ class GetProfileInput(BaseModel):
         description="The URL of the LinkedIn profile.",
         example="https://www.linkedin.com/in/williamhgates/",
     )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each record, as dotted paths such as 'headline' or 'experience.title'. Applies to cached results too; by default every field is returned.",
+        min_length=1,
+        example=["name", "headline", "company"],
+    )
+    report_cached: bool = Field(
+        default=False,
+        title="Report Cached",
+        description="Return {\"cached\": <bool>, \"result\": <result>} instead of the bare result, telling cache hits apart from scrapes.",
+    )
 
 
 def raise_exception(message: str) -> None:
@@ -32,64 +56,65 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+@function.defn()
+async def launch_linkedin_profile_phantombuster(function_input: GetProfileInput) -> dict[str, Any]:
+    """Launch a LinkedIn profile scrape and return the container_id without waiting for it."""
+    try:
+        return await launch_agent(
+            "PHANTOMBUSTER_PROFILE_AGENT_ID", "phantombuster:profile", function_input.profile_url, function_input.max_age
+        )
+
+    except Exception as e:
+        error_message = f"launch_linkedin_profile_phantombuster failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def get_linkedin_profile_phantombuster(function_input: GetProfileInput) -> dict[str, Any]:
+    """Legacy function - kept for backward compatibility. Use launch_linkedin_profile_phantombuster + fetch_phantombuster_container instead."""
     try:
-        api_key = os.environ.get("PHANTOMBUSTER_API_KEY")
-        if not api_key:
-            raise_exception("PHANTOMBUSTER_API_KEY is not set")
-
-        headers = {
-            "X-Phantombuster-Key-1": api_key,
-            "Content-Type": "application/json",
-        }
-
-        agent_id = os.environ.get("PHANTOMBUSTER_PROFILE_AGENT_ID")
-        if not agent_id:
-            raise_exception("PHANTOMBUSTER_PROFILE_AGENT_ID is not set")
-
-        argument = {
-            "sessionCookie": os.environ.get("LINKEDIN_SESSION_COOKIE"),
-            "spreadsheetUrl": function_input.profile_url,
-            "homerun": True,
-        }
-
-        async with httpx.AsyncClient() as client:
-            log.info(f"Initiating scrape for {function_input.profile_url}")
-            launch_url = f"https://api.phantombuster.com/api/v1/agent/{agent_id}/launch"
-            response = await client.post(launch_url, headers=headers, json={"argument": argument})
+        # Attach to a running container for the same agent and profile instead of launching a new one
+        launch_result = await launch_agent(
+            "PHANTOMBUSTER_PROFILE_AGENT_ID", "phantombuster:profile", function_input.profile_url, function_input.max_age
+        )
+        container_id = launch_result["container_id"]
+        flight = get_single_flight("phantombuster")
+        client = get_http_client()
+
+        # Poll for completion
+        max_attempts = 360  # 30 minutes max (360 * 5 seconds)
+        attempt = 0
+        while attempt < max_attempts:
+            attempt += 1
+            log.info(f"Checking status for container {container_id} (attempt {attempt}/{max_attempts})...")
+            response = await client.get(
+                f"{phantombuster_api_url()}/api/v2/containers/fetch",
+                headers=phantombuster_headers(),
+                params={"id": container_id},
+                extensions=rate_limited("phantombuster:fetch"),
+            )
             response.raise_for_status()
 
-            response_json = response.json()
-            log.info(f"Phantombuster launch response: {response_json}")
-            
-            container_id = response_json.get("data", {}).get("containerId")
-            if not container_id:
-                raise_exception("Failed to get containerId from Phantombuster launch response.")
-
-            log.info(f"Scrape initiated. Container ID: {container_id}")
-
-            status_response = {}
-            while True:
-                log.info(f"Checking status for container {container_id}...")
-                output_url = f"https://api.phantombuster.com/api/v2/containers/fetch?id={container_id}&withResultObject=true"
-                response = await client.get(output_url, headers=headers)
-                response.raise_for_status()
-                log.info(f"Phantombuster response: {response.json()}")
-                
-                status_response = response.json()
-                status = status_response.get("status")
-                log.info(f"Container status: {status}")
-
-                if status == "finished":
-                    break
-                elif status == "failed":
-                    raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
-                
-                await asyncio.sleep(5)
-            
-            log.info(f"Phantombuster job for container {container_id} finished successfully.")
-            return {"status": "success", "containerId": container_id}
+            status_response = response.json()
+            status = status_response.get("status")
+            log.info(f"Container status: {status}")
+
+            if status == "finished":
+                flight.release(container_id)
+                break
+            elif status == "failed":
+                flight.release(container_id)
+                raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
+
+            await asyncio.sleep(5)
+        else:
+            # Stop offering the container to new callers, they would wait on it just as long
+            flight.release(container_id)
+            raise_exception(f"Timeout waiting for Phantombuster container {container_id} to finish after {max_attempts} attempts")
+
+        log.info(f"Phantombuster job for container {container_id} finished successfully.")
+        results = await container_results(container_id, "phantombuster:profile", function_input.fields)
+        return {"status": "success", "containerId": container_id, **results}
 
     except Exception as e:
         error_message = f"get_linkedin_profile_phantombuster failed: {e}"
@@ -1,13 +1,16 @@
 import os
 import json
 from typing import Any
-from dotenv import load_dotenv
 import asyncio
 from pydantic import BaseModel, Field
 from restack_ai.function import NonRetryableError, function, log
-import httpx
 
-load_dotenv()
+from src.functions.phantombuster.containers import launch_agent, phantombuster_api_url
+from src.functions.phantombuster.results import container_results
+from src.ratelimit import rate_limited
+from src.singleflight import get_single_flight
+from src.transport import get_http_client
+from src.urls import canonical_profile_url
 
 
 class GetProfilePostsInput(BaseModel):
@@ -26,6 +29,24 @@ class GetProfilePostsInput(BaseModel):
         description="The URL of the LinkedIn profile.",
         example="https://www.linkedin.com/in/williamhgates/",
     )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each post, as dotted paths such as 'text' or 'likes'. Applies to cached results too; by default every field is returned.",
+        min_length=1,
+        example=["url", "text", "posted_at"],
+    )
 
 
 def raise_exception(message: str) -> None:
@@ -33,8 +54,22 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+@function.defn()
+async def launch_linkedin_profile_posts_phantombuster(function_input: GetProfilePostsInput) -> dict[str, Any]:
+    """Launch a LinkedIn profile posts scrape and return the container_id without waiting for it."""
+    try:
+        return await launch_agent(
+            "PHANTOMBUSTER_POSTS_AGENT_ID", "phantombuster:posts", function_input.profile_url, function_input.max_age
+        )
+
+    except Exception as e:
+        error_message = f"launch_linkedin_profile_posts_phantombuster failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def get_linkedin_profile_posts_phantombuster(function_input: GetProfilePostsInput) -> dict[str, Any]:
+    """Legacy function - kept for backward compatibility. Use launch_linkedin_profile_posts_phantombuster + fetch_phantombuster_container instead."""
     try:
         api_key = os.environ.get("PHANTOMBUSTER_API_KEY")
         if not api_key:
@@ -55,42 +90,56 @@ async def get_linkedin_profile_posts_phantombuster(function_input: GetProfilePos
             "homerun": True,
         }
 
-        async with httpx.AsyncClient() as client:
+        client = get_http_client()
+
+        async def launch() -> str | None:
             log.info(f"Initiating scrape for {function_input.profile_url}")
-            launch_url = f"https://api.phantombuster.com/api/v1/agent/{agent_id}/launch"
-            response = await client.post(launch_url, headers=headers, json={"argument": argument})
+            launch_url = f"{phantombuster_api_url()}/api/v1/agent/{agent_id}/launch"
+            response = await client.post(
+                launch_url, headers=headers, json={"argument": argument}, extensions=rate_limited("phantombuster:launch")
+            )
             response.raise_for_status()
-            
+
             response_json = response.json()
             log.info(f"Phantombuster launch response: {response_json}")
-
-            container_id = response_json.get("data", {}).get("containerId")
-            if not container_id:
-                raise_exception("Failed to get containerId from Phantombuster launch response.")
-
+            return response_json.get("data", {}).get("containerId")
+
+        # Attach to a running container for the same agent and profile instead of launching a new one
+        flight = get_single_flight("phantombuster")
+        container_id, coalesced = await flight.run(
+            f"{agent_id}:{canonical_profile_url(function_input.profile_url)}", launch
+        )
+        if not container_id:
+            raise_exception("Failed to get containerId from Phantombuster launch response.")
+
+        if coalesced:
+            log.info(f"Joined in-flight scrape. Container ID: {container_id}")
+        else:
             log.info(f"Scrape initiated. Container ID: {container_id}")
 
-            status_response = {}
-            while True:
-                log.info(f"Checking status for container {container_id}...")
-                output_url = f"https://api.phantombuster.com/api/v2/containers/fetch?id={container_id}&withResultObject=true"
-                response = await client.get(output_url, headers=headers)
-                response.raise_for_status()
-                log.info(f"Phantombuster response: {response.json()}")
-                status_response = response.json()
-                status = status_response.get("status")
-                result_object = status_response.get("resultObject")
-                log.info(f"Container status: {status}")
-
-                if status == "finished":
-                    break
-                elif status == "failed":
-                    raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
-                
-                await asyncio.sleep(5)
+        status_response = {}
+        while True:
+            log.info(f"Checking status for container {container_id}...")
+            output_url = f"{phantombuster_api_url()}/api/v2/containers/fetch?id={container_id}"
+            response = await client.get(output_url, headers=headers, extensions=rate_limited("phantombuster:fetch"))
+            response.raise_for_status()
+            log.info(f"Phantombuster response: {response.json()}")
+            status_response = response.json()
+            status = status_response.get("status")
+            log.info(f"Container status: {status}")
+
+            if status == "finished":
+                flight.release(container_id)
+                break
+            elif status == "failed":
+                flight.release(container_id)
+                raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
             
-            log.info(f"Phantombuster job for container {container_id} finished successfully.")
-            return {"status": "success", "containerId": container_id, "resultObject": result_object}
+            await asyncio.sleep(5)
+        
+        log.info(f"Phantombuster job for container {container_id} finished successfully.")
+        results = await container_results(container_id, "phantombuster:posts", function_input.fields)
+        return {"status": "success", "containerId": container_id, **results}
 
     except Exception as e:
         error_message = f"get_linkedin_profile_posts_phantombuster failed: {e}"
@@ -1,13 +1,16 @@
 import os
 import json
 from typing import Any
-from dotenv import load_dotenv
 import asyncio
 from pydantic import BaseModel, Field
 from restack_ai.function import NonRetryableError, function, log
-import httpx
 
-load_dotenv()
+from src.functions.phantombuster.containers import launch_agent, phantombuster_api_url
+from src.functions.phantombuster.results import container_results
+from src.ratelimit import rate_limited
+from src.singleflight import get_single_flight
+from src.transport import get_http_client
+from src.urls import canonical_profile_url
 
 
 class GetProfileReactionsInput(BaseModel):
@@ -33,8 +36,20 @@ def raise_exception(message: str) -> None:
     raise NonRetryableError(message)
 
 
+@function.defn()
+async def launch_linkedin_profile_reactions_phantombuster(function_input: GetProfileReactionsInput) -> dict[str, Any]:
+    """Launch a LinkedIn profile reactions scrape and return the container_id without waiting for it."""
+    try:
+        return await launch_agent("PHANTOMBUSTER_REACTIONS_AGENT_ID", "phantombuster:reactions", function_input.profile_url)
+
+    except Exception as e:
+        error_message = f"launch_linkedin_profile_reactions_phantombuster failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
 @function.defn()
 async def get_linkedin_profile_reactions_phantombuster(function_input: GetProfileReactionsInput) -> dict[str, Any]:
+    """Legacy function - kept for backward compatibility. Use launch_linkedin_profile_reactions_phantombuster + fetch_phantombuster_container instead."""
     try:
         api_key = os.environ.get("PHANTOMBUSTER_API_KEY")
         if not api_key:
@@ -55,43 +70,57 @@ async def get_linkedin_profile_reactions_phantombuster(function_input: GetProfil
             "homerun": True,
         }
 
-        async with httpx.AsyncClient() as client:
+        client = get_http_client()
+
+        async def launch() -> str | None:
             log.info(f"Initiating scrape for {function_input.profile_url}")
-            launch_url = f"https://api.phantombuster.com/api/v1/agent/{agent_id}/launch"
-            response = await client.post(launch_url, headers=headers, json={"argument": argument})
+            launch_url = f"{phantombuster_api_url()}/api/v1/agent/{agent_id}/launch"
+            response = await client.post(
+                launch_url, headers=headers, json={"argument": argument}, extensions=rate_limited("phantombuster:launch")
+            )
             response.raise_for_status()
-            
+
             response_json = response.json()
             log.info(f"Phantombuster launch response: {response_json}")
-
-            container_id = response_json.get("data", {}).get("containerId")
-            if not container_id:
-                raise_exception("Failed to get containerId from Phantombuster launch response.")
-
+            return response_json.get("data", {}).get("containerId")
+
+        # Attach to a running container for the same agent and profile instead of launching a new one
+        flight = get_single_flight("phantombuster")
+        container_id, coalesced = await flight.run(
+            f"{agent_id}:{canonical_profile_url(function_input.profile_url)}", launch
+        )
+        if not container_id:
+            raise_exception("Failed to get containerId from Phantombuster launch response.")
+
+        if coalesced:
+            log.info(f"Joined in-flight scrape. Container ID: {container_id}")
+        else:
             log.info(f"Scrape initiated. Container ID: {container_id}")
 
-            status_response = {}
-            while True:
-                log.info(f"Checking status for container {container_id}...")
-                output_url = f"https://api.phantombuster.com/api/v2/containers/fetch?id={container_id}&withResultObject=true"
-                response = await client.get(output_url, headers=headers)
-                response.raise_for_status()
-                log.info(f"Phantombuster response: {response.json()}")
-                
-                status_response = response.json()
-                status = status_response.get("status")
-                result_object = status_response.get("resultObject")
-                log.info(f"Container status: {status}")
-
-                if status == "finished":
-                    break
-                elif status == "failed":
-                    raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
-                
-                await asyncio.sleep(5)
+        status_response = {}
+        while True:
+            log.info(f"Checking status for container {container_id}...")
+            output_url = f"{phantombuster_api_url()}/api/v2/containers/fetch?id={container_id}"
+            response = await client.get(output_url, headers=headers, extensions=rate_limited("phantombuster:fetch"))
+            response.raise_for_status()
+            log.info(f"Phantombuster response: {response.json()}")
+            
+            status_response = response.json()
+            status = status_response.get("status")
+            log.info(f"Container status: {status}")
+
+            if status == "finished":
+                flight.release(container_id)
+                break
+            elif status == "failed":
+                flight.release(container_id)
+                raise_exception(f"Phantombuster container {container_id} failed. Details: {status_response}")
             
-            log.info(f"Phantombuster job for container {container_id} finished successfully.")
-            return {"status": "success", "containerId": container_id, "resultObject": result_object}
+            await asyncio.sleep(5)
+        
+        log.info(f"Phantombuster job for container {container_id} finished successfully.")
+        results = await container_results(container_id, "phantombuster:reactions")
+        return {"status": "success", "containerId": container_id, **results}
 
     except Exception as e:
         error_message = f"get_linkedin_profile_reactions_phantombuster failed: {e}"
@@ -0,0 +1,248 @@
+import csv
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+import httpx
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, RetryableError, function, log
+
+from src.functions.cache import cache_result
+from src.functions.phantombuster.containers import phantombuster_api_url, phantombuster_headers
+from src.models import to_builtins, to_model
+from src.projection import project
+from src.payloads import offload, offload_threshold, store_payload
+from src.ratelimit import rate_limited
+from src.spool import get_spool, json_array_items
+from src.transport import get_http_client
+
+# A finished container's results are collected in a separate step from the
+# status checks, which no longer ask for the result object. Small agents put
+# their records in the result object itself; others link to an output file
+# (result.csv / result.json). Output files are streamed to disk and parsed one
+# row at a time, JSON arrays element by element.
+# Either way the records' keys are normalised to snake_case, empty values to
+# None, and the records mapped onto the dataset's model (src/models.py) before
+# they are spooled as NDJSON and returned inline or as a payload reference.
+
+# Model each dataset's records are mapped onto
+DATASET_KINDS = {
+    "phantombuster:profile": "profile",
+    "phantombuster:posts": "post",
+    "phantombuster:reactions": "reaction",
+}
+
+# Keys under which agents link to their output files in the result object
+FILE_URL_KEYS = {"csv": ("csvURL", "csvUrl", "csv_url"), "json": ("jsonUrl", "jsonURL", "json_url")}
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_SEPARATORS = re.compile(r"[^0-9A-Za-z]+")
+
+
+class ContainerResultInput(BaseModel):
+    """Input parameters for collecting a finished container's results."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    container_id: str = Field(
+        ...,
+        title="Container ID",
+        description="The container ID returned by the agent launch.",
+    )
+    dataset: str = Field(
+        ...,
+        title="Dataset",
+        description="Kind of scrape the container ran, e.g. 'phantombuster:profile'.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each record. The cached result keeps every field.",
+        min_length=1,
+    )
+    cache_kind: str | None = Field(
+        default=None,
+        title="Cache Kind",
+        description="Store the full result in the cache under this kind, e.g. 'phantombuster:profile', keyed by profile_url.",
+    )
+    profile_url: str | None = Field(
+        default=None,
+        title="LinkedIn Profile URL",
+        description="The profile the result is cached under.",
+    )
+
+
+def raise_exception(message: str) -> None:
+    log.error("phantombuster results function failed", error=message)
+    raise NonRetryableError(message)
+
+
+def normalise_key(key: str) -> str:
+    """'profileUrl', 'Profile URL' and 'profile-url' all become 'profile_url'."""
+    return _SEPARATORS.sub("_", _CAMEL.sub("_", key)).strip("_").lower()
+
+
+def normalise(value: Any) -> Any:
+    """Normalise the keys of a record, recursively, and turn empty strings into None."""
+    if isinstance(value, dict):
+        return {normalise_key(str(key)): normalise(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalise(item) for item in value]
+    if value == "":
+        return None
+    return value
+
+
+def output_file(result_object: Any) -> tuple[str, str] | None:
+    """The (format, URL) of the output file a result object links to, if any, preferring CSV."""
+    candidates = result_object if isinstance(result_object, list) else [result_object]
+    for candidate in candidates[:1]:
+        if not isinstance(candidate, dict):
+            continue
+        for file_format in ("csv", "json"):
+            for key in FILE_URL_KEYS[file_format]:
+                if candidate.get(key):
+                    return file_format, candidate[key]
+    return None
+
+
+def read_output_file(path: Path, file_format: str) -> Iterator[Any]:
+    """Yield the records of a downloaded output file one at a time."""
+    if file_format == "csv":
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+        return
+
+    with path.open("rb") as f:
+        first_byte = f.read(64).lstrip()[:1]
+        f.seek(0)
+        if first_byte == b"[":
+            yield from json_array_items(f)
+        else:
+            # NDJSON, or a single JSON object per line
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def spool_key(container_id: str) -> str:
+    return f"phantombuster-{container_id}"
+
+
+def model_record(kind: str, record: Any, fields: list[str] | None) -> Any:
+    model = to_model(kind, "phantombuster", normalise(record))
+    return project(to_builtins(model), fields) if fields else model
+
+
+async def download(url: str, path: Path) -> None:
+    client = get_http_client()
+    async with client.stream("GET", url) as response:
+        if response.status_code in (403, 404):
+            # Storage can lag a moment behind the container finishing
+            raise RetryableError(f"Output file {url} is not available yet ({response.status_code})")
+        response.raise_for_status()
+        with path.open("wb") as f:
+            async for chunk in response.aiter_bytes():
+                f.write(chunk)
+
+
+async def fetch_result_object(container_id: str) -> Any:
+    client = get_http_client()
+    response = await client.get(
+        f"{phantombuster_api_url()}/api/v2/containers/fetch-result-object",
+        headers=phantombuster_headers(),
+        params={"id": container_id},
+        extensions=rate_limited("phantombuster:fetch"),
+    )
+    response.raise_for_status()
+    result_object = response.json().get("resultObject")
+    if isinstance(result_object, str):
+        result_object = json.loads(result_object) if result_object.strip() else None
+    return result_object
+
+
+async def spool_container_results(
+    container_id: str, dataset: str, fields: list[str] | None = None
+) -> dict[str, Any]:
+    """Parse a finished container's results into the spool, under 'phantombuster-<container_id>'.
+
+    With fields, only those fields of each record are kept.
+    """
+    spool = get_spool()
+    key = spool_key(container_id)
+    kind = DATASET_KINDS[dataset]
+    result_object = await fetch_result_object(container_id)
+    linked = output_file(result_object) if result_object else None
+    if linked is None:
+        # An empty result object means the container found nothing. The
+        # agent's own result.csv is never read instead: it holds the rows of
+        # every launch of that agent, not just this container's
+        records = result_object if isinstance(result_object, list) else [result_object] if result_object else []
+        return spool.write_records(key, (model_record(kind, record, fields) for record in records))
+
+    file_format, url = linked
+    log.info(f"Streaming {file_format} output file of container {container_id}")
+    # Named as a partial file, so the spool prunes it if this worker dies mid-download
+    raw = spool.partial_path(spool.path(key)).with_suffix(f".{file_format}.partial")
+    try:
+        await download(url, raw)
+        records = read_output_file(raw, file_format)
+        return spool.write_records(key, (model_record(kind, record, fields) for record in records))
+    finally:
+        raw.unlink(missing_ok=True)
+
+
+async def container_results(container_id: str, dataset: str, fields: list[str] | None = None) -> dict[str, Any]:
+    """A finished container's records as normalised models, inline when small or as a payload reference.
+
+    Returns {"records": <count>, "result": <list or payload reference>}.
+    """
+    spool = get_spool()
+    info = await spool_container_results(container_id, dataset, fields)
+    key = info["snapshot_id"]
+    if info["bytes"] <= offload_threshold():
+        result: Any = [record for page in spool.iter_records(key) for record in page]
+    else:
+        result = await store_payload(spool.iter_json_array(key), info["records"])
+        log.info(f"Container {container_id} results stored as payload {result['payload_ref']}")
+    return {"records": info["records"], "result": result}
+
+
+@function.defn()
+async def collect_phantombuster_results(function_input: ContainerResultInput) -> dict[str, Any]:
+    """Collect, parse and normalise the results of a finished container.
+
+    With cache_kind, the full result is cached, and only the fields requested
+    are returned. Raises RetryableError while its output file is not available yet.
+    """
+    try:
+        container_id = function_input.container_id
+        result = await container_results(container_id, function_input.dataset)
+        log.info(f"Collected {result['records']} record(s) from container {container_id}")
+        if function_input.cache_kind and function_input.profile_url:
+            cached = {"status": "success", "containerId": container_id, **result}
+            cache_result(function_input.cache_kind, function_input.profile_url, cached)
+        if not function_input.fields:
+            return result
+
+        # Project the spooled records one page at a time
+        projected = [
+            project(record, function_input.fields)
+            for page in get_spool().iter_records(spool_key(container_id))
+            for record in page
+        ]
+        return {"records": result["records"], "result": await offload(projected)}
+
+    except RetryableError:
+        raise
+    except httpx.TransportError as e:
+        raise RetryableError(f"collect_phantombuster_results failed: {e}") from e
+    except Exception as e:
+        error_message = f"collect_phantombuster_results failed: {e}"
+        raise NonRetryableError(error_message) from e
@@ -1,11 +1,11 @@
 import os
 from typing import Any, Dict
-from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from restack_ai.function import NonRetryableError, function, log
-import httpx
 
-load_dotenv()
+from src.functions.phantombuster.containers import phantombuster_api_url
+from src.ratelimit import rate_limited
+from src.transport import get_http_client
 
 class SaveLeadInput(BaseModel):
     """Input parameters for saving a LinkedIn lead."""
@@ -41,20 +41,22 @@ async def save_linkedin_lead_phantombuster(function_input: SaveLeadInput) -> dic
             "Content-Type": "application/json",
         }
 
-        save_url = "https://api.phantombuster.com/api/v2/org-storage/leads/save"
+        save_url = f"{phantombuster_api_url()}/api/v2/org-storage/leads/save"
         
         payload = {
             "linkedinProfileUrl": function_input.linkedin_profile_url
         }
 
-        async with httpx.AsyncClient() as client:
-            log.info(f"Saving lead {function_input.linkedin_profile_url} to Phantombuster.")
-            response = await client.post(save_url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            response_json = response.json()
-            log.info(f"Phantombuster save lead response: {response_json}")
-            return response_json
+        client = get_http_client()
+        log.info(f"Saving lead {function_input.linkedin_profile_url} to Phantombuster.")
+        response = await client.post(
+            save_url, headers=headers, json=payload, extensions=rate_limited("phantombuster:leads")
+        )
+        response.raise_for_status()
+        
+        response_json = response.json()
+        log.info(f"Phantombuster save lead response: {response_json}")
+        return response_json
 
     except Exception as e:
         error_message = f"save_linkedin_lead_phantombuster failed: {e}"
@@ -0,0 +1,155 @@
+from typing import Any
+from pydantic import BaseModel, Field
+from restack_ai.function import NonRetryableError, function, log
+
+from src.routing import MIN_HEDGE_DELAY, get_provider_stats
+
+PROFILE_PROVIDERS = ["brightdata", "phantombuster"]
+
+
+class RoutedProfileInput(BaseModel):
+    """Input parameters for getting a LinkedIn profile from the best provider."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    profile_url: str = Field(
+        ...,
+        title="LinkedIn Profile URL",
+        description="The URL of the LinkedIn profile.",
+        example="https://www.linkedin.com/in/williamhgates/",
+    )
+    provider: str | None = Field(
+        default=None,
+        title="Provider",
+        description="Use only this provider ('brightdata' or 'phantombuster'). By default the provider is chosen from recent latency and errors.",
+        pattern="^(brightdata|phantombuster)$",
+    )
+    hedge: bool = Field(
+        default=True,
+        title="Hedge",
+        description="Also start the next provider if the first one has not answered by its p90 latency, and return whichever finishes first.",
+    )
+    max_age: int | None = Field(
+        default=None,
+        title="Max Age",
+        description="Maximum age in seconds of a cached result that may be returned instead of scraping. 0 always scrapes; defaults to the cache TTL.",
+        ge=0,
+    )
+    stale_while_revalidate: bool = Field(
+        default=False,
+        title="Stale While Revalidate",
+        description="Return a stale cached result instantly and refresh it in the background.",
+    )
+    fields: list[str] | None = Field(
+        default=None,
+        title="Fields",
+        description="Return only these fields of each record, as dotted paths such as 'headline' or 'experience.title'. Applies to cached results too; by default every field is returned.",
+        min_length=1,
+        example=["name", "headline", "company"],
+    )
+
+
+class RoutePlanInput(BaseModel):
+    """Input parameters for ranking providers."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    kind: str = Field(
+        ...,
+        title="Kind",
+        description="Entity being fetched, e.g. 'profile'.",
+    )
+    providers: list[str] = Field(
+        ...,
+        title="Providers",
+        description="Providers able to serve the request, in order of preference when nothing is known about them.",
+        min_length=1,
+    )
+
+
+class ProviderOutcomeInput(BaseModel):
+    """Input parameters for recording how a provider served a request."""
+
+    model_config = {
+        "strict": True,
+        "extra": "forbid",
+        "validate_assignment": True,
+        "str_strip_whitespace": True,
+    }
+
+    kind: str = Field(
+        ...,
+        title="Kind",
+        description="Entity that was fetched, e.g. 'profile'.",
+    )
+    provider: str = Field(
+        ...,
+        title="Provider",
+        description="Provider that served or failed the request.",
+    )
+    seconds: float = Field(
+        ...,
+        title="Seconds",
+        description="Time from starting the provider until it returned or failed.",
+        ge=0,
+    )
+    ok: bool = Field(
+        ...,
+        title="OK",
+        description="Whether the provider returned a result.",
+    )
+    censored: bool = Field(
+        default=False,
+        title="Censored",
+        description="The provider was cancelled after seconds without answering, so its latency is only known to be longer.",
+    )
+
+
+@function.defn()
+async def plan_provider_route(function_input: RoutePlanInput) -> dict[str, Any]:
+    """Rank providers by expected time to a successful result.
+
+    Returns the providers in the order to try them, the delay after which to
+    hedge with the next one (the first provider's p90) and the statistics used.
+    """
+    try:
+        ranking = get_provider_stats().rank(function_input.kind, function_input.providers)
+        plan = {
+            "order": [summary["provider"] for summary in ranking],
+            "hedge_after": max(MIN_HEDGE_DELAY, ranking[0]["p90"]),
+            "stats": ranking,
+        }
+        log.info("plan_provider_route done", result=plan)
+        return plan
+
+    except Exception as e:
+        error_message = f"plan_provider_route failed: {e}"
+        raise NonRetryableError(error_message) from e
+
+
+@function.defn()
+async def record_provider_outcome(function_input: ProviderOutcomeInput) -> dict[str, Any]:
+    """Record a provider's latency or failure for future routing."""
+    try:
+        get_provider_stats().record(
+            function_input.kind,
+            function_input.provider,
+            function_input.seconds,
+            function_input.ok,
+            censored=function_input.censored,
+        )
+        return {"recorded": True}
+
+    except Exception as e:
+        error_message = f"record_provider_outcome failed: {e}"
+        raise NonRetryableError(error_message) from e
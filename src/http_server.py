@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, urlsplit
+
+# Minimal asyncio HTTP/1.1 server for the few endpoints the worker exposes
+# itself (provider webhooks). One request per connection, bodies read by
+# Content-Length, so it needs no web framework.
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes = b""
+
+    def json(self) -> object:
+        return json.loads(self.body or b"null")
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def json(cls, data: object, status: int = 200) -> "Response":
+        return cls(status=status, body=json.dumps(data).encode())
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+REASONS = {200: "OK", 201: "Created", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Request | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("body too large")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, parse_qs(url.query), headers, body)
+
+
+def _write_response(writer: asyncio.StreamWriter, response: Response) -> None:
+    head = [
+        f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'OK')}",
+        f"Content-Type: {response.content_type}",
+        f"Content-Length: {len(response.body)}",
+        "Connection: close",
+        *(f"{name}: {value}" for name, value in response.headers.items()),
+    ]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+
+
+def _prefix_route(routes: dict[tuple[str, str], Handler], request: Request) -> Handler | None:
+    # Paths ending in "/" also match everything below them, longest first
+    matches = [
+        path for method, path in routes
+        if method == request.method and path.endswith("/") and request.path.startswith(path)
+    ]
+    return routes[(request.method, max(matches, key=len))] if matches else None
+
+
+async def start_http_server(host: str, port: int, routes: dict[tuple[str, str], Handler]) -> asyncio.Server:
+    """Serve ``{(method, path): handler}`` on host:port until the server is closed.
+
+    A path ending in ``/`` is a prefix route for every path below it.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                request = await _read_request(reader)
+            except ValueError:
+                _write_response(writer, Response.json({"error": "bad request"}, 400))
+                return
+            if request is None:
+                return
+            handler = routes.get((request.method, request.path)) or _prefix_route(routes, request)
+            if handler is None:
+                response = Response.json({"error": "not found"}, 404)
+            else:
+                try:
+                    response = await handler(request)
+                except Exception:
+                    logging.exception("HTTP handler for %s %s failed", request.method, request.path)
+                    response = Response.json({"error": "internal error"}, 500)
+            _write_response(writer, response)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,314 @@
+import asyncio
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from restack_ai.function import NonRetryableError, RetryableError, function
+from temporalio import activity
+
+from src.http_server import Request, Response, start_http_server
+
+# Self-contained Prometheus metrics for the worker: a small registry of
+# counters, gauges and histograms rendered in the text exposition format and
+# served on GET /metrics when METRICS_PORT is set. Every registered function is
+# timed by instrument_functions(); provider modules record their own domain
+# metrics (polls, time-to-ready, payload sizes) with the metrics defined below.
+
+METRICS_PATH = "/metrics"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+READY_BUCKETS = (5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = tuple(float(4**i * 1024) for i in range(9))  # 1 KiB to 64 MiB
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels((*self.labelnames, "le"), (*key, _format_value(bound)))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        """Add a callback producing metrics computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            try:
+                metrics.extend(collector())
+            except Exception:
+                logging.exception("Metrics collector failed")
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+FUNCTION_DURATION = histogram(
+    "linkedin_function_duration_seconds",
+    "Function run time by provider, function, calling workflow and outcome.",
+    ("provider", "function", "workflow", "outcome"),
+)
+FUNCTIONS_IN_FLIGHT = gauge(
+    "linkedin_functions_in_flight",
+    "Functions currently running on this worker.",
+    ("provider", "function"),
+)
+FUNCTION_ERRORS = counter(
+    "linkedin_function_errors_total",
+    "Function failures by outcome (retryable or non_retryable) and underlying error class.",
+    ("provider", "function", "outcome", "error"),
+)
+POLLS = counter(
+    "linkedin_polls_total",
+    "Readiness checks of snapshots and containers by dataset and observed status.",
+    ("dataset", "status"),
+)
+POLLS_PER_JOB = histogram(
+    "linkedin_polls_per_job",
+    "Readiness checks a snapshot or container needed before it was ready.",
+    ("dataset",),
+    COUNT_BUCKETS,
+)
+TIME_TO_READY = histogram(
+    "linkedin_time_to_ready_seconds",
+    "Time from trigger until a snapshot or container was ready.",
+    ("dataset",),
+    READY_BUCKETS,
+)
+RATE_LIMIT_WAIT = histogram(
+    "linkedin_rate_limit_wait_seconds",
+    "Time provider requests waited for a rate limit token, by bucket.",
+    ("limiter",),
+)
+RATE_LIMITED = counter(
+    "linkedin_rate_limited_total",
+    "Provider responses asking to slow down (429, or 503 with Retry-After), by bucket and status.",
+    ("limiter", "status"),
+)
+PAYLOAD_BYTES = histogram(
+    "linkedin_payload_bytes",
+    "Size of results by destination: inline (returned), store (payload store) or spool.",
+    ("destination",),
+    BYTES_BUCKETS,
+)
+
+
+def _worker_metrics() -> Iterable[Metric]:
+    # Imported here: the transport's rate limiter records into this module
+    from src.singleflight import single_flight_stats
+    from src.transport import pool_stats
+
+    pool = pool_stats()
+    connections = Gauge("linkedin_http_pool_connections", "Pooled HTTP connections by host and state.", ("host", "state"))
+    for host, host_stats in pool["hosts"].items():
+        connections.set(host_stats["idle"], host=host, state="idle")
+        connections.set(host_stats["active"], host=host, state="active")
+    requests = Gauge("linkedin_http_pool_requests", "HTTP requests in the pool by state.", ("state",))
+    requests.set(pool["in_flight_requests"] - pool["queued_requests"], state="active")
+    requests.set(pool["queued_requests"], state="queued")
+
+    flights = single_flight_stats()
+    in_flight = Gauge("linkedin_single_flight_jobs", "Provider jobs currently joinable by later callers.", ("provider",))
+    coalesced = Counter("linkedin_single_flight_total", "Job starts by whether they joined a running job.", ("provider", "result"))
+    for stats in flights:
+        in_flight.set(stats["in_flight"], provider=stats["name"])
+        coalesced.inc(stats["hits"], provider=stats["name"], result="joined")
+        coalesced.inc(stats["misses"], provider=stats["name"], result="started")
+    return [connections, requests, in_flight, coalesced]
+
+
+registry.add_collector(_worker_metrics)
+
+
+def _provider(fn: Callable[..., Any]) -> str:
+    # src.functions.<provider>.<module>, or src.functions.<module> for shared functions
+    parts = fn.__module__.split(".")
+    return parts[2] if len(parts) > 2 else parts[-1]
+
+
+def _workflow_type() -> str:
+    try:
+        return activity.info().workflow_type or ""
+    except RuntimeError:
+        return ""
+
+
+def instrument_function(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Return fn re-registered under the same name, timed and counted."""
+    provider = _provider(fn)
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def instrumented(*args: Any) -> Any:
+        FUNCTIONS_IN_FLIGHT.inc(provider=provider, function=name)
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await fn(*args)
+        except Exception as e:
+            outcome = "retryable" if isinstance(e, RetryableError) else "non_retryable" if isinstance(e, NonRetryableError) else "error"
+            error = type(e.__cause__ or e).__name__
+            FUNCTION_ERRORS.inc(provider=provider, function=name, outcome=outcome, error=error)
+            raise
+        finally:
+            FUNCTIONS_IN_FLIGHT.dec(provider=provider, function=name)
+            FUNCTION_DURATION.observe(
+                time.perf_counter() - started,
+                provider=provider,
+                function=name,
+                workflow=_workflow_type(),
+                outcome=outcome,
+            )
+
+    # functools.wraps copied the original's function definition; replace it
+    del instrumented.__dict__["__temporal_activity_definition"]
+    return function.defn(name=name)(instrumented)
+
+
+def instrument_functions(functions: list[Callable[..., Any]]) -> list[Callable[..., Any]]:
+    return [instrument_function(fn) for fn in functions]
+
+
+async def handle_metrics(request: Request) -> Response:
+    return Response(body=registry.render().encode(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def start_metrics_server() -> asyncio.Server | None:
+    """Start the metrics endpoint if METRICS_PORT is set."""
+    port = os.environ.get("METRICS_PORT")
+    if not port:
+        return None
+    host = os.environ.get("METRICS_HOST", "0.0.0.0")
+    server = await start_http_server(host, int(port), {("GET", METRICS_PATH): handle_metrics})
+    logging.info("Metrics listening on %s:%s%s", host, port, METRICS_PATH)
+    return server
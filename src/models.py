@@ -0,0 +1,298 @@
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+import msgspec
+
+# Normalised records shared by the Bright Data and Phantombuster functions.
+# Providers return dozens of keys per record, most of them unused and many
+# nested; records are mapped onto these few fields instead, as msgspec structs
+# (no per-instance __dict__, fast JSON encode and decode). Unset fields are
+# left out when encoded, so a sparse record stays small on the wire too.
+#
+# Each (kind, provider) pair has a table mapping a model field to the record
+# keys it may come from, first non-empty match wins. Keys may be dotted paths
+# into nested objects. Phantombuster keys are matched after they have been
+# normalised to snake_case.
+
+
+class Position(msgspec.Struct, omit_defaults=True, kw_only=True):
+    title: str | None = None
+    company: str | None = None
+    company_url: str | None = None
+    location: str | None = None
+    start: str | None = None
+    end: str | None = None
+    description: str | None = None
+
+
+class School(msgspec.Struct, omit_defaults=True, kw_only=True):
+    school: str | None = None
+    degree: str | None = None
+    field: str | None = None
+    start: str | None = None
+    end: str | None = None
+
+
+class Profile(msgspec.Struct, omit_defaults=True, kw_only=True):
+    provider: str
+    url: str | None = None
+    id: str | None = None
+    name: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    headline: str | None = None
+    about: str | None = None
+    location: str | None = None
+    country_code: str | None = None
+    company: str | None = None
+    company_url: str | None = None
+    title: str | None = None
+    followers: int | None = None
+    connections: int | None = None
+    avatar: str | None = None
+    experience: list[Position] = []
+    education: list[School] = []
+    error: str | None = None
+
+
+class Post(msgspec.Struct, omit_defaults=True, kw_only=True):
+    provider: str
+    url: str | None = None
+    id: str | None = None
+    author: str | None = None
+    author_url: str | None = None
+    text: str | None = None
+    posted_at: str | None = None
+    type: str | None = None
+    likes: int | None = None
+    comments: int | None = None
+    reposts: int | None = None
+    images: list[str] = []
+    error: str | None = None
+
+
+class Reaction(msgspec.Struct, omit_defaults=True, kw_only=True):
+    provider: str
+    post_url: str | None = None
+    reaction: str | None = None
+    actor_name: str | None = None
+    actor_url: str | None = None
+    actor_headline: str | None = None
+    error: str | None = None
+
+
+MODELS: dict[str, type[msgspec.Struct]] = {
+    "profile": Profile,
+    "post": Post,
+    "reaction": Reaction,
+}
+
+FIELDS: dict[tuple[str, str], dict[str, tuple[str, ...]]] = {
+    ("profile", "brightdata"): {
+        "url": ("url", "input_url", "input.url"),
+        "id": ("linkedin_id", "id"),
+        "name": ("name",),
+        "first_name": ("first_name",),
+        "last_name": ("last_name",),
+        "headline": ("position", "headline"),
+        "about": ("about",),
+        "location": ("city", "location"),
+        "country_code": ("country_code",),
+        "company": ("current_company.name", "current_company_name"),
+        "company_url": ("current_company.link",),
+        "title": ("current_company.title",),
+        "followers": ("followers",),
+        "connections": ("connections",),
+        "avatar": ("avatar",),
+        "experience": ("experience",),
+        "education": ("education",),
+        "error": ("error", "error_code"),
+    },
+    ("profile", "phantombuster"): {
+        "url": ("linkedin_profile_url", "profile_url", "query"),
+        "id": ("vmid", "linkedin_id", "id"),
+        "name": ("full_name", "name"),
+        "first_name": ("first_name",),
+        "last_name": ("last_name",),
+        "headline": ("headline", "linkedin_headline"),
+        "about": ("description", "summary", "linkedin_description"),
+        "location": ("location", "linkedin_location"),
+        "company": ("company", "company_name", "linkedin_company_name"),
+        "company_url": ("company_url", "linkedin_company_url"),
+        "title": ("job_title", "linkedin_job_title"),
+        "followers": ("followers", "followers_count", "linkedin_followers_count"),
+        "connections": ("connections", "connections_count", "linkedin_connections_count"),
+        "avatar": ("image_url", "profile_image_url", "linkedin_profile_image_url"),
+        "error": ("error",),
+    },
+    ("post", "brightdata"): {
+        "url": ("url", "post_url"),
+        "id": ("id", "post_id"),
+        "author": ("user_id", "author"),
+        "author_url": ("user_url", "use_url"),
+        "text": ("post_text", "title"),
+        "posted_at": ("date_posted",),
+        "type": ("post_type",),
+        "likes": ("num_likes",),
+        "comments": ("num_comments",),
+        "reposts": ("num_shares", "num_reposts"),
+        "images": ("images",),
+        "error": ("error", "error_code"),
+    },
+    ("post", "phantombuster"): {
+        "url": ("post_url", "url"),
+        "id": ("post_id", "urn"),
+        "author": ("author", "profile_name", "full_name"),
+        "author_url": ("profile_url", "author_url"),
+        "text": ("post_content", "text"),
+        "posted_at": ("post_date", "post_timestamp", "timestamp"),
+        "type": ("type", "post_type"),
+        "likes": ("like_count", "likes"),
+        "comments": ("comment_count", "comments"),
+        "reposts": ("repost_count", "reposts"),
+        "images": ("image_url", "images"),
+        "error": ("error",),
+    },
+    ("reaction", "brightdata"): {
+        "post_url": ("post_url", "input.url", "url"),
+        "reaction": ("reaction", "reaction_type"),
+        "actor_name": ("user_name", "name"),
+        "actor_url": ("user_url", "profile_url"),
+        "actor_headline": ("user_title", "headline"),
+        "error": ("error", "error_code"),
+    },
+    ("reaction", "phantombuster"): {
+        "post_url": ("post_url", "query"),
+        "reaction": ("reaction_type", "reaction"),
+        "actor_name": ("full_name", "name"),
+        "actor_url": ("profile_link", "profile_url"),
+        "actor_headline": ("occupation", "job", "headline"),
+        "error": ("error",),
+    },
+}
+
+POSITION_FIELDS = {
+    "title": ("title",),
+    "company": ("company", "company_name"),
+    "company_url": ("url", "company_url"),
+    "location": ("location",),
+    "start": ("start_date",),
+    "end": ("end_date",),
+    "description": ("description",),
+}
+
+SCHOOL_FIELDS = {
+    "school": ("title", "school"),
+    "degree": ("degree",),
+    "field": ("field",),
+    "start": ("start_year", "start_date"),
+    "end": ("end_year", "end_date"),
+}
+
+INT_FIELDS = {"followers", "connections", "likes", "comments", "reposts"}
+
+_DIGITS = re.compile(r"\d+")
+_encoder = msgspec.json.Encoder()
+
+
+def _lookup(record: dict[str, Any], path: str) -> Any:
+    value: Any = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _first(record: dict[str, Any], paths: tuple[str, ...]) -> Any:
+    for path in paths:
+        value = _lookup(record, path)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _text(value: Any) -> str | None:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return str(value).strip() or None
+
+
+def _int(value: Any) -> int | None:
+    """500, "500", "500+" and "1,234 followers" all parse; anything else is None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    digits = _DIGITS.findall(str(value).replace(",", "")) if value is not None else []
+    return int(digits[0]) if digits else None
+
+
+def _strings(value: Any) -> list[str]:
+    items = value if isinstance(value, list) else [value]
+    return [text for text in map(_text, items) if text]
+
+
+def _items(value: Any, model: Callable[..., Any], fields: dict[str, tuple[str, ...]]) -> list[Any]:
+    if not isinstance(value, list):
+        return []
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            values = {name: _text(_first(item, paths)) for name, paths in fields.items()}
+            items.append(model(**{name: value for name, value in values.items() if value is not None}))
+    return items
+
+
+def to_model(kind: str, provider: str, record: Any) -> msgspec.Struct:
+    """Map one raw provider record onto the kind's model."""
+    model = MODELS[kind]
+    if not isinstance(record, dict):
+        return model(provider=provider, error=f"Unexpected record: {_text(record)}")
+
+    values: dict[str, Any] = {}
+    for name, paths in FIELDS[(kind, provider)].items():
+        value = _first(record, paths)
+        if value is None:
+            continue
+        if name in INT_FIELDS:
+            value = _int(value)
+        elif name == "images":
+            value = _strings(value)
+        elif name == "experience":
+            value = _items(value, Position, POSITION_FIELDS)
+        elif name == "education":
+            value = _items(value, School, SCHOOL_FIELDS)
+        else:
+            value = _text(value)
+        if value is not None:
+            values[name] = value
+    return model(provider=provider, **values)
+
+
+def to_models(kind: str, provider: str, records: Iterable[Any]) -> Iterator[msgspec.Struct]:
+    return (to_model(kind, provider, record) for record in records)
+
+
+def to_builtins(value: Any) -> Any:
+    """Models (or containers of models) as plain dicts and lists, ready to return from a function."""
+    return msgspec.to_builtins(value)
+
+
+def encode(value: Any) -> bytes:
+    return _encoder.encode(value)
+
+
+def decode(data: bytes | str, kind: str) -> list[Any]:
+    """Decode a JSON array of normalised records straight into models."""
+    return msgspec.json.decode(data, type=list[MODELS[kind]])
+
+
+def line_transform(kind: str, provider: str) -> Callable[[bytes], bytes]:
+    """Map one raw NDJSON line onto the kind's model, encoded as JSON."""
+
+    def transform(line: bytes) -> bytes:
+        return _encoder.encode(to_model(kind, provider, msgspec.json.decode(line)))
+
+    return transform
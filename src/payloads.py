@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import AsyncIterator, Iterable
+from pathlib import Path
+from typing import Any
+
+from src.metrics import PAYLOAD_BYTES
+from src.projection import project
+from src.transport import get_http_client
+
+# Content-addressed store for large results. Payloads above a size threshold
+# are saved here and workflows pass a small reference instead, so workflow
+# history, logs and engine traffic stay small:
+#
+#   {"payload_ref": "sha256:<hex>", "size": <bytes>, "records": <count or None>}
+#
+# The default store is a local directory; PAYLOAD_STORE=http stores blobs in any
+# S3-compatible or plain HTTP object store that accepts PUT and GET per key.
+# Use a shared directory or the HTTP store when workers run on several hosts.
+
+DEFAULT_PAYLOAD_PATH = Path.home() / ".cache" / "linkedin_mcp" / "payloads"
+DEFAULT_PAYLOAD_TTL = 7 * 24 * 3600
+DEFAULT_OFFLOAD_THRESHOLD = 64 * 1024
+
+CHUNK_SIZE = 64 * 1024
+PRUNE_INTERVAL = 3600
+
+
+class PayloadNotFoundError(Exception):
+    """Raised when a referenced payload is not in the store."""
+
+
+class FilePayloadStore:
+    """Blobs in a local directory, sharded by the first two hex digits of their hash."""
+
+    def __init__(self, directory: str | Path, ttl: int) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pruned_at = 0.0
+
+    def path(self, digest: str) -> Path:
+        hex_digest = digest.split(":", 1)[-1]
+        return self.directory / hex_digest[:2] / hex_digest
+
+    async def put(self, digest: str, source: Path) -> None:
+        path = self.path(digest)
+        if path.exists():
+            # Same content already stored: keep it alive instead of rewriting it
+            path.touch()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(source, path)
+
+    async def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    async def get(self, digest: str) -> bytes:
+        try:
+            return self.path(digest).read_bytes()
+        except FileNotFoundError as e:
+            raise PayloadNotFoundError(f"Payload {digest} not found") from e
+
+    def prune(self) -> None:
+        now = time.time()
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        cutoff = now - self.ttl
+        for path in self.directory.glob("??/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class HttpPayloadStore:
+    """Blobs stored with PUT/GET at <base_url>/<hex digest>."""
+
+    def __init__(self, base_url: str, token: str | None = None) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def url(self, digest: str) -> str:
+        return f"{self.base_url}/{digest.split(':', 1)[-1]}"
+
+    async def put(self, digest: str, source: Path) -> None:
+        async def body() -> AsyncIterator[bytes]:
+            with source.open("rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    yield chunk
+
+        headers = {**self.headers, "Content-Type": "application/json", "Content-Length": str(source.stat().st_size)}
+        response = await get_http_client().put(self.url(digest), headers=headers, content=body())
+        response.raise_for_status()
+
+    async def exists(self, digest: str) -> bool:
+        response = await get_http_client().head(self.url(digest), headers=self.headers)
+        return response.status_code == 200
+
+    async def get(self, digest: str) -> bytes:
+        response = await get_http_client().get(self.url(digest), headers=self.headers)
+        if response.status_code == 404:
+            raise PayloadNotFoundError(f"Payload {digest} not found")
+        response.raise_for_status()
+        return response.content
+
+    def prune(self) -> None:
+        # Expiry is left to the object store's lifecycle rules
+        pass
+
+
+PayloadStore = FilePayloadStore | HttpPayloadStore
+
+_store: PayloadStore | None = None
+
+
+def get_payload_store() -> PayloadStore:
+    """Return the worker's payload store, configured once on first use."""
+    global _store
+    if _store is None:
+        if os.environ.get("PAYLOAD_STORE", "file") == "http":
+            base_url = os.environ.get("PAYLOAD_STORE_URL")
+            if not base_url:
+                raise ValueError("PAYLOAD_STORE_URL is not set")
+            _store = HttpPayloadStore(base_url, os.environ.get("PAYLOAD_STORE_TOKEN"))
+        else:
+            _store = FilePayloadStore(
+                os.environ.get("PAYLOAD_STORE_PATH") or DEFAULT_PAYLOAD_PATH,
+                int(os.environ.get("PAYLOAD_STORE_TTL", DEFAULT_PAYLOAD_TTL)),
+            )
+    return _store
+
+
+def offload_threshold() -> int:
+    return int(os.environ.get("PAYLOAD_OFFLOAD_THRESHOLD", DEFAULT_OFFLOAD_THRESHOLD))
+
+
+def is_payload_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get("payload_ref"), str)
+
+
+async def store_payload(chunks: Iterable[bytes], records: int | None = None) -> dict[str, Any]:
+    """Store serialised JSON given as chunks and return its reference."""
+    store = get_payload_store()
+    store.prune()
+    sha256 = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile("wb", suffix=".payload", delete=False) as f:
+        staged = Path(f.name)
+        for chunk in chunks:
+            sha256.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    digest = f"sha256:{sha256.hexdigest()}"
+    PAYLOAD_BYTES.observe(size, destination="store")
+    try:
+        await store.put(digest, staged)
+    finally:
+        staged.unlink(missing_ok=True)
+    return {"payload_ref": digest, "size": size, "records": records}
+
+
+async def offload(data: Any) -> Any:
+    """Return data unchanged if it is small, otherwise store it and return a reference."""
+    if is_payload_ref(data):
+        return data
+    encoded = json.dumps(data, separators=(",", ":")).encode()
+    if len(encoded) <= offload_threshold():
+        PAYLOAD_BYTES.observe(len(encoded), destination="inline")
+        return data
+    return await store_payload([encoded], len(data) if isinstance(data, list) else None)
+
+
+async def load(value: Any) -> Any:
+    """Return the data a payload reference points to, leaving references nested in it as they are."""
+    if is_payload_ref(value):
+        return json.loads(await get_payload_store().get(value["payload_ref"]))
+    return value
+
+
+async def resolve(value: Any) -> Any:
+    """Replace payload references, at any depth, with the data they point to."""
+    if is_payload_ref(value):
+        return await load(value)
+    if isinstance(value, dict):
+        return {key: await resolve(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [await resolve(item) for item in value]
+    return value
+
+
+async def project_payload(value: Any, fields: list[str] | None) -> Any:
+    """Keep only the given fields of a value, resolving it first if it is a payload reference.
+
+    The projection is stored as a payload again if it is still large. Without
+    fields the value is returned unchanged.
+    """
+    if not fields:
+        return value
+    return await offload(project(await resolve(value), fields))
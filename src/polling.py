@@ -0,0 +1,148 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Learned polling schedule for provider jobs (Bright Data snapshots,
+# Phantombuster containers). Observed time-to-ready is recorded per dataset and
+# batch-size bucket; the next readiness check is aimed at the next quantile of
+# that distribution (p50, p75, p90, p95, p99) instead of a fixed backoff, so
+# most jobs are picked up shortly after they are ready with the same number of
+# checks or fewer.
+
+DEFAULT_STATS_PATH = Path.home() / ".cache" / "linkedin_mcp" / "polling.sqlite3"
+
+QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+MIN_SAMPLES = 5
+WINDOW = 200
+MIN_DELAY = 5.0
+MAX_DELAY = 600.0
+
+# First check when nothing has been learned yet, by dataset or entity; later
+# checks double the elapsed time
+DEFAULT_FIRST_CHECK = {
+    "profile": 10.0,
+    "posts": 60.0,
+    "reactions": 60.0,
+    "phantombuster:profile": 15.0,
+    "phantombuster:posts": 30.0,
+    "phantombuster:reactions": 30.0,
+}
+
+
+def batch_bucket(batch_size: int) -> int:
+    """Round batch sizes up to a power of two so similar jobs share statistics."""
+    return 1 << max(0, math.ceil(math.log2(max(1, batch_size))))
+
+
+def quantile(samples: list[float], q: float) -> float:
+    """Linear-interpolated quantile of sorted samples."""
+    position = (len(samples) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(samples) - 1)
+    return samples[lower] + (samples[upper] - samples[lower]) * (position - lower)
+
+
+class ReadinessStats:
+    """Persistent window of observed time-to-ready per (dataset, batch bucket)."""
+
+    def __init__(self, path: str | Path, window: int = WINDOW) -> None:
+        self.path = Path(path)
+        self.window = window
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS readiness (
+                dataset TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                observed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS readiness_key ON readiness (dataset, bucket, observed_at)")
+
+    def record(self, dataset: str, batch_size: int, seconds: float) -> None:
+        bucket = batch_bucket(batch_size)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO readiness (dataset, bucket, seconds, observed_at) VALUES (?, ?, ?, ?)",
+                (dataset, bucket, seconds, time.time()),
+            )
+            # Keep only the most recent observations so the schedule follows drift
+            self._db.execute(
+                "DELETE FROM readiness WHERE dataset = ? AND bucket = ? AND rowid NOT IN"
+                " (SELECT rowid FROM readiness WHERE dataset = ? AND bucket = ?"
+                " ORDER BY observed_at DESC LIMIT ?)",
+                (dataset, bucket, dataset, bucket, self.window),
+            )
+
+    def samples(self, dataset: str, batch_size: int) -> list[float]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seconds FROM readiness WHERE dataset = ? AND bucket = ?",
+                (dataset, batch_bucket(batch_size)),
+            ).fetchall()
+        return sorted(seconds for (seconds,) in rows)
+
+    def next_delay(self, dataset: str, batch_size: int, elapsed: float) -> float:
+        """Seconds to wait before the next readiness check, given time since trigger."""
+        samples = self.samples(dataset, batch_size)
+        entity = dataset.rsplit(":", 1)[-1]
+        if len(samples) >= MIN_SAMPLES:
+            for q in QUANTILES:
+                target = quantile(samples, q)
+                if target - elapsed >= MIN_DELAY:
+                    return min(MAX_DELAY, target - elapsed)
+            # Slower than almost every job seen so far: back off gently
+            return min(MAX_DELAY, max(MIN_DELAY, elapsed * 0.5))
+
+        first_check = DEFAULT_FIRST_CHECK.get(dataset) or DEFAULT_FIRST_CHECK.get(entity, 10.0)
+        if elapsed < first_check:
+            return max(MIN_DELAY, first_check - elapsed)
+        return min(MAX_DELAY, max(MIN_DELAY, elapsed))
+
+    def expected_time_to_ready(self, dataset: str, batch_size: int, q: float = 0.99) -> float | None:
+        """Time-to-ready that almost every job stays under, or None until enough samples exist."""
+        samples = self.samples(dataset, batch_size)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return quantile(samples, q)
+
+    def summary(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT dataset, bucket, seconds FROM readiness ORDER BY dataset, bucket"
+            ).fetchall()
+        grouped: dict[tuple[str, int], list[float]] = {}
+        for dataset, bucket, seconds in rows:
+            grouped.setdefault((dataset, bucket), []).append(seconds)
+        summary = []
+        for (dataset, bucket), values in grouped.items():
+            values.sort()
+            summary.append(
+                {
+                    "dataset": dataset,
+                    "batch_bucket": bucket,
+                    "samples": len(values),
+                    **{f"p{round(q * 100)}": round(quantile(values, q), 1) for q in QUANTILES},
+                }
+            )
+        return summary
+
+
+_stats: ReadinessStats | None = None
+
+
+def get_readiness_stats() -> ReadinessStats:
+    """Return the worker's readiness statistics, opened once on first use."""
+    global _stats
+    if _stats is None:
+        _stats = ReadinessStats(os.environ.get("POLLING_STATS_PATH") or DEFAULT_STATS_PATH)
+    return _stats
@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+# Posts already seen per monitored profile, for incremental posts syncs. Each
+# profile (keyed by canonical URL) has a high-water mark, the newest post date
+# and ID seen so far, and the set of posts stored under it. An incremental
+# sync discovers posts from shortly before the mark only, merges them into the
+# stored set and returns just the ones that were not there yet. Each post
+# remembers the snapshot that first stored it, so merging a snapshot again (a
+# retried step) returns the same new posts instead of none.
+
+DEFAULT_HISTORY_PATH = Path.home() / ".cache" / "linkedin_mcp" / "posts.sqlite3"
+
+# Discovery starts this long before the newest post seen, so posts published
+# around the mark (or indexed late by the provider) are not missed; posts seen
+# before are filtered out when merging.
+OVERLAP = timedelta(days=1)
+
+
+def parse_posted_at(value: Any) -> datetime | None:
+    """Parse a provider post date ("2026-01-01T00:00:00.000Z", "2026-01-01") as UTC."""
+    if not isinstance(value, str) or not value:
+        return None
+    text = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        # Python 3.10 only accepts 3 or 6 fractional digits
+        try:
+            parsed = datetime.fromisoformat(text[:19])
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def post_key(post: dict[str, Any]) -> str | None:
+    return post.get("id") or post.get("url")
+
+
+class PostHistory:
+    """SQLite store of seen posts and the high-water mark per profile."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                profile TEXT PRIMARY KEY,
+                posted_at TEXT,
+                post_id TEXT,
+                synced_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                profile TEXT NOT NULL,
+                post TEXT NOT NULL,
+                posted_at TEXT,
+                data BLOB NOT NULL,
+                seen_at REAL NOT NULL,
+                first_snapshot TEXT,
+                PRIMARY KEY (profile, post)
+            )
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(posts)")}
+        if "first_snapshot" not in columns:
+            self._db.execute("ALTER TABLE posts ADD COLUMN first_snapshot TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS posts_first_snapshot ON posts (profile, first_snapshot)")
+
+    def watermark(self, profile: str) -> dict[str, Any] | None:
+        """Return ``{"posted_at", "post_id", "synced_at", "stored"}``, or None before the first sync."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT posted_at, post_id, synced_at FROM watermarks WHERE profile = ?", (profile,)
+            ).fetchone()
+            (stored,) = self._db.execute("SELECT COUNT(*) FROM posts WHERE profile = ?", (profile,)).fetchone()
+        if row is None:
+            return None
+        posted_at, post_id, synced_at = row
+        return {"posted_at": posted_at, "post_id": post_id, "synced_at": synced_at, "stored": stored}
+
+    def start_date(self, profile: str) -> str | None:
+        """Date to discover posts from for a profile's next sync, None for its full history."""
+        mark = self.watermark(profile)
+        posted_at = parse_posted_at(mark["posted_at"]) if mark else None
+        if posted_at is None:
+            return None
+        return (posted_at - OVERLAP).strftime("%Y-%m-%dT00:00:00.000Z")
+
+    def merge(
+        self, profile: str, posts: Iterable[dict[str, Any]], snapshot_id: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Store the posts not seen before and advance the mark; return the new ones.
+
+        With snapshot_id, the new posts are those first stored by that
+        snapshot, so merging it again returns the same posts.
+        """
+        now = time.time()
+        new_posts = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT posted_at, post_id FROM watermarks WHERE profile = ?", (profile,)
+                ).fetchone()
+                newest_at, newest_id = row or (None, None)
+                newest = parse_posted_at(newest_at)
+                for post in posts:
+                    key = post_key(post)
+                    if not key or post.get("error"):
+                        continue
+                    inserted = self._db.execute(
+                        "INSERT OR IGNORE INTO posts (profile, post, posted_at, data, seen_at, first_snapshot)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (profile, key, post.get("posted_at"), json.dumps(post, separators=(",", ":")), now, snapshot_id),
+                    ).rowcount
+                    if not inserted:
+                        continue
+                    new_posts.append(post)
+                    posted_at = parse_posted_at(post.get("posted_at"))
+                    if posted_at and (newest is None or posted_at > newest):
+                        newest, newest_at, newest_id = posted_at, post["posted_at"], key
+                self._db.execute(
+                    "INSERT OR REPLACE INTO watermarks (profile, posted_at, post_id, synced_at) VALUES (?, ?, ?, ?)",
+                    (profile, newest_at, newest_id, now),
+                )
+                if snapshot_id is not None:
+                    # Includes posts stored by an earlier attempt at this merge
+                    rows = self._db.execute(
+                        "SELECT data FROM posts WHERE profile = ? AND first_snapshot = ?", (profile, snapshot_id)
+                    ).fetchall()
+                    new_posts = [json.loads(data) for (data,) in rows]
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        # Newest first, like the provider's own listing
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        new_posts.sort(key=lambda post: parse_posted_at(post.get("posted_at")) or oldest, reverse=True)
+        return new_posts
+
+    def posts(self, profile: str, limit: int | None = None) -> list[dict[str, Any]]:
+        """The profile's stored posts, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM posts WHERE profile = ? ORDER BY posted_at DESC LIMIT ?",
+                (profile, -1 if limit is None else limit),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def reset(self, profile: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM posts WHERE profile = ?", (profile,))
+            self._db.execute("DELETE FROM watermarks WHERE profile = ?", (profile,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_history: PostHistory | None = None
+
+
+def get_post_history() -> PostHistory:
+    """Return the worker's post history, opened once on first use."""
+    global _history
+    if _history is None:
+        _history = PostHistory(os.environ.get("POST_HISTORY_PATH") or DEFAULT_HISTORY_PATH)
+    return _history
@@ -0,0 +1,49 @@
+from typing import Any
+
+# Server-side field projection. Fields are dotted paths into a record, e.g.
+# "headline", "current_company.name" or "experience.title"; a path that goes
+# through a list applies to every item of it. Only the selected keys are kept,
+# in their original nesting, and keys a record does not have are left out
+# rather than returned as null. A projection applied to a list of records
+# applies to each record.
+
+
+def field_tree(fields: list[str]) -> dict[str, Any]:
+    """Merge dotted paths into a tree, where an empty dict selects the whole value.
+
+    ``["a.b", "a.c", "d"]`` becomes ``{"a": {"b": {}, "c": {}}, "d": {}}``.
+    Selecting a parent wins over selecting some of its children.
+    """
+    tree: dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        parts = [part for part in field.strip().split(".") if part]
+        for index, part in enumerate(parts):
+            if part in node and not node[part]:
+                # An ancestor is already selected whole
+                break
+            if index == len(parts) - 1:
+                node[part] = {}
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def _project(value: Any, tree: dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def project(value: Any, fields: list[str] | None) -> Any:
+    """Keep only the given fields of a record, or of each record of a list.
+
+    Without fields the value is returned unchanged.
+    """
+    if not fields:
+        return value
+    return _project(value, field_tree(fields))
@@ -0,0 +1,314 @@
+import asyncio
+import email.utils
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from src.metrics import RATE_LIMIT_WAIT, RATE_LIMITED
+
+# Token-bucket rate limiting of provider API calls. Requests tagged with
+# rate_limited("<provider>:<endpoint>") take a token from the bucket of that
+# endpoint, or of the whole provider when the endpoint has no rate of its own,
+# and wait for one instead of failing. A 429 (or 503 with Retry-After) blocks
+# the bucket for the time the provider asked for and the request is sent again.
+#
+# Buckets live in memory and are shared by every coroutine of the worker; with
+# RATE_LIMIT_STORE=sqlite they are kept in a SQLite file so that all workers on
+# a host share one budget.
+#
+# Rates are set per provider or endpoint, e.g. RATE_LIMIT_BRIGHTDATA=10/s,
+# RATE_LIMIT_PHANTOMBUSTER_LAUNCH=30/m, RATE_LIMIT_LINKEDIN_BURST=5. A rate of
+# 0 or "off" disables the bucket; Retry-After is honoured either way.
+
+DEFAULT_RATE_LIMIT_PATH = Path.home() / ".cache" / "linkedin_mcp" / "ratelimit.sqlite3"
+
+DEFAULT_RATES = {
+    "brightdata": "10/s",
+    "phantombuster": "2/s",
+    "linkedin": "1/s",
+}
+
+DEFAULT_MAX_WAIT = 300.0
+MAX_BACKOFF = 60.0
+
+EXTENSION = "rate_limit"
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:/\s*([smhd]))?\s*$")
+
+
+def rate_limited(key: str) -> dict[str, str]:
+    """httpx request extensions that subject the request to the bucket for key."""
+    return {EXTENSION: key}
+
+
+def parse_rate(value: str) -> float | None:
+    """Parse '10/s', '600/m', '1000/h', '100/d' or a bare per-second number.
+
+    Returns tokens per second, or None for unlimited (0, 'off', 'none').
+    """
+    if value.strip().lower() in ("", "0", "off", "none", "unlimited"):
+        return None
+    match = _RATE.match(value)
+    if not match:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/s' or '600/m'")
+    count, period = match.groups()
+    rate = float(count) / _PERIODS[period or "s"]
+    return rate or None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass(frozen=True)
+class Limit:
+    bucket: str
+    rate: float | None
+    burst: float
+
+
+def _env_name(key: str) -> str:
+    return "RATE_LIMIT_" + re.sub(r"[^A-Z0-9]", "_", key.upper())
+
+
+def resolve_limit(key: str) -> Limit:
+    """Find the rate for an endpoint key: its own, else its provider's."""
+    provider = key.split(":", 1)[0]
+    for bucket in dict.fromkeys((key, provider)):
+        value = os.environ.get(_env_name(bucket)) or DEFAULT_RATES.get(bucket)
+        if value is None:
+            continue
+        rate = parse_rate(value)
+        burst = os.environ.get(f"{_env_name(bucket)}_BURST")
+        default_burst = max(1.0, float(math.ceil(rate))) if rate else 1.0
+        return Limit(bucket, rate, float(burst) if burst else default_burst)
+    return Limit(provider, None, 1.0)
+
+
+@dataclass
+class BucketState:
+    tokens: float
+    updated_at: float
+    blocked_until: float = 0.0
+
+    def reserve(self, limit: Limit, now: float) -> float:
+        """Take a token and return how long to wait before using it.
+
+        Tokens may go negative: each caller is given its own slot in the queue
+        and sleeps until then, so waiters are served in order without polling.
+        """
+        blocked = max(0.0, self.blocked_until - now)
+        if limit.rate is None:
+            return blocked
+        self.tokens = min(limit.burst, self.tokens + (now - self.updated_at) * limit.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return max(blocked, -self.tokens / limit.rate if self.tokens < 0 else 0.0)
+
+    def block(self, until: float) -> None:
+        self.blocked_until = max(self.blocked_until, until)
+        # Start refilling from an empty bucket when the block ends, so queued
+        # requests resume at the configured rate instead of in one burst
+        self.tokens = min(self.tokens, 0.0)
+        self.updated_at = max(self.updated_at, until)
+
+
+class MemoryBucketStore:
+    """Buckets shared by the coroutines of one worker process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: dict[str, BucketState] = {}
+
+    def _state(self, limit: Limit, now: float) -> BucketState:
+        return self._buckets.setdefault(limit.bucket, BucketState(limit.burst, now))
+
+    def reserve(self, limit: Limit, now: float) -> float:
+        with self._lock:
+            return self._state(limit, now).reserve(limit, now)
+
+    def block(self, limit: Limit, until: float) -> None:
+        with self._lock:
+            self._state(limit, time.time()).block(until)
+
+
+class SqliteBucketStore:
+    """Buckets in a SQLite file, shared by every worker on the host.
+
+    Its methods block, for up to the 5s busy timeout while another worker
+    holds the write lock, so RateLimiter calls them in a thread.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL
+            )
+            """
+        )
+
+    def _update(self, limit: Limit, now: float, change: Callable[[BucketState], Any]) -> Any:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front: read-modify-write
+            # of a bucket is atomic across processes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM buckets WHERE bucket = ?", (limit.bucket,)
+                ).fetchone()
+                state = BucketState(*row) if row else BucketState(limit.burst, now)
+                result = change(state)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets (bucket, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                    (limit.bucket, state.tokens, state.updated_at, state.blocked_until),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    def reserve(self, limit: Limit, now: float) -> float:
+        return self._update(limit, now, lambda state: state.reserve(limit, now))
+
+    def block(self, limit: Limit, until: float) -> None:
+        self._update(limit, time.time(), lambda state: state.block(until))
+
+
+BucketStore = MemoryBucketStore | SqliteBucketStore
+
+
+class RateLimiter:
+    """Hands out tokens per endpoint key and records Retry-After blocks."""
+
+    def __init__(self, store: BucketStore) -> None:
+        self.store = store
+        self._limits: dict[str, Limit] = {}
+        # The SQLite store waits on other processes' transactions; keep that off the event loop
+        self._in_thread = isinstance(store, SqliteBucketStore)
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self._in_thread:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def limit(self, key: str) -> Limit:
+        if key not in self._limits:
+            self._limits[key] = resolve_limit(key)
+        return self._limits[key]
+
+    async def acquire(self, key: str) -> float:
+        """Wait for a token for key; returns the seconds waited."""
+        limit = self.limit(key)
+        wait = await self._call(self.store.reserve, limit, time.time())
+        if wait > 0:
+            await asyncio.sleep(wait)
+        RATE_LIMIT_WAIT.observe(wait, limiter=limit.bucket)
+        return wait
+
+    async def retry_after(self, key: str, seconds: float) -> None:
+        """Block key's bucket for seconds, as asked by the provider."""
+        limit = self.limit(key)
+        logging.warning("Rate limited on %s, holding %s requests for %.1fs", key, limit.bucket, seconds)
+        await self._call(self.store.block, limit, time.time() + seconds)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport: tagged requests wait for a token and are resent after 429."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter, max_wait: float) -> None:
+        self.transport = transport
+        self.limiter = limiter
+        self.max_wait = max_wait
+        # Requests sent and waiting for their response headers, for pool statistics
+        self.in_flight: dict[str, int] = {}
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            self.in_flight[host] -= 1
+            if not self.in_flight[host]:
+                del self.in_flight[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request.extensions.get(EXTENSION)
+        if key is None:
+            return await self._send(request)
+
+        waited = 0.0
+        attempt = 0
+        while True:
+            waited += await self.limiter.acquire(key)
+            response = await self._send(request)
+            if response.status_code not in (429, 503):
+                return response
+
+            delay = parse_retry_after(response.headers.get("retry-after"))
+            if delay is None:
+                if response.status_code == 503:
+                    return response
+                delay = min(MAX_BACKOFF, 2.0**attempt)
+            RATE_LIMITED.inc(limiter=self.limiter.limit(key).bucket, status=str(response.status_code))
+            # Streamed bodies cannot be sent twice; give up once waiting longer
+            # than max_wait and let the caller see the 429
+            if not isinstance(request.stream, httpx.ByteStream) or waited + delay > self.max_wait:
+                return response
+            await response.aclose()
+            await self.limiter.retry_after(key, delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the worker's rate limiter, configured once on first use."""
+    global _limiter
+    if _limiter is None:
+        if os.environ.get("RATE_LIMIT_STORE", "memory") == "sqlite":
+            store: BucketStore = SqliteBucketStore(os.environ.get("RATE_LIMIT_PATH") or DEFAULT_RATE_LIMIT_PATH)
+        else:
+            store = MemoryBucketStore()
+        _limiter = RateLimiter(store)
+    return _limiter
+
+
+def rate_limit_max_wait() -> float:
+    return float(os.environ.get("RATE_LIMIT_MAX_WAIT", DEFAULT_MAX_WAIT))
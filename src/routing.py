@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from src.polling import quantile
+
+# Rolling latency and error statistics per provider, used to route requests
+# that more than one provider can serve. Every routed request records how long
+# the winning provider took, or that a provider failed; providers are ranked by
+# the time they are expected to need for one successful result, and the
+# primary's p90 tells the router when to hedge with the next provider. A
+# provider cancelled because a hedge beat it is recorded as censored: its
+# latency is only known to exceed the time it ran, which still counts against
+# it, so a primary that keeps losing to its hedge drifts down the ranking.
+
+DEFAULT_STATS_PATH = Path.home() / ".cache" / "linkedin_mcp" / "routing.sqlite3"
+
+WINDOW = 200
+MIN_SAMPLES = 5
+MIN_HEDGE_DELAY = 5.0
+# Success rate floor, so a provider that failed every recent request is still
+# tried again eventually rather than ranked out forever
+MIN_SUCCESS_RATE = 0.05
+
+# Assumed latency before anything has been observed, by provider
+DEFAULT_LATENCY = {
+    "brightdata": 60.0,
+    "phantombuster": 120.0,
+}
+
+
+def censored_quantile(samples: list[tuple[float, bool]], q: float) -> float:
+    """Quantile of sorted (seconds, censored) samples, where a censored sample is a lower bound.
+
+    Without censored samples this is the plain interpolated quantile. Otherwise
+    it is the Kaplan-Meier estimate; when too few latencies were observed to
+    reach q, the largest sample is returned as a lower bound.
+    """
+    if not any(censored for _, censored in samples):
+        return quantile([seconds for seconds, _ in samples], q)
+    at_risk = len(samples)
+    survival = 1.0
+    for seconds, censored in samples:
+        if not censored:
+            survival *= 1.0 - 1.0 / at_risk
+            if 1.0 - survival >= q - 1e-9:
+                return seconds
+        at_risk -= 1
+    return samples[-1][0]
+
+
+class ProviderStats:
+    """Persistent window of recent outcomes per (kind, provider)."""
+
+    def __init__(self, path: str | Path, window: int = WINDOW) -> None:
+        self.path = Path(path)
+        self.window = window
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outcomes (
+                kind TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                ok INTEGER NOT NULL,
+                observed_at REAL NOT NULL,
+                censored INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(outcomes)")}
+        if "censored" not in columns:
+            self._db.execute("ALTER TABLE outcomes ADD COLUMN censored INTEGER NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outcomes_key ON outcomes (kind, provider, observed_at)")
+
+    def record(self, kind: str, provider: str, seconds: float, ok: bool, censored: bool = False) -> None:
+        """Record an outcome; a censored one means the provider was cancelled after seconds."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO outcomes (kind, provider, seconds, ok, observed_at, censored) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, provider, seconds, int(ok), time.time(), int(censored)),
+            )
+            self._db.execute(
+                "DELETE FROM outcomes WHERE kind = ? AND provider = ? AND rowid NOT IN"
+                " (SELECT rowid FROM outcomes WHERE kind = ? AND provider = ?"
+                " ORDER BY observed_at DESC LIMIT ?)",
+                (kind, provider, kind, provider, self.window),
+            )
+
+    def summary(self, kind: str, provider: str) -> dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seconds, ok, censored FROM outcomes WHERE kind = ? AND provider = ?", (kind, provider)
+            ).fetchall()
+        latencies = sorted((seconds, bool(censored)) for seconds, ok, censored in rows if ok)
+        errors = sum(1 for _, ok, _ in rows if not ok)
+        default = DEFAULT_LATENCY.get(provider, 60.0)
+        learned = len(latencies) >= MIN_SAMPLES
+        return {
+            "provider": provider,
+            "samples": len(rows),
+            "censored": sum(1 for _, censored in latencies if censored),
+            "error_rate": round(errors / len(rows), 3) if rows else 0.0,
+            "p50": round(censored_quantile(latencies, 0.5), 1) if learned else default,
+            "p90": round(censored_quantile(latencies, 0.9), 1) if learned else default * 2,
+            "learned": learned,
+        }
+
+    def rank(self, kind: str, providers: list[str]) -> list[dict[str, Any]]:
+        """Providers' summaries, best first by expected time to a successful result."""
+        summaries = [self.summary(kind, provider) for provider in providers]
+        for summary in summaries:
+            # A single early failure should not bury a provider nothing is known about
+            error_rate = summary["error_rate"] if summary["samples"] >= MIN_SAMPLES else 0.0
+            success_rate = max(MIN_SUCCESS_RATE, 1.0 - error_rate)
+            summary["expected"] = round(summary["p50"] / success_rate, 1)
+        # Stable sort: ties keep the caller's order of preference
+        return sorted(summaries, key=lambda summary: summary["expected"])
+
+
+_stats: ProviderStats | None = None
+
+
+def get_provider_stats() -> ProviderStats:
+    """Return the worker's provider statistics, opened once on first use."""
+    global _stats
+    if _stats is None:
+        _stats = ProviderStats(os.environ.get("ROUTING_STATS_PATH") or DEFAULT_STATS_PATH)
+    return _stats
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from src.cache import ttl_for
+from src.client import TASK_QUEUE, client
+from src.payloads import load
+from src.watchlist import Watchlist, get_watchlist
+
+# Refresh scheduler for watched profiles. Every tick it leases the most stale
+# due profiles from the watchlist (src/watchlist.py) and refreshes them with
+# one BatchGetLinkedinProfilesWorkflowBrightdata run, which scrapes them in
+# batched snapshots and stores each profile in the result cache. The daily
+# budget is spread evenly over the ticks of a day, so a large watchlist costs
+# the same provider quota every hour rather than arriving as a burst once its
+# profiles fall due together. A tick with too little due work does not save
+# its allowance for later.
+#
+# Run it next to the workers, and manage the watchlist with the same command:
+#
+#   schedule add https://www.linkedin.com/in/williamhgates/ --priority 2
+#   schedule list
+#   schedule run
+
+WORKFLOW_NAME = "BatchGetLinkedinProfilesWorkflowBrightdata"
+
+DEFAULT_DAILY_BUDGET = 1000
+DEFAULT_TICK = 15 * 60
+DEFAULT_BATCH_SIZE = 100
+# Longer than the batch workflow may take, so a lease only expires when its
+# refresh result was lost
+DEFAULT_LEASE = 2 * 3600
+
+
+class Scheduler:
+    """Leases due profiles at an even daily rate and refreshes them in batch workflows."""
+
+    def __init__(
+        self,
+        watchlist: Watchlist,
+        daily_budget: int = DEFAULT_DAILY_BUDGET,
+        tick: float = DEFAULT_TICK,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lease: float = DEFAULT_LEASE,
+    ) -> None:
+        self.watchlist = watchlist
+        self.tick = tick
+        self.batch_size = batch_size
+        self.lease = lease
+        self.per_tick = daily_budget * tick / 86400
+        self.allowance = 0.0
+        self._refreshes: set[asyncio.Task[None]] = set()
+
+    def quota(self) -> int:
+        """Profiles this tick may refresh, carrying fractions but never a backlog over."""
+        self.allowance = min(self.allowance + self.per_tick, max(self.per_tick, 1.0))
+        return int(self.allowance)
+
+    async def run_tick(self) -> int:
+        """Lease this tick's share of due profiles and start their refresh; return how many."""
+        urls = self.watchlist.lease_due(self.quota(), self.lease)
+        if not urls:
+            return 0
+        self.allowance -= len(urls)
+        task = asyncio.create_task(self.refresh(urls))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+        return len(urls)
+
+    async def refresh(self, urls: list[str]) -> None:
+        workflow_id = f"schedule-{uuid.uuid4().hex[:12]}"
+        try:
+            run_id = await client.schedule_workflow(
+                workflow_name=WORKFLOW_NAME,
+                workflow_id=workflow_id,
+                workflow_input={"profile_urls": urls, "batch_size": self.batch_size},
+                task_queue=TASK_QUEUE,
+            )
+        except Exception as e:
+            logging.error("Could not start refresh of %d profile(s): %s", len(urls), e)
+            self.watchlist.release(urls)
+            return
+
+        logging.info("Refreshing %d profile(s) in %s", len(urls), workflow_id)
+        try:
+            result = await client.get_workflow_result(workflow_id=workflow_id, run_id=run_id)
+        except Exception as e:
+            self.watchlist.record({url: {"status": "error", "error": f"Refresh failed: {e}"} for url in urls})
+            logging.error("Refresh %s failed: %s", workflow_id, e)
+            return
+        try:
+            # Large batches return their results as a payload reference
+            results = await load(result["results"])
+        except Exception as e:
+            self.watchlist.record({url: {"status": "error", "error": f"Refresh result lost: {e}"} for url in urls})
+            logging.error("Reading refresh %s result failed: %s", workflow_id, e)
+            return
+        self.watchlist.record(results)
+        logging.info(
+            "Refresh %s done: %d succeeded, %d failed", workflow_id, result["succeeded"], result["failed"]
+        )
+
+    async def run(self, once: bool = False) -> None:
+        logging.info(
+            "Scheduler started: %.1f profile(s) per %.0fs tick, %s",
+            self.per_tick,
+            self.tick,
+            self.watchlist.stats(),
+        )
+        while True:
+            started = time.monotonic()
+            started_refreshes = await self.run_tick()
+            if started_refreshes:
+                logging.info("Tick: %d profile(s) leased, watchlist %s", started_refreshes, self.watchlist.stats())
+            if once:
+                await asyncio.gather(*self._refreshes)
+                return
+            await asyncio.sleep(max(0.0, self.tick - (time.monotonic() - started)))
+
+
+def scheduler_from_env(watchlist: Watchlist) -> Scheduler:
+    return Scheduler(
+        watchlist,
+        daily_budget=int(os.environ.get("SCHEDULE_DAILY_BUDGET", str(DEFAULT_DAILY_BUDGET))),
+        tick=float(os.environ.get("SCHEDULE_TICK", str(DEFAULT_TICK))),
+        batch_size=int(os.environ.get("SCHEDULE_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))),
+        lease=float(os.environ.get("SCHEDULE_LEASE", str(DEFAULT_LEASE))),
+    )
+
+
+def list_profiles(watchlist: Watchlist) -> None:
+    now = time.time()
+    for profile in watchlist.profiles():
+        age = f"{(now - profile['refreshed_at']) / 3600:.1f}h ago" if profile["refreshed_at"] else "never"
+        failing = f"  {profile['failures']} failure(s): {profile['error']}" if profile["failures"] else ""
+        print(
+            f"{profile['url']}  priority={profile['priority']}"
+            f"  every {profile['interval'] / 3600:g}h  refreshed {age}{failing}"
+        )
+    print(watchlist.stats())
+
+
+def run_schedule() -> None:
+    parser = argparse.ArgumentParser(description="Refresh watched LinkedIn profiles on a schedule")
+    commands = parser.add_subparsers(dest="command")
+    run = commands.add_parser("run", help="Run the scheduler (the default)")
+    run.add_argument("--once", action="store_true", help="Run a single tick, wait for its refresh and exit")
+    add = commands.add_parser("add", help="Watch profiles, or change their priority and interval")
+    add.add_argument("urls", nargs="+")
+    add.add_argument("--priority", type=int, default=0, help="Higher is refreshed sooner when overdue")
+    add.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Seconds between refreshes (default: the profile cache TTL)",
+    )
+    remove = commands.add_parser("remove", help="Stop watching profiles")
+    remove.add_argument("urls", nargs="+")
+    commands.add_parser("list", help="List watched profiles, most stale first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    watchlist = get_watchlist()
+    if args.command == "add":
+        interval = args.interval or ttl_for("brightdata:profile")
+        for url in args.urls:
+            watchlist.add(url, priority=args.priority, interval=interval)
+        print(watchlist.stats())
+    elif args.command == "remove":
+        for url in args.urls:
+            if not watchlist.remove(url):
+                print(f"Not watched: {url}")
+        print(watchlist.stats())
+    elif args.command == "list":
+        list_profiles(watchlist)
+    else:
+        try:
+            asyncio.run(scheduler_from_env(watchlist).run(once=getattr(args, "once", False)))
+        except KeyboardInterrupt:
+            logging.info("Scheduler interrupted by user. Exiting gracefully.")
+
+
+if __name__ == "__main__":
+    run_schedule()
@@ -1,79 +1,317 @@
+import argparse
 import asyncio
+import importlib
 import logging
-import webbrowser
+import os
+import signal
+from datetime import timedelta
 from pathlib import Path
+from typing import Any
 
-from watchfiles import run_process
+from restack_ai.restack import ServiceOptions
+from temporalio.worker import Worker
 
-from src.client import client, TASK_QUEUE
-
-# Import brightdata functions and workflows
-from src.functions.linkedin.create_post import create_post_on_linkedin
-from src.workflows.linkedin.create_post import CreatePostOnLinkedinWorkflow
-from src.functions.brightdata.get_linkedin_profile import (
-    get_linkedin_profile_brightdata,
-    trigger_linkedin_profile_scrape,
-    download_brightdata_snapshot,
-)
-from src.workflows.brightdata.get_linkedin_profile import GetLinkedinProfileWorkflowBrightdata
-from src.functions.brightdata.get_linkedin_profile_posts import (
-    get_linkedin_profile_posts_brightdata,
-    trigger_linkedin_profile_posts_scrape,
+from src.client import (
+    DOWNLOAD_QUEUE,
+    INTERACTIVE_QUEUE,
+    SUPERVISION_QUEUE,
+    TASK_QUEUE,
+    TRIGGER_QUEUE,
+    UPLOAD_QUEUE,
+    client,
 )
-from src.workflows.brightdata.get_linkedin_profile_posts import GetLinkedinProfilePostsWorkflowBrightdata
-from src.functions.brightdata.get_linkedin_profile_reactions import get_linkedin_profile_reactions_brightdata
-from src.workflows.brightdata.get_linkedin_profile_reactions import GetLinkedinProfileReactionsWorkflowBrightdata
+from src.config import enabled_providers
+from src.metrics import instrument_functions, start_metrics_server
+from src.singleflight import single_flight_stats
+from src.supervisor import Supervisor
+from src.transport import close_http_client, open_http_client, pool_stats
+
+# Functions and workflows to register, as "module:name", per provider and, for
+# functions, per workload class (see src.client). Only the modules of the
+# providers enabled by ENABLED_PROVIDERS are imported, so a worker for a single
+# provider neither loads nor registers the others.
+SHARED = {
+    "workflows": [
+        "src.workflows.payloads:ResolvePayloadWorkflow",
+    ],
+    "functions": {
+        "interactive": [
+            "src.functions.cache:lookup_cached_result",
+            "src.functions.cache:store_cached_result",
+        ],
+        "downloads": [
+            "src.functions.payloads:resolve_payload",
+        ],
+    },
+}
+
+PROVIDERS = {
+    "linkedin": {
+        "workflows": [
+            "src.workflows.linkedin.create_post:CreatePostOnLinkedinWorkflow",
+            "src.workflows.linkedin.publish_posts:PublishPostsOnLinkedinWorkflow",
+        ],
+        "functions": {
+            "interactive": [
+                "src.functions.linkedin.create_post:create_post_on_linkedin",
+            ],
+            # Posts with media, whose uploads can take many minutes
+            "uploads": [
+                "src.functions.linkedin.create_post:create_post_on_linkedin",
+            ],
+        },
+    },
+    "phantombuster": {
+        "workflows": [
+            "src.workflows.phantombuster.get_linkedin_profile:GetLinkedinProfileWorkflowPhantombuster",
+            "src.workflows.phantombuster.get_linkedin_profile_posts:GetLinkedinProfilePostsWorkflowPhantombuster",
+            "src.workflows.phantombuster.get_linkedin_profile_reactions:GetLinkedinProfileReactionsWorkflowPhantombuster",
+            "src.workflows.phantombuster.save_linkedin_lead:SaveLinkedinLeadWorkflowPhantombuster",
+        ],
+        "functions": {
+            "triggers": [
+                "src.functions.phantombuster.get_linkedin_profile:launch_linkedin_profile_phantombuster",
+                "src.functions.phantombuster.get_linkedin_profile_posts:launch_linkedin_profile_posts_phantombuster",
+                "src.functions.phantombuster.get_linkedin_profile_reactions:launch_linkedin_profile_reactions_phantombuster",
+                "src.functions.phantombuster.save_linkedin_lead:save_linkedin_lead_phantombuster",
+            ],
+            "supervision": [
+                "src.functions.phantombuster.containers:fetch_phantombuster_container",
+                # Legacy functions that launch and poll a container in one run
+                "src.functions.phantombuster.get_linkedin_profile:get_linkedin_profile_phantombuster",
+                "src.functions.phantombuster.get_linkedin_profile_posts:get_linkedin_profile_posts_phantombuster",
+                "src.functions.phantombuster.get_linkedin_profile_reactions:get_linkedin_profile_reactions_phantombuster",
+            ],
+            "downloads": [
+                "src.functions.phantombuster.results:collect_phantombuster_results",
+            ],
+        },
+    },
+    "brightdata": {
+        "workflows": [
+            "src.workflows.brightdata.get_linkedin_profile:GetLinkedinProfileWorkflowBrightdata",
+            "src.workflows.brightdata.batch_get_linkedin_profiles:BatchGetLinkedinProfilesWorkflowBrightdata",
+            "src.workflows.brightdata.get_linkedin_profile_posts:GetLinkedinProfilePostsWorkflowBrightdata",
+            "src.workflows.brightdata.get_linkedin_profile_reactions:GetLinkedinProfileReactionsWorkflowBrightdata",
+        ],
+        "functions": {
+            "interactive": [
+                "src.functions.brightdata.poll_snapshot:plan_snapshot_poll",
+                "src.functions.brightdata.poll_snapshot:get_snapshot_polling_stats",
+                "src.functions.brightdata.get_linkedin_profile_posts:get_posts_sync_start",
+            ],
+            "triggers": [
+                "src.functions.brightdata.get_linkedin_profile:trigger_linkedin_profile_scrape",
+                "src.functions.brightdata.get_linkedin_profile:trigger_linkedin_profiles_scrape",
+                "src.functions.brightdata.get_linkedin_profile_posts:trigger_linkedin_profile_posts_scrape",
+                "src.functions.brightdata.get_linkedin_profile_reactions:trigger_linkedin_post_reactions_scrape",
+                "src.functions.brightdata.get_linkedin_profile:release_brightdata_snapshot",
+            ],
+            "supervision": [
+                "src.functions.brightdata.get_linkedin_profile:check_brightdata_notification",
+                "src.functions.brightdata.poll_snapshot:check_brightdata_snapshot",
+                # Legacy functions that trigger, poll and download in one run
+                "src.functions.brightdata.get_linkedin_profile:get_linkedin_profile_brightdata",
+                "src.functions.brightdata.get_linkedin_profile_posts:get_linkedin_profile_posts_brightdata",
+            ],
+            "downloads": [
+                "src.functions.brightdata.get_linkedin_profile:download_brightdata_snapshot",
+                "src.functions.brightdata.get_linkedin_profile:download_brightdata_profiles_snapshot",
+                "src.functions.brightdata.get_linkedin_profile:combine_brightdata_profile_batches",
+                "src.functions.brightdata.get_linkedin_profile:spool_brightdata_snapshot",
+                "src.functions.brightdata.get_linkedin_profile:read_brightdata_snapshot_page",
+                "src.functions.brightdata.get_linkedin_profile:offload_brightdata_snapshot",
+                "src.functions.brightdata.get_linkedin_profile_posts:merge_brightdata_posts",
+                "src.functions.brightdata.get_linkedin_profile_reactions:list_brightdata_snapshot_post_urls",
+                "src.functions.brightdata.get_linkedin_profile_reactions:combine_brightdata_snapshots",
+            ],
+        },
+    },
+}
+
+# The provider router runs both profile providers' workflows as children, so it
+# is only registered when both are enabled
+ROUTER_PROVIDERS = {"brightdata", "phantombuster"}
+ROUTER = {
+    "workflows": [
+        "src.workflows.get_linkedin_profile:GetLinkedinProfileWorkflow",
+    ],
+    "functions": {
+        "interactive": [
+            "src.functions.routing:plan_provider_route",
+            "src.functions.routing:record_provider_outcome",
+        ],
+    },
+}
+
+# Task queue and default concurrency cap of workflows and of each workload
+# class. A cap can be changed with QUEUE_CONCURRENCY_<CLASS>, e.g.
+# QUEUE_CONCURRENCY_DOWNLOADS=4. Downloads hold whole snapshots in flight and
+# get few slots; supervision runs short progress and notification checks and
+# gets many. Uploads stream media files to LinkedIn for minutes at a time and
+# get few slots too.
+QUEUES = {
+    "workflows": (TASK_QUEUE, 3000),
+    "interactive": (INTERACTIVE_QUEUE, 100),
+    "triggers": (TRIGGER_QUEUE, 50),
+    "supervision": (SUPERVISION_QUEUE, 500),
+    "downloads": (DOWNLOAD_QUEUE, 10),
+    "uploads": (UPLOAD_QUEUE, 4),
+}
+
+
+def queue_concurrency(workload: str) -> int:
+    _, default = QUEUES[workload]
+    return int(os.environ.get(f"QUEUE_CONCURRENCY_{workload.upper()}", str(default)))
+
 
-# Import phantombuster functions and workflows
-from src.functions.phantombuster.get_linkedin_profile import get_linkedin_profile_phantombuster
-from src.workflows.phantombuster.get_linkedin_profile import GetLinkedinProfileWorkflowPhantombuster
-from src.functions.phantombuster.get_linkedin_profile_posts import get_linkedin_profile_posts_phantombuster
-from src.workflows.phantombuster.get_linkedin_profile_posts import GetLinkedinProfilePostsWorkflowPhantombuster
-from src.functions.phantombuster.get_linkedin_profile_reactions import get_linkedin_profile_reactions_phantombuster
-from src.workflows.phantombuster.get_linkedin_profile_reactions import GetLinkedinProfileReactionsWorkflowPhantombuster
-from src.functions.phantombuster.save_linkedin_lead import save_linkedin_lead_phantombuster
-from src.workflows.phantombuster.save_linkedin_lead import SaveLinkedinLeadWorkflowPhantombuster
+def load(reference: str) -> Any:
+    module_name, _, name = reference.partition(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def registrations(providers: list[str]) -> tuple[list[Any], dict[str, list[Any]]]:
+    """Import the workflows, and the functions by workload class, of the shared modules and the given providers."""
+    groups = [SHARED, *(PROVIDERS[provider] for provider in providers)]
+    if ROUTER_PROVIDERS <= set(providers):
+        groups.append(ROUTER)
+    workflows = [load(reference) for group in groups for reference in group["workflows"]]
+    functions: dict[str, list[Any]] = {}
+    for group in groups:
+        for workload, references in group["functions"].items():
+            functions.setdefault(workload, []).extend(load(reference) for reference in references)
+    return workflows, functions
 
 
 async def main() -> None:
-    workflows = [
-        CreatePostOnLinkedinWorkflow,
-        # Phantombuster
-        GetLinkedinProfileWorkflowPhantombuster,
-        GetLinkedinProfilePostsWorkflowPhantombuster,
-        GetLinkedinProfileReactionsWorkflowPhantombuster,
-        SaveLinkedinLeadWorkflowPhantombuster,
-        # Brightdata
-        GetLinkedinProfileWorkflowBrightdata,
-        GetLinkedinProfilePostsWorkflowBrightdata,
-        GetLinkedinProfileReactionsWorkflowBrightdata,
-    ]
-    functions = [
-        create_post_on_linkedin,
-        # Phantombuster
-        get_linkedin_profile_phantombuster,
-        get_linkedin_profile_posts_phantombuster,
-        get_linkedin_profile_reactions_phantombuster,
-        save_linkedin_lead_phantombuster,
-        # Brightdata
-        get_linkedin_profile_brightdata,
-        trigger_linkedin_profile_scrape,
-        download_brightdata_snapshot,
-        get_linkedin_profile_posts_brightdata,
-        trigger_linkedin_profile_posts_scrape,
-        get_linkedin_profile_reactions_brightdata,
-    ]
-
-    await client.start_service(
+    providers = enabled_providers()
+    workflows, functions = registrations(providers)
+    logging.info(
+        "Registering %d workflow(s) and %d function(s) for %s",
+        len(workflows),
+        sum(map(len, functions.values())),
+        ", ".join(providers),
+    )
+
+    # Time and count every function run for the metrics endpoint
+    functions = {workload: instrument_functions(registered) for workload, registered in functions.items()}
+
+    # One pooled HTTP transport for the whole worker, shared by all functions
+    open_http_client()
+    # Receiver for Bright Data completion callbacks, when configured
+    receiver = None
+    if "brightdata" in providers:
+        from src.functions.brightdata.notifications import start_notification_receiver
+
+        receiver = await start_notification_receiver()
+    metrics_server = await start_metrics_server()
+    stats_task = None
+    stats_interval = float(os.environ.get("HTTP_POOL_STATS_INTERVAL", "0"))
+    if stats_interval > 0:
+        stats_task = asyncio.create_task(log_pool_stats(stats_interval))
+    try:
+        await serve(workflows, functions)
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+        if receiver is not None:
+            receiver.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        logging.info("HTTP pool stats at shutdown: %s", pool_stats())
+        logging.info("Single-flight stats at shutdown: %s", single_flight_stats())
+        await close_http_client()
+
+
+def drain_timeout() -> float:
+    return float(os.environ.get("SERVICES_DRAIN_TIMEOUT", "60"))
+
+
+async def create_worker(workload: str, workflows: list[Any], functions: list[Any]) -> Worker:
+    """A worker for one task queue, capped at the workload's concurrency and drained on shutdown."""
+    task_queue, _ = QUEUES[workload]
+    concurrency = queue_concurrency(workload)
+    if workload == "workflows":
+        options = ServiceOptions(max_concurrent_workflow_runs=concurrency)
+    else:
+        options = ServiceOptions(max_concurrent_function_runs=concurrency, endpoints=False)
+    service = await client.create_service(
         agents=[],
         workflows=workflows,
         functions=functions,
-        task_queue=TASK_QUEUE,
+        task_queue=task_queue,
+        options=options,
     )
+    logging.info("Serving %s on %s, at most %d at a time", workload, task_queue, concurrency)
+    return Worker(**{**service.config(), "graceful_shutdown_timeout": timedelta(seconds=drain_timeout())})
+
+
+async def serve(workflows: list[Any], functions: dict[str, list[Any]]) -> None:
+    """Run a worker per task queue until SIGTERM or SIGINT, then drain them.
+
+    Draining stops polling for new tasks and gives running functions up to
+    SERVICES_DRAIN_TIMEOUT seconds to finish before they are cancelled.
+    """
+    workers = [await create_worker("workflows", workflows, [])]
+    for workload in QUEUES:
+        if functions.get(workload):
+            workers.append(await create_worker(workload, [], functions[workload]))
+
+    loop = asyncio.get_running_loop()
+    shutdown: list[asyncio.Task] = []
+
+    def drain() -> None:
+        if not shutdown:
+            logging.info("Draining: no new tasks, waiting up to %.0fs for running functions", drain_timeout())
+            shutdown.extend(asyncio.create_task(worker.shutdown()) for worker in workers)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, drain)
+    try:
+        await asyncio.gather(*(worker.run() for worker in workers))
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+
+
+async def log_pool_stats(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        logging.info("HTTP pool stats: %s", pool_stats())
+        logging.info("Single-flight stats: %s", single_flight_stats())
 
 # demo purposes
 
+def run_worker(index: int) -> None:
+    """Run one worker process of a multi-process service (see src.supervisor)."""
+    logging.basicConfig(level=logging.INFO, format=f"[worker {index}] %(levelname)s %(message)s")
+    os.environ["WORKER_INDEX"] = str(index)
+    # Each process serves its own metrics, on consecutive ports
+    metrics_port = os.environ.get("METRICS_PORT")
+    if metrics_port:
+        os.environ["METRICS_PORT"] = str(int(metrics_port) + index)
+    # Only one process can listen on the Bright Data notification port. It
+    # records notifications in the shared store, where every process's
+    # workflows see them
+    if index > 0:
+        os.environ.pop("BRIGHT_DATA_NOTIFY_PORT", None)
+    asyncio.run(main())
+
+
 def run_services() -> None:
+    parser = argparse.ArgumentParser(description="Run the LinkedIn MCP worker")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("SERVICES_WORKERS", "1")),
+        help="Worker processes to run under a supervisor (default: SERVICES_WORKERS or 1)",
+    )
+    args, _ = parser.parse_known_args()
+
+    if args.workers > 1:
+        logging.basicConfig(level=logging.INFO)
+        Supervisor(args.workers, run_worker, drain_timeout()).run()
+        return
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -81,6 +319,10 @@ def run_services() -> None:
 
 
 def watch_services() -> None:
+    import webbrowser
+
+    from watchfiles import run_process
+
     watch_path = Path.cwd()
     logging.info("Watching %s and its subdirectories for changes...", watch_path)
     webbrowser.open("http://localhost:5233")
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.polling import get_readiness_stats
+
+# In-flight request coalescing. While a scrape for a key (provider, entity and
+# canonical profile URL) is pending, later callers attach to the existing job
+# (Bright Data snapshot_id or Phantombuster containerId) instead of starting a
+# new one. Coalescing is per worker process, while a job may be collected and
+# released by another process, so a job is only joined while it is younger than
+# the learned time-to-ready of its dataset; an older one has most likely
+# finished already.
+
+DEFAULT_JOIN_WINDOW = 600
+
+
+class SingleFlight:
+    """Tracks pending provider jobs by key and counts coalesced (hit) vs new (miss) starts."""
+
+    def __init__(self, name: str, ttl: float) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._jobs: dict[str, tuple[str, float]] = {}
+        self._keys: dict[str, str] = {}
+        self._started_at: dict[str, float] = {}
+        self._starting: dict[str, asyncio.Future] = {}
+
+    def current(self, key: str, max_join_age: float | None = None) -> str | None:
+        """Return the pending job ID for a key, if any, not expired and started within max_join_age seconds."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        job_id, started_at = job
+        age = time.monotonic() - started_at
+        if age > self.ttl:
+            self.release(job_id)
+            return None
+        if max_join_age is not None and age > max_join_age:
+            return None
+        return job_id
+
+    async def run(
+        self,
+        key: str,
+        start: Callable[[], Awaitable[str | None]],
+        max_join_age: float | None = None,
+    ) -> tuple[str | None, bool]:
+        """Attach to the pending job for ``key`` or call ``start`` to create one.
+
+        ``start`` returns the new job ID (or None when the provider answered
+        synchronously and there is nothing to attach to). A pending job started
+        more than ``max_join_age`` seconds ago is not joined, and is replaced by
+        the new one. Returns ``(job_id, coalesced)``.
+        """
+        job_id = self.current(key, max_join_age)
+        if job_id is None and key in self._starting:
+            # Another caller is starting this job right now, wait for its ID
+            job_id = await asyncio.shield(self._starting[key])
+        if job_id is not None:
+            self.hits += 1
+            return job_id, True
+
+        self.misses += 1
+        starting = asyncio.get_running_loop().create_future()
+        self._starting[key] = starting
+        try:
+            job_id = await start()
+        finally:
+            self._starting.pop(key, None)
+            # On failure waiters get None and start their own job
+            starting.set_result(job_id)
+        if job_id is not None:
+            previous = self._jobs.get(key)
+            if previous is not None:
+                self.release(previous[0])
+            self._jobs[key] = (job_id, time.monotonic())
+            self._keys[job_id] = key
+            self._started_at[job_id] = time.time()
+        return job_id, False
+
+    def release(self, job_id: str) -> None:
+        """Forget a job once it finished so new callers start a fresh one."""
+        self._started_at.pop(job_id, None)
+        key = self._keys.pop(job_id, None)
+        if key is not None and self._jobs.get(key, ("",))[0] == job_id:
+            del self._jobs[key]
+
+    def started_at(self, job_id: str) -> float | None:
+        """Wall-clock time the pending job was started, for coalesced callers."""
+        return self._started_at.get(job_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._jobs),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def join_window(dataset: str, max_age: int | None = None, batch_size: int = 1) -> float:
+    """Seconds after its start during which a pending job for dataset may be joined.
+
+    ``max_age=0`` asks for a fresh scrape, so only a job starting right now is
+    joined. Otherwise this is the learned p99 time-to-ready, or
+    SINGLE_FLIGHT_JOIN_WINDOW until enough jobs have been observed.
+    """
+    if max_age == 0:
+        return 0.0
+    expected = get_readiness_stats().expected_time_to_ready(dataset, batch_size)
+    if expected is None:
+        return float(os.environ.get("SINGLE_FLIGHT_JOIN_WINDOW", DEFAULT_JOIN_WINDOW))
+    return expected
+
+
+_flights: dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the worker-wide coalescing registry for a provider."""
+    if name not in _flights:
+        _flights[name] = SingleFlight(name, float(os.environ.get("SINGLE_FLIGHT_TTL", "1800")))
+    return _flights[name]
+
+
+def single_flight_stats() -> list[dict[str, Any]]:
+    return [flight.stats() for flight in _flights.values()]
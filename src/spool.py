@@ -0,0 +1,263 @@
+import codecs
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+from src.metrics import PAYLOAD_BYTES
+from src.models import encode
+
+# Local spool of downloaded snapshots. Snapshots are streamed to disk as NDJSON
+# (one record per line) and read back in pages addressed by byte offset, so a
+# worker never holds a whole snapshot in memory and no single step result is
+# larger than one page. Each snapshot file has a small .info sidecar with its
+# record count and size, written when it is spooled, so reading a page never
+# needs a pass over the whole file. Files are written under a .partial name
+# and renamed into place; partial files left behind by a crashed worker are
+# pruned once they are older than any download step could run.
+
+DEFAULT_SPOOL_DIR = Path.home() / ".cache" / "linkedin_mcp" / "spool"
+DEFAULT_SPOOL_TTL = 24 * 3600
+PRUNE_INTERVAL = 600
+# Well beyond the longest download step timeout (30 minutes)
+PARTIAL_TTL = 2 * 3600
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+_JSON_READ_SIZE = 64 * 1024
+
+
+def json_array_items(f: IO[bytes]) -> Iterator[Any]:
+    """Yield the elements of the JSON array in a binary file one at a time.
+
+    Only the element being decoded is held in memory, never the whole array.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    def read_more() -> bool:
+        nonlocal buffer, position, eof
+        # Read at least as much as is buffered, so a large element costs linear time
+        chunk = f.read(max(_JSON_READ_SIZE, len(buffer) - position))
+        eof = not chunk
+        buffer = buffer[position:] + text.decode(chunk, final=eof)
+        position = 0
+        return not eof
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position == len(buffer):
+            if not read_more():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Not a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if read_more():
+                continue
+            raise
+        # A number may continue past the end of the buffer
+        if end == len(buffer) and not eof and read_more():
+            continue
+        position = end
+        yield item
+
+
+class SnapshotSpool:
+    """Directory of NDJSON snapshot files, pruned after ttl seconds."""
+
+    def __init__(self, directory: str | Path, ttl: int) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pruned_at = 0.0
+
+    def path(self, snapshot_id: str) -> Path:
+        return self.directory / f"{_UNSAFE.sub('_', snapshot_id)}.ndjson"
+
+    def info_path(self, snapshot_id: str) -> Path:
+        return self.path(snapshot_id).with_suffix(".info")
+
+    def partial_path(self, path: Path) -> Path:
+        # Unique per writer, so concurrent spools of one snapshot never share a file
+        return path.with_suffix(f".{uuid.uuid4().hex}.partial")
+
+    def exists(self, snapshot_id: str) -> bool:
+        return self.path(snapshot_id).exists()
+
+    def info(self, snapshot_id: str) -> dict[str, Any]:
+        """Record count and size of a spooled snapshot, from its sidecar."""
+        try:
+            return json.loads(self.info_path(snapshot_id).read_bytes())
+        except FileNotFoundError:
+            # Spooled before sidecars existed: count once and remember
+            info = self._count(snapshot_id, self.path(snapshot_id))
+            self._write_info(snapshot_id, info)
+            return info
+
+    def _count(self, snapshot_id: str, path: Path) -> dict[str, Any]:
+        with path.open("rb") as f:
+            records = sum(1 for line in f if line.strip())
+        return {"snapshot_id": snapshot_id, "records": records, "bytes": path.stat().st_size}
+
+    def _write_info(self, snapshot_id: str, info: dict[str, Any]) -> None:
+        info_path = self.info_path(snapshot_id)
+        partial = self.partial_path(info_path)
+        try:
+            partial.write_bytes(json.dumps(info).encode())
+            partial.replace(info_path)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def _publish(self, snapshot_id: str, partial: Path) -> dict[str, Any]:
+        """Count the complete partial file's records, then move it and its sidecar into place."""
+        info = self._count(snapshot_id, partial)
+        self._write_info(snapshot_id, info)
+        partial.replace(self.path(snapshot_id))
+        PAYLOAD_BYTES.observe(info["bytes"], destination="spool")
+        return info
+
+    async def write(self, snapshot_id: str, chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+        """Stream chunks to the spool file, replacing it atomically once complete."""
+        self.prune()
+        partial = self.partial_path(self.path(snapshot_id))
+        first_byte = b""
+        last_byte = b"\n"
+        try:
+            with partial.open("wb") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if not first_byte:
+                        first_byte = chunk.lstrip()[:1]
+                    f.write(chunk)
+                    last_byte = chunk[-1:]
+                if last_byte != b"\n":
+                    f.write(b"\n")
+            if first_byte == b"[":
+                # Bright Data ignored the NDJSON format: convert the JSON array once
+                logging.warning("Snapshot %s was returned as a JSON array, converting to NDJSON", snapshot_id)
+                converted = self.partial_path(partial)
+                try:
+                    with partial.open("rb") as f, converted.open("wb") as out:
+                        for record in json_array_items(f):
+                            out.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+                    converted.replace(partial)
+                finally:
+                    converted.unlink(missing_ok=True)
+            return self._publish(snapshot_id, partial)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def write_records(self, snapshot_id: str, records: Iterable[Any]) -> dict[str, Any]:
+        """Write already parsed records (dicts or models) to the spool file, replacing it atomically once complete."""
+        self.prune()
+        partial = self.partial_path(self.path(snapshot_id))
+        try:
+            with partial.open("wb") as f:
+                for record in records:
+                    f.write(encode(record) + b"\n")
+            return self._publish(snapshot_id, partial)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def read_page(self, snapshot_id: str, cursor: int, limit: int) -> tuple[list[Any], int | None]:
+        """Read up to limit records starting at byte offset cursor.
+
+        Returns the records and the cursor of the next page, or None at the end.
+        """
+        records = []
+        with self.path(snapshot_id).open("rb") as f:
+            f.seek(cursor)
+            while len(records) < limit:
+                line = f.readline()
+                if not line:
+                    return records, None
+                if line.strip():
+                    records.append(json.loads(line))
+            next_cursor = f.tell()
+            return records, next_cursor if f.readline() else None
+
+    def iter_records(self, snapshot_id: str, chunk_size: int = 500) -> Iterator[list[Any]]:
+        """Yield the snapshot's records in lists of at most chunk_size."""
+        cursor: int | None = 0
+        while cursor is not None:
+            records, cursor = self.read_page(snapshot_id, cursor, chunk_size)
+            if records:
+                yield records
+
+    def iter_json_array(
+        self, *snapshot_ids: str, transform: Callable[[bytes], bytes] | None = None
+    ) -> Iterator[bytes]:
+        """Yield the snapshots' records as one JSON array, chunk by chunk.
+
+        Records are not parsed unless a transform is given, which maps each
+        record's JSON to the JSON to emit instead.
+        """
+        yield b"["
+        separator = b""
+        for snapshot_id in snapshot_ids:
+            with self.path(snapshot_id).open("rb") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield separator + (transform(line) if transform else line)
+                        separator = b","
+        yield b"]"
+
+    def delete(self, snapshot_id: str) -> None:
+        self.path(snapshot_id).unlink(missing_ok=True)
+        self.info_path(snapshot_id).unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        now = time.time()
+        if now - self._pruned_at < min(PRUNE_INTERVAL, self.ttl):
+            return
+        self._pruned_at = now
+        cutoff = now - self.ttl
+        for path in self.directory.glob("*.ndjson"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    path.with_suffix(".info").unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+        # Left behind by writers that never finished
+        partial_cutoff = now - PARTIAL_TTL
+        for path in self.directory.glob("*.partial"):
+            try:
+                if path.stat().st_mtime < partial_cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+_spool: SnapshotSpool | None = None
+
+
+def get_spool() -> SnapshotSpool:
+    """Return the worker's snapshot spool, created once on first use."""
+    global _spool
+    if _spool is None:
+        _spool = SnapshotSpool(
+            os.environ.get("SPOOL_DIR") or DEFAULT_SPOOL_DIR,
+            int(os.environ.get("SPOOL_TTL", DEFAULT_SPOOL_TTL)),
+        )
+    return _spool
@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+
+# Supervisor for running several worker processes on one host, so CPU-bound
+# work (JSON decoding of large snapshots, pydantic validation) uses every
+# core instead of competing for one event loop. Each worker is a separate
+# interpreter, started with spawn, that runs its own service on the task queue
+# and gets its index in WORKER_INDEX. A worker that exits while the supervisor
+# is not stopping is restarted, after a pause that doubles while it keeps
+# crashing soon after starting. SIGTERM or SIGINT is passed on to every worker
+# so it can drain, and a worker that has not exited after the drain timeout
+# (plus a grace period) is killed.
+
+MIN_RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 60.0
+# A worker that ran at least this long before exiting counts as healthy again
+HEALTHY_AFTER = 60.0
+KILL_GRACE = 10.0
+
+
+@dataclass
+class WorkerProcess:
+    index: int
+    process: BaseProcess | None = None
+    started_at: float = 0.0
+    restart_at: float = 0.0
+    restart_delay: float = MIN_RESTART_DELAY
+    restarts: int = 0
+
+
+class Supervisor:
+    """Starts, restarts and stops worker processes running target(index)."""
+
+    def __init__(self, workers: int, target: Callable[[int], None], drain_timeout: float) -> None:
+        self.target = target
+        self.drain_timeout = drain_timeout
+        self.workers = [WorkerProcess(index) for index in range(workers)]
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = False
+
+    def start(self, worker: WorkerProcess) -> None:
+        worker.process = self._context.Process(
+            target=self.target, args=(worker.index,), name=f"worker-{worker.index}"
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        logging.info("Worker %d started (pid %d)", worker.index, worker.process.pid)
+
+    def check(self, worker: WorkerProcess) -> None:
+        """Restart a worker that exited, once its restart delay has passed."""
+        now = time.monotonic()
+        if worker.process is not None and worker.process.is_alive():
+            return
+        if worker.process is not None:
+            exitcode = worker.process.exitcode
+            worker.process.close()
+            worker.process = None
+            if now - worker.started_at >= HEALTHY_AFTER:
+                worker.restart_delay = MIN_RESTART_DELAY
+            worker.restart_at = now + worker.restart_delay
+            logging.warning(
+                "Worker %d exited with code %s, restarting in %.0fs", worker.index, exitcode, worker.restart_delay
+            )
+            worker.restart_delay = min(worker.restart_delay * 2, MAX_RESTART_DELAY)
+            return
+        if now >= worker.restart_at:
+            worker.restarts += 1
+            self.start(worker)
+
+    def stop(self, signum: int, frame: object) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logging.info("Received %s, draining %d worker(s)", signal.Signals(signum).name, len(self.workers))
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                os.kill(worker.process.pid, signal.SIGTERM)
+
+    def wait_for_exit(self) -> None:
+        deadline = time.monotonic() + self.drain_timeout + KILL_GRACE
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logging.warning("Worker %d did not drain in time, killing it", worker.index)
+                worker.process.kill()
+                worker.process.join()
+            logging.info("Worker %d stopped with code %s", worker.index, worker.process.exitcode)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logging.info("Supervisor (pid %d) starting %d worker(s)", os.getpid(), len(self.workers))
+        for worker in self.workers:
+            self.start(worker)
+        while not self._stopping:
+            time.sleep(1.0)
+            if not self._stopping:
+                for worker in self.workers:
+                    self.check(worker)
+        self.wait_for_exit()
+        restarts = {worker.index: worker.restarts for worker in self.workers if worker.restarts}
+        logging.info("All workers stopped%s", f", restarts: {restarts}" if restarts else "")
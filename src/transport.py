@@ -0,0 +1,145 @@
+import logging
+import os
+from typing import Any
+
+import httpx
+
+from src.ratelimit import RateLimitedTransport, get_rate_limiter, rate_limit_max_wait
+
+# Process-wide pooled HTTP transport shared by every provider function.
+# It is opened once when the worker starts (see src/services.py) and closed on
+# shutdown, so Phantombuster polls, Bright Data calls and LinkedIn posts reuse
+# keep-alive connections instead of paying DNS + TCP + TLS on every request.
+
+_client: httpx.AsyncClient | None = None
+_transport: RateLimitedTransport | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_limits() -> httpx.Limits:
+    """Connection pool limits, configurable through the environment."""
+    return httpx.Limits(
+        max_connections=_env_int("HTTP_MAX_CONNECTIONS", 200),
+        max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 50),
+        keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+
+
+def _http2_enabled() -> bool:
+    if not _env_bool("HTTP_HTTP2", False):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("HTTP_HTTP2 is set but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """Create the shared client. Called once when the worker starts."""
+    global _client, _transport
+    if _client is None or _client.is_closed:
+        transport = httpx.AsyncHTTPTransport(limits=pool_limits(), http2=_http2_enabled())
+        # Requests tagged with rate_limited() wait for their provider's quota
+        _transport = RateLimitedTransport(transport, get_rate_limiter(), rate_limit_max_wait())
+        _client = httpx.AsyncClient(
+            transport=_transport,
+            timeout=httpx.Timeout(
+                _env_float("HTTP_TIMEOUT", 30.0),
+                connect=_env_float("HTTP_CONNECT_TIMEOUT", 10.0),
+                pool=_env_float("HTTP_POOL_TIMEOUT", 30.0),
+            ),
+        )
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, opening it lazily if the worker did not."""
+    if _client is None or _client.is_closed:
+        return open_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and all pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def pool_stats() -> dict[str, Any]:
+    """Snapshot of the connection pool, grouped by host, for capacity planning.
+
+    Request counts are tracked by the transport. Connections are read from
+    httpcore's pool, whose internals are not a public API: when they cannot
+    be read, only the request counts are reported and connection counts are None.
+    """
+    limits = pool_limits()
+    stats: dict[str, Any] = {
+        "open": _client is not None and not _client.is_closed,
+        "max_connections": limits.max_connections,
+        "max_keepalive_connections": limits.max_keepalive_connections,
+        "connections": 0,
+        "idle": 0,
+        "active": 0,
+        "http2": 0,
+        "in_flight_requests": 0,
+        "queued_requests": 0,
+        "hosts": {},
+    }
+    if not stats["open"] or _transport is None:
+        return stats
+
+    stats["in_flight_requests"] = sum(_transport.in_flight.values())
+    for host, in_flight in _transport.in_flight.items():
+        stats["hosts"][host] = {"connections": 0, "idle": 0, "active": 0, "in_flight": in_flight}
+
+    pool = getattr(_transport.transport, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        stats.update(connections=None, idle=None, active=None, http2=None)
+        return stats
+    try:
+        for connection in connections:
+            origin = getattr(connection, "_origin", None)
+            host = origin.host.decode() if origin is not None else "unknown"
+            host_stats = stats["hosts"].setdefault(host, {"connections": 0, "idle": 0, "active": 0, "in_flight": 0})
+            state = "idle" if connection.is_idle() else "active"
+            stats["connections"] += 1
+            stats[state] += 1
+            host_stats["connections"] += 1
+            host_stats[state] += 1
+            if "HTTP/2" in connection.info():
+                stats["http2"] += 1
+    except (AttributeError, TypeError) as e:
+        logging.debug("Cannot read HTTP connection pool internals: %s", e)
+        stats.update(connections=None, idle=None, active=None, http2=None)
+        for host_stats in stats["hosts"].values():
+            host_stats.update(connections=0, idle=0, active=0)
+        return stats
+
+    requests = getattr(pool, "_requests", None)
+    if requests is not None:
+        stats["queued_requests"] = sum(1 for request in requests if request.is_queued())
+    else:
+        # Without the pool's queue, requests beyond the busy connections are waiting for one
+        stats["queued_requests"] = max(0, stats["in_flight_requests"] - stats["active"])
+    return stats
@@ -0,0 +1,25 @@
+from urllib.parse import unquote, urlsplit
+
+
+def canonical_profile_url(url: str) -> str:
+    """Normalise a LinkedIn profile URL so the same profile always maps to one key.
+
+    ``https://uk.linkedin.com/in/WilliamHGates/recent-activity/all/?trk=x`` and
+    ``linkedin.com/in/williamhgates`` both become
+    ``https://www.linkedin.com/in/williamhgates``.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host == "linkedin.com" or host.endswith(".linkedin.com"):
+        host = "www.linkedin.com"
+
+    segments = [segment for segment in unquote(parts.path).split("/") if segment]
+    # Keep only the entity part (/in/<slug>, /company/<slug>), dropping
+    # sub-pages such as recent-activity/all or details/experience
+    if len(segments) >= 2 and segments[0] in ("in", "company", "school"):
+        segments = segments[:2]
+    path = "/".join(segment.lower() for segment in segments)
+    return f"https://{host}/{path}" if path else f"https://{host}"
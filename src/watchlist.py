@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from src.urls import canonical_profile_url
+
+# Registry of watched profiles for the refresh scheduler (src/schedule.py).
+# Each profile has a refresh interval and a priority. It is due once its last
+# refresh is older than its interval, and due profiles are refreshed most stale
+# first. Staleness is the time since the last refresh, in intervals, weighted
+# by 1 + priority. Profiles handed to a refresh are leased, so the next pass
+# does not pick them again. The lease ends when the refresh is recorded, or
+# when it expires if the scheduler stopped before recording it.
+
+DEFAULT_WATCHLIST_PATH = Path.home() / ".cache" / "linkedin_mcp" / "watchlist.sqlite3"
+
+# Failed refreshes are retried after this long, doubling per consecutive
+# failure but never later than the profile's interval
+RETRY_AFTER = 15 * 60
+
+
+class Watchlist:
+    """SQLite registry of watched profiles and their refresh state."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                profile TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                interval REAL NOT NULL,
+                added_at REAL NOT NULL,
+                refreshed_at REAL,
+                leased_until REAL,
+                failures INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )
+            """
+        )
+
+    def add(self, url: str, priority: int = 0, interval: float = 24 * 3600) -> None:
+        """Watch a profile, or update the priority and interval of one already watched."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO profiles (profile, url, priority, interval, added_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (profile) DO UPDATE SET priority = excluded.priority, interval = excluded.interval",
+                (canonical_profile_url(url), url, priority, interval, time.time()),
+            )
+
+    def remove(self, url: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM profiles WHERE profile = ?", (canonical_profile_url(url),))
+        return cursor.rowcount > 0
+
+    def lease_due(self, limit: int, lease: float) -> list[str]:
+        """Lease up to limit due profiles, most stale first, and return their URLs."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    """
+                    SELECT profile, url FROM profiles
+                    WHERE (refreshed_at IS NULL OR refreshed_at + interval <= :now)
+                      AND (leased_until IS NULL OR leased_until <= :now)
+                    ORDER BY (:now - COALESCE(refreshed_at, 0)) / interval * (1 + priority) DESC
+                    LIMIT :limit
+                    """,
+                    {"now": now, "limit": limit},
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE profiles SET leased_until = ? WHERE profile = ?",
+                    [(now + lease, profile) for profile, _ in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [url for _, url in rows]
+
+    def record(self, results: dict[str, dict[str, Any]]) -> None:
+        """Record refresh outcomes, keyed by URL as ``{"status": "success" | "error", "error"}``."""
+        now = time.time()
+        with self._lock:
+            for url, result in results.items():
+                profile = canonical_profile_url(url)
+                if result.get("status") == "success":
+                    self._db.execute(
+                        "UPDATE profiles SET refreshed_at = ?, leased_until = NULL, failures = 0, error = NULL"
+                        " WHERE profile = ?",
+                        (now, profile),
+                    )
+                else:
+                    self._db.execute(
+                        "UPDATE profiles SET failures = failures + 1, error = ?,"
+                        " leased_until = ? + MIN(interval, ? * (1 << MIN(failures, 16)))"
+                        " WHERE profile = ?",
+                        (str(result.get("error")), now, RETRY_AFTER, profile),
+                    )
+
+    def release(self, urls: list[str]) -> None:
+        """End the lease of profiles whose refresh never ran, so they are due again right away."""
+        with self._lock:
+            self._db.executemany(
+                "UPDATE profiles SET leased_until = NULL WHERE profile = ?",
+                [(canonical_profile_url(url),) for url in urls],
+            )
+
+    def profiles(self) -> list[dict[str, Any]]:
+        """Every watched profile with its refresh state, most stale first."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                """
+                SELECT url, priority, interval, added_at, refreshed_at, leased_until, failures, error
+                FROM profiles
+                ORDER BY (? - COALESCE(refreshed_at, 0)) / interval * (1 + priority) DESC
+                """,
+                (now,),
+            )
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def stats(self) -> dict[str, int]:
+        now = time.time()
+        with self._lock:
+            watched, due, leased, failing = self._db.execute(
+                """
+                SELECT COUNT(*),
+                       COALESCE(SUM(refreshed_at IS NULL OR refreshed_at + interval <= :now), 0),
+                       COALESCE(SUM(leased_until > :now), 0),
+                       COALESCE(SUM(failures > 0), 0)
+                FROM profiles
+                """,
+                {"now": now},
+            ).fetchone()
+        return {"watched": watched, "due": due, "leased": leased, "failing": failing}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_watchlist: Watchlist | None = None
+
+
+def get_watchlist() -> Watchlist:
+    """Return the scheduler's watchlist, opened once on first use."""
+    global _watchlist
+    if _watchlist is None:
+        _watchlist = Watchlist(os.environ.get("WATCHLIST_PATH") or DEFAULT_WATCHLIST_PATH)
+    return _watchlist
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    NonRetryableError,
+    import_functions,
+    log,
+    workflow,
+    RetryPolicy,
+)
+
+from src.client import DOWNLOAD_QUEUE, TRIGGER_QUEUE
+from src.workflows.brightdata.snapshot import wait_for_snapshot
+
+with import_functions():
+    from src.functions.brightdata.get_linkedin_profile import (
+        GetProfilesInput,
+        ProfileBatchesInput,
+        ProfilesSnapshotInput,
+        combine_brightdata_profile_batches,
+        download_brightdata_profiles_snapshot,
+        trigger_linkedin_profiles_scrape,
+    )
+
+
+@workflow.defn(description="Get many LinkedIn profiles using batched Bright Data snapshots")
+class BatchGetLinkedinProfilesWorkflowBrightdata:
+    @workflow.run
+    async def run(self, workflow_input: GetProfilesInput) -> dict[str, Any]:
+        log.info("BatchGetLinkedinProfilesWorkflowBrightdata started")
+        try:
+            # De-duplicate while keeping the caller's order, then chunk
+            profile_urls = list(dict.fromkeys(workflow_input.profile_urls))
+            batch_size = workflow_input.batch_size
+            chunks = [profile_urls[i : i + batch_size] for i in range(0, len(profile_urls), batch_size)]
+            log.info(f"Scraping {len(profile_urls)} profile(s) in {len(chunks)} snapshot(s)")
+
+            # Step 1: Trigger one snapshot per chunk, all in parallel
+            triggers = await asyncio.gather(
+                *[
+                    workflow.step(
+                        function=trigger_linkedin_profiles_scrape,
+                        function_input=GetProfilesInput(profile_urls=chunk, batch_size=batch_size),
+                        start_to_close_timeout=timedelta(seconds=60),
+                        task_queue=TRIGGER_QUEUE,
+                    )
+                    for chunk in chunks
+                ],
+                return_exceptions=True,
+            )
+
+            pending = [
+                (chunk, trigger)
+                for chunk, trigger in zip(chunks, triggers)
+                if not isinstance(trigger, Exception)
+            ]
+            retry_policy = RetryPolicy(
+                initial_interval=timedelta(seconds=5),
+                maximum_attempts=5,
+                backoff_coefficient=2.0,
+            )
+
+            async def collect(chunk: list[str], trigger: dict[str, Any]) -> dict[str, Any]:
+                # Step 2: Wait for the completion notification, or poll progress on the learned schedule
+                await wait_for_snapshot(
+                    trigger,
+                    dataset="brightdata:profile",
+                    batch_size=len(chunk),
+                    notify_timeout=900,
+                    max_wait=3600,
+                )
+                # Step 3: Download the snapshot, demultiplex records by URL and cache each profile
+                # the way GetLinkedinProfileWorkflowBrightdata does, so single-profile lookups hit it
+                return await workflow.step(
+                    function=download_brightdata_profiles_snapshot,
+                    function_input=ProfilesSnapshotInput(
+                        snapshot_id=trigger["snapshot_id"],
+                        profile_urls=chunk,
+                        normalise=True,
+                        cache_kind="brightdata:profile",
+                    ),
+                    start_to_close_timeout=timedelta(minutes=10),
+                    retry_policy=retry_policy,
+                    task_queue=DOWNLOAD_QUEUE,
+                )
+
+            # Snapshots are collected in parallel, each as soon as it is ready
+            downloads = await asyncio.gather(
+                *[collect(chunk, trigger) for chunk, trigger in pending],
+                return_exceptions=True,
+            )
+
+            # A failed chunk marks its own URLs as failed without aborting the batch
+            statuses: dict[str, str] = {}
+            errors: dict[str, Any] = {}
+            batches: list[Any] = []
+            for chunk, trigger in zip(chunks, triggers):
+                if isinstance(trigger, Exception):
+                    for url in chunk:
+                        errors[url] = {"status": "error", "error": f"Trigger failed: {trigger}"}
+            for (chunk, trigger), download in zip(pending, downloads):
+                if isinstance(download, Exception):
+                    for url in chunk:
+                        errors[url] = {
+                            "status": "error",
+                            "snapshot_id": trigger["snapshot_id"],
+                            "error": f"Download failed: {download}",
+                        }
+                else:
+                    statuses.update(download["statuses"])
+                    batches.append(download["results"])
+            statuses.update({url: error["status"] for url, error in errors.items()})
+            failed = sum(1 for url in profile_urls if statuses.get(url, "error") == "error")
+
+            # Step 4: Merge the chunks in input order, offloaded when the batch is large
+            results = await workflow.step(
+                function=combine_brightdata_profile_batches,
+                function_input=ProfileBatchesInput(profile_urls=profile_urls, batches=batches, errors=errors),
+                start_to_close_timeout=timedelta(minutes=2),
+                retry_policy=retry_policy,
+                task_queue=DOWNLOAD_QUEUE,
+            )
+
+        except Exception as e:
+            error_message = f"Error during batch_get_linkedin_profiles_brightdata: {e}"
+            raise NonRetryableError(error_message) from e
+        else:
+            log.info(
+                "batch_get_linkedin_profiles_brightdata done",
+                succeeded=len(profile_urls) - failed,
+                failed=failed,
+            )
+            return {"results": results, "succeeded": len(profile_urls) - failed, "failed": failed}
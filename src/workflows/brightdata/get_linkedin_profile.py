@@ -9,7 +9,9 @@ from restack_ai.workflow import (
     RetryPolicy,
 )
 
-from src.client import TASK_QUEUE
+from src.client import DOWNLOAD_QUEUE, TRIGGER_QUEUE
+from src.workflows.brightdata.snapshot import wait_for_snapshot
+from src.workflows.cache import cache_envelope, lookup_cache, refresh_in_background
 
 with import_functions():
     from src.functions.brightdata.get_linkedin_profile import (
@@ -26,44 +28,71 @@ class GetLinkedinProfileWorkflowBrightdata:
     async def run(self, workflow_input: GetProfileInput) -> Any:
         log.info("GetLinkedinProfileWorkflowBrightdata started")
         try:
+            cached = await lookup_cache(
+                "brightdata:profile",
+                workflow_input.profile_url,
+                workflow_input.max_age,
+                workflow_input.stale_while_revalidate,
+                workflow_input.fields,
+            )
+            if cached["hit"]:
+                if not cached["fresh"]:
+                    log.info("Returning stale cached result, refreshing in the background")
+                    await refresh_in_background(
+                        GetLinkedinProfileWorkflowBrightdata,
+                        GetProfileInput(profile_url=workflow_input.profile_url, max_age=0),
+                    )
+                return cache_envelope(cached["data"], True, workflow_input.report_cached)
+
             # Step 1: Trigger the scrape and get snapshot_id
             trigger_result = await workflow.step(
                 function=trigger_linkedin_profile_scrape,
-                function_input=GetProfileInput(profile_url=workflow_input.profile_url),
+                function_input=GetProfileInput(profile_url=workflow_input.profile_url, max_age=workflow_input.max_age),
                 start_to_close_timeout=timedelta(seconds=30),
-                task_queue=TASK_QUEUE,
+                task_queue=TRIGGER_QUEUE,
             )
             
             # If we got data directly (shouldn't happen with sync=False, but handle it)
             if "snapshot_id" not in trigger_result:
                 log.info("Received synchronous response, returning directly")
-                return trigger_result
+                return cache_envelope(trigger_result, False, workflow_input.report_cached)
             
             snapshot_id = trigger_result["snapshot_id"]
             log.info(f"Scrape triggered, snapshot_id: {snapshot_id}")
             
-            # Step 2: Wait a bit for Bright Data to start processing
-            await workflow.sleep(10)
-            
-            # Step 3: Download the snapshot with retry policy
-            # Retry with exponential backoff: start at 10s, max 10 attempts, 2x backoff
+            # Step 2: Wait for the completion notification, or poll progress on the learned schedule
+            await wait_for_snapshot(
+                trigger_result,
+                dataset="brightdata:profile",
+                batch_size=1,
+                notify_timeout=300,
+                max_wait=1800,
+            )
+
+            # Step 3: Download the ready snapshot, retrying briefly in case it is still being finalised.
+            # The worker caches the full result; only the requested fields are returned
             retry_policy = RetryPolicy(
-                initial_interval=timedelta(seconds=10),
-                maximum_attempts=10,
+                initial_interval=timedelta(seconds=5),
+                maximum_attempts=5,
                 backoff_coefficient=2.0,
             )
-            
+
             result = await workflow.step(
                 function=download_brightdata_snapshot,
-                function_input=SnapshotIdInput(snapshot_id=snapshot_id),
+                function_input=SnapshotIdInput(
+                    snapshot_id=snapshot_id,
+                    kind="profile",
+                    fields=workflow_input.fields,
+                    cache_kind="brightdata:profile",
+                    profile_url=workflow_input.profile_url,
+                ),
                 start_to_close_timeout=timedelta(minutes=10),
                 retry_policy=retry_policy,
-                task_queue=TASK_QUEUE,
+                task_queue=DOWNLOAD_QUEUE,
             )
-            
         except Exception as e:
             error_message = f"Error during get_linkedin_profile_brightdata: {e}"
             raise NonRetryableError(error_message) from e
         else:
             log.info("get_linkedin_profile_brightdata done", result=result)
-            return result
+            return cache_envelope(result, False, workflow_input.report_cached)
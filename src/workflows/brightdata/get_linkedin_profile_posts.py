@@ -9,64 +9,154 @@ from restack_ai.workflow import (
     RetryPolicy,
 )
 
-from src.client import TASK_QUEUE
+from src.client import DOWNLOAD_QUEUE, INTERACTIVE_QUEUE, TRIGGER_QUEUE
+from src.workflows.brightdata.snapshot import wait_for_snapshot
+from src.workflows.cache import lookup_cache, refresh_in_background
 
 with import_functions():
     from src.functions.brightdata.get_linkedin_profile_posts import (
         GetProfilePostsInput,
+        PostsSyncInput,
+        get_posts_sync_start,
+        merge_brightdata_posts,
         trigger_linkedin_profile_posts_scrape,
     )
     from src.functions.brightdata.get_linkedin_profile import (
         SnapshotIdInput,
-        download_brightdata_snapshot,
+        offload_brightdata_snapshot,
+        spool_brightdata_snapshot,
     )
 
 
+# Retry briefly in case a ready snapshot is still being finalised
+SNAPSHOT_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=5),
+    maximum_attempts=5,
+    backoff_coefficient=2.0,
+)
+
+
 @workflow.defn(description="Get a LinkedIn profile's posts")
 class GetLinkedinProfilePostsWorkflowBrightdata:
     @workflow.run
     async def run(self, workflow_input: GetProfilePostsInput) -> Any:
         log.info("GetLinkedinProfilePostsWorkflowBrightdata started")
         try:
-            # Step 1: Trigger the scrape and get snapshot_id
-            trigger_result = await workflow.step(
-                function=trigger_linkedin_profile_posts_scrape,
-                function_input=GetProfilePostsInput(profile_url=workflow_input.profile_url),
-                start_to_close_timeout=timedelta(seconds=30),
-                task_queue=TASK_QUEUE,
+            if workflow_input.incremental:
+                return await self.sync(workflow_input)
+
+            cached = await lookup_cache(
+                "brightdata:posts",
+                workflow_input.profile_url,
+                workflow_input.max_age,
+                workflow_input.stale_while_revalidate,
+                workflow_input.fields,
             )
-            
-            # If we got data directly (shouldn't happen, but handle it)
-            if "snapshot_id" not in trigger_result:
+            if cached["hit"]:
+                if not cached["fresh"]:
+                    log.info("Returning stale cached result, refreshing in the background")
+                    await refresh_in_background(
+                        GetLinkedinProfilePostsWorkflowBrightdata,
+                        GetProfilePostsInput(profile_url=workflow_input.profile_url, max_age=0),
+                    )
+                return cached["data"]
+
+            # Steps 1-3: Discover the posts and stream the snapshot to disk
+            snapshot_id = await self.discover(workflow_input.profile_url, start_date=None, max_age=workflow_input.max_age)
+            if not isinstance(snapshot_id, str):
                 log.info("Received synchronous response, returning directly")
-                return trigger_result
-            
-            snapshot_id = trigger_result["snapshot_id"]
-            log.info(f"Posts scrape triggered, snapshot_id: {snapshot_id}")
-            
-            # Step 2: Wait a bit for Bright Data to start processing
-            # Posts typically take longer, so wait 60 seconds (like in your TypeScript example)
-            await workflow.sleep(60)
-            
-            # Step 3: Download the snapshot with retry policy
-            # Retry with exponential backoff: start at 1m, max 10 attempts, 2x backoff
-            retry_policy = RetryPolicy(
-                initial_interval=timedelta(minutes=1),
-                maximum_attempts=10,
-                backoff_coefficient=2.0,
-            )
-            
+                return snapshot_id
+
+            # Step 4: Return the normalised posts, or a payload reference when they are large.
+            # The worker caches the full result; only the requested fields are returned
             result = await workflow.step(
-                function=download_brightdata_snapshot,
-                function_input=SnapshotIdInput(snapshot_id=snapshot_id),
-                start_to_close_timeout=timedelta(minutes=30),
-                retry_policy=retry_policy,
-                task_queue=TASK_QUEUE,
+                function=offload_brightdata_snapshot,
+                function_input=SnapshotIdInput(
+                    snapshot_id=snapshot_id,
+                    kind="post",
+                    fields=workflow_input.fields,
+                    cache_kind="brightdata:posts",
+                    profile_url=workflow_input.profile_url,
+                ),
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=SNAPSHOT_RETRY_POLICY,
+                task_queue=DOWNLOAD_QUEUE,
             )
-            
         except Exception as e:
             error_message = f"Error during get_linkedin_profile_posts_brightdata: {e}"
             raise NonRetryableError(error_message) from e
         else:
             log.info("get_linkedin_profile_posts_brightdata done", result=result)
             return result
+
+    async def sync(self, workflow_input: GetProfilePostsInput) -> dict[str, Any]:
+        """Incremental run: discover posts since the profile's high-water mark and return the new ones."""
+        # Step 1: Read the high-water mark left by the previous sync
+        sync_start = await workflow.step(
+            function=get_posts_sync_start,
+            function_input=PostsSyncInput(profile_url=workflow_input.profile_url),
+            start_to_close_timeout=timedelta(seconds=30),
+            task_queue=INTERACTIVE_QUEUE,
+        )
+        start_date = sync_start["start_date"]
+        log.info(f"Syncing posts since {start_date}" if start_date else "First sync, discovering the full history")
+
+        # Steps 2-4: Discover posts from the mark on and stream the snapshot to disk
+        snapshot_id = await self.discover(workflow_input.profile_url, start_date=start_date)
+        if not isinstance(snapshot_id, str):
+            raise NonRetryableError(f"Bright Data returned no snapshot for an incremental sync: {snapshot_id}")
+
+        # Step 5: Store the posts not seen before, advance the mark and return only those
+        result = await workflow.step(
+            function=merge_brightdata_posts,
+            function_input=PostsSyncInput(
+                profile_url=workflow_input.profile_url,
+                snapshot_id=snapshot_id,
+                fields=workflow_input.fields,
+            ),
+            start_to_close_timeout=timedelta(minutes=10),
+            retry_policy=SNAPSHOT_RETRY_POLICY,
+            task_queue=DOWNLOAD_QUEUE,
+        )
+        result = {"incremental": True, "since": start_date, **result}
+        log.info("get_linkedin_profile_posts_brightdata done", result=result)
+        return result
+
+    async def discover(self, profile_url: str, start_date: str | None, max_age: int | None = None) -> Any:
+        """Trigger a posts discovery, wait for it and spool it.
+
+        Returns the snapshot ID, or Bright Data's response when it answered
+        synchronously without one.
+        """
+        trigger_result = await workflow.step(
+            function=trigger_linkedin_profile_posts_scrape,
+            function_input=GetProfilePostsInput(profile_url=profile_url, start_date=start_date, max_age=max_age),
+            start_to_close_timeout=timedelta(seconds=30),
+            task_queue=TRIGGER_QUEUE,
+        )
+        if "snapshot_id" not in trigger_result:
+            return trigger_result
+
+        snapshot_id = trigger_result["snapshot_id"]
+        log.info(f"Posts scrape triggered, snapshot_id: {snapshot_id}")
+
+        # Wait for the completion notification, or poll progress on the learned schedule
+        # Posts typically take longer, so the first check defaults to 60 seconds until timings are learned
+        await wait_for_snapshot(
+            trigger_result,
+            dataset="brightdata:posts",
+            batch_size=1,
+            notify_timeout=1800,
+            max_wait=7200,
+        )
+
+        # Stream the ready snapshot to disk, retrying briefly in case it is still being finalised
+        spooled = await workflow.step(
+            function=spool_brightdata_snapshot,
+            function_input=SnapshotIdInput(snapshot_id=snapshot_id),
+            start_to_close_timeout=timedelta(minutes=30),
+            retry_policy=SNAPSHOT_RETRY_POLICY,
+            task_queue=DOWNLOAD_QUEUE,
+        )
+        log.info(f"Snapshot {snapshot_id} spooled with {spooled['records']} record(s)")
+        return snapshot_id
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import timedelta
 from typing import Any
 
@@ -5,35 +6,195 @@ from restack_ai.workflow import (
     NonRetryableError,
     import_functions,
     log,
+    temporal_workflow,
     workflow,
+    RetryPolicy,
 )
 
-from src.client import TASK_QUEUE
+from src.client import DOWNLOAD_QUEUE, TRIGGER_QUEUE
+from src.workflows.brightdata.snapshot import wait_for_snapshot
+from src.workflows.cache import lookup_cache, refresh_in_background, store_cache
 
 with import_functions():
+    from src.functions.brightdata.get_linkedin_profile_posts import (
+        GetProfilePostsInput,
+        trigger_linkedin_profile_posts_scrape,
+    )
+    from src.functions.brightdata.get_linkedin_profile import (
+        SnapshotIdInput,
+        offload_brightdata_snapshot,
+        spool_brightdata_snapshot,
+    )
     from src.functions.brightdata.get_linkedin_profile_reactions import (
         GetReactionsInput,
-        get_linkedin_profile_reactions_brightdata,
+        PostUrlsInput,
+        ReactionsBatchInput,
+        SnapshotIdsInput,
+        combine_brightdata_snapshots,
+        list_brightdata_snapshot_post_urls,
+        trigger_linkedin_post_reactions_scrape,
     )
 
+# Retry briefly in case a ready snapshot is still being finalised
+SNAPSHOT_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=5),
+    maximum_attempts=5,
+    backoff_coefficient=2.0,
+)
+
 
-@workflow.defn(description="Get a LinkedIn profile's reactions (Not Implemented)")
+@workflow.defn(description="Get the reactions on a LinkedIn profile's recent posts")
 class GetLinkedinProfileReactionsWorkflowBrightdata:
+    def __init__(self) -> None:
+        self._progress: dict[str, Any] = {"stage": "starting", "batches": []}
+
+    @temporal_workflow.query
+    def progress(self) -> dict[str, Any]:
+        """Batches finished so far with their reactions, available while the workflow is still running.
+
+        Each finished batch has its normalised reactions inline, or a payload
+        reference to them when large (see ResolvePayloadWorkflow).
+        """
+        return self._progress
+
     @workflow.run
     async def run(self, workflow_input: GetReactionsInput) -> Any:
         log.info("GetLinkedinProfileReactionsWorkflowBrightdata started")
         try:
-            # The function call will always raise an error in this version.
-            result = await workflow.step(
-                function=get_linkedin_profile_reactions_brightdata,
-                function_input=GetReactionsInput(profile_url=workflow_input.profile_url),
-                start_to_close_timeout=timedelta(seconds=60),
-                task_queue=TASK_QUEUE,
+            cached = await lookup_cache(
+                "brightdata:reactions",
+                workflow_input.profile_url,
+                workflow_input.max_age,
+                workflow_input.stale_while_revalidate,
+            )
+            if cached["hit"]:
+                if not cached["fresh"]:
+                    log.info("Returning stale cached result, refreshing in the background")
+                    await refresh_in_background(
+                        GetLinkedinProfileReactionsWorkflowBrightdata,
+                        workflow_input.model_copy(update={"max_age": 0, "stale_while_revalidate": False}),
+                    )
+                return cached["data"]
+
+            # Step 1: Discover the profile's posts, reusing a pending posts snapshot when there is one
+            self._progress["stage"] = "posts"
+            trigger_result = await workflow.step(
+                function=trigger_linkedin_profile_posts_scrape,
+                function_input=GetProfilePostsInput(profile_url=workflow_input.profile_url, max_age=workflow_input.max_age),
+                start_to_close_timeout=timedelta(seconds=30),
+                task_queue=TRIGGER_QUEUE,
+            )
+            posts_snapshot_id = trigger_result["snapshot_id"]
+            await wait_for_snapshot(
+                trigger_result,
+                dataset="brightdata:posts",
+                batch_size=1,
+                notify_timeout=1800,
+                max_wait=7200,
+            )
+
+            # Step 2: Read the post URLs from the spooled posts snapshot
+            posts = await workflow.step(
+                function=list_brightdata_snapshot_post_urls,
+                function_input=PostUrlsInput(snapshot_id=posts_snapshot_id, limit=workflow_input.max_posts),
+                start_to_close_timeout=timedelta(minutes=30),
+                retry_policy=SNAPSHOT_RETRY_POLICY,
+                task_queue=DOWNLOAD_QUEUE,
+            )
+            post_urls = posts["post_urls"]
+            batch_size = workflow_input.batch_size
+            batches = [post_urls[i : i + batch_size] for i in range(0, len(post_urls), batch_size)]
+            log.info(f"Collecting reactions on {len(post_urls)} post(s) in {len(batches)} batch(es)")
+            self._progress.update(stage="reactions", posts=len(post_urls), batches_total=len(batches))
+
+            # Step 3: Collect reactions batch by batch, at most max_concurrency at a
+            # time, starting the next batch as soon as any one finishes
+            snapshot_ids: list[str] = []
+            errors: list[str] = []
+            remaining = list(enumerate(batches))
+            running: dict[asyncio.Task, int] = {}
+            while remaining or running:
+                while remaining and len(running) < workflow_input.max_concurrency:
+                    index, batch = remaining.pop(0)
+                    running[asyncio.create_task(self.collect_batch(batch))] = index
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = running.pop(task)
+                    if task.exception() is not None:
+                        log.warning(f"Reactions batch {index} failed: {task.exception()}")
+                        errors.append(f"batch {index}: {task.exception()}")
+                        self._progress["batches"].append({"batch": index, "error": str(task.exception())})
+                        continue
+                    collected = task.result()
+                    snapshot_ids.append(collected["snapshot_id"])
+                    self._progress["batches"].append({"batch": index, **collected})
+                    log.info(f"Reactions batch {index} done with {collected['records']} record(s)")
+
+            if batches and not snapshot_ids:
+                raise NonRetryableError(f"Every reactions batch failed: {errors}")
+
+            # Step 4: Combine the batches into one list, or a payload reference when large
+            self._progress["stage"] = "combining"
+            reactions = await workflow.step(
+                function=combine_brightdata_snapshots,
+                function_input=SnapshotIdsInput(snapshot_ids=snapshot_ids, kind="reaction"),
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=SNAPSHOT_RETRY_POLICY,
+                task_queue=DOWNLOAD_QUEUE,
             )
+            result = {"posts": len(post_urls), "reactions": reactions, "errors": errors}
+
+            # A partial result is returned but not cached
+            if not errors:
+                await store_cache("brightdata:reactions", workflow_input.profile_url, result)
+            self._progress["stage"] = "done"
         except Exception as e:
-            # The error from the function is re-raised to be shown to the user.
             error_message = f"Error during get_linkedin_profile_reactions_brightdata: {e}"
             raise NonRetryableError(error_message) from e
         else:
             log.info("get_linkedin_profile_reactions_brightdata done", result=result)
             return result
+
+    async def collect_batch(self, post_urls: list[str]) -> dict[str, Any]:
+        """Trigger, wait for and spool the reactions snapshot of one batch of posts.
+
+        Returns ``{"snapshot_id", "records", "reactions"}``, where reactions are
+        the batch's normalised records, inline or as a payload reference (None
+        if they could not be read).
+        """
+        trigger_result = await workflow.step(
+            function=trigger_linkedin_post_reactions_scrape,
+            function_input=ReactionsBatchInput(post_urls=post_urls),
+            start_to_close_timeout=timedelta(seconds=30),
+            task_queue=TRIGGER_QUEUE,
+        )
+        await wait_for_snapshot(
+            trigger_result,
+            dataset="brightdata:reactions",
+            batch_size=len(post_urls),
+            notify_timeout=1800,
+            max_wait=7200,
+        )
+        snapshot_id = trigger_result["snapshot_id"]
+        spooled = await workflow.step(
+            function=spool_brightdata_snapshot,
+            function_input=SnapshotIdInput(snapshot_id=snapshot_id),
+            start_to_close_timeout=timedelta(minutes=30),
+            retry_policy=SNAPSHOT_RETRY_POLICY,
+            task_queue=DOWNLOAD_QUEUE,
+        )
+        # The batch's reactions, for the progress query while other batches
+        # still run. The final result combines the spooled snapshots instead,
+        # so a failure here only leaves them out of the query
+        try:
+            reactions = await workflow.step(
+                function=offload_brightdata_snapshot,
+                function_input=SnapshotIdInput(snapshot_id=snapshot_id, kind="reaction"),
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=SNAPSHOT_RETRY_POLICY,
+                task_queue=DOWNLOAD_QUEUE,
+            )
+        except Exception as e:
+            log.warning(f"Reading reactions snapshot {snapshot_id} for progress failed: {e}")
+            reactions = None
+        return {"snapshot_id": snapshot_id, "records": spooled["records"], "reactions": reactions}
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    NonRetryableError,
+    RetryPolicy,
+    import_functions,
+    log,
+    workflow,
+)
+
+from src.client import INTERACTIVE_QUEUE, SUPERVISION_QUEUE, TRIGGER_QUEUE
+
+# While waiting for a completion notification, the store is checked after
+# these many seconds, doubling up to the maximum
+NOTIFY_CHECK_INTERVAL = 5
+MAX_NOTIFY_CHECK_INTERVAL = 30
+
+with import_functions():
+    from src.functions.brightdata.get_linkedin_profile import (
+        SnapshotIdInput,
+        check_brightdata_notification,
+        release_brightdata_snapshot,
+    )
+    from src.functions.brightdata.poll_snapshot import (
+        SnapshotPollInput,
+        check_brightdata_snapshot,
+        plan_snapshot_poll,
+    )
+
+
+async def wait_for_snapshot(
+    trigger_result: dict[str, Any],
+    dataset: str,
+    batch_size: int,
+    notify_timeout: int,
+    max_wait: int,
+) -> None:
+    """Wait until a snapshot is ready to download.
+
+    When the trigger registered a completion callback, check for Bright Data's
+    notification, received by any worker on the host, for up to notify_timeout
+    seconds first. Otherwise, or if no notification arrives, check progress on
+    the schedule learned from past time-to-ready for this dataset and batch
+    size, giving up after max_wait seconds.
+    """
+    snapshot_id = trigger_result["snapshot_id"]
+    triggered_at = trigger_result["triggered_at"]
+    check_retry_policy = RetryPolicy(initial_interval=timedelta(seconds=5), maximum_attempts=3)
+    notified = False
+
+    if trigger_result.get("notify"):
+        # Short checks of the shared notification store with durable sleeps in
+        # between, so waiting holds no function slot on any worker
+        waited = 0
+        interval = NOTIFY_CHECK_INTERVAL
+        try:
+            while True:
+                notification = await workflow.step(
+                    function=check_brightdata_notification,
+                    function_input=SnapshotIdInput(snapshot_id=snapshot_id),
+                    start_to_close_timeout=timedelta(seconds=30),
+                    retry_policy=check_retry_policy,
+                    task_queue=SUPERVISION_QUEUE,
+                )
+                if notification["status"] != "pending":
+                    notified = True
+                    break
+                if waited >= notify_timeout:
+                    log.info("No completion notification received, falling back to polling")
+                    break
+                await workflow.sleep(interval)
+                waited += interval
+                interval = min(interval * 2, MAX_NOTIFY_CHECK_INTERVAL)
+        except Exception as e:
+            log.warning(f"Checking for a completion notification failed, falling back to polling: {e}")
+
+    poll_input = SnapshotPollInput(
+        snapshot_id=snapshot_id,
+        dataset=dataset,
+        batch_size=batch_size,
+        triggered_at=triggered_at,
+        # Notified snapshots record their exact time-to-ready on the first check
+        last_check_at=None if notified else triggered_at,
+        max_wait_seconds=max_wait,
+    )
+    if not notified:
+        plan = await workflow.step(
+            function=plan_snapshot_poll,
+            function_input=poll_input,
+            start_to_close_timeout=timedelta(seconds=30),
+            task_queue=INTERACTIVE_QUEUE,
+        )
+        await workflow.sleep(plan["delay"])
+
+    while True:
+        try:
+            check = await workflow.step(
+                function=check_brightdata_snapshot,
+                function_input=poll_input,
+                start_to_close_timeout=timedelta(seconds=60),
+                retry_policy=check_retry_policy,
+                task_queue=SUPERVISION_QUEUE,
+            )
+        except Exception:
+            # The snapshot failed: later scrapes of the same key must not join it
+            await release_snapshot(snapshot_id)
+            raise
+        if check["status"] == "ready":
+            return
+        if check["give_up"]:
+            await release_snapshot(snapshot_id)
+            raise NonRetryableError(f"Snapshot {snapshot_id} was not ready after {max_wait} seconds")
+        log.info(f"Snapshot {snapshot_id} is {check['status']}, checking again in {check['next_check_in']}s")
+        poll_input = SnapshotPollInput(
+            snapshot_id=snapshot_id,
+            dataset=dataset,
+            batch_size=batch_size,
+            triggered_at=triggered_at,
+            last_check_at=check["checked_at"],
+            checks=poll_input.checks + 1,
+            max_wait_seconds=max_wait,
+        )
+        await workflow.sleep(check["next_check_in"])
+
+
+async def release_snapshot(snapshot_id: str) -> None:
+    """Release a dead snapshot from in-flight coalescing. A failure is only logged."""
+    try:
+        await workflow.step(
+            function=release_brightdata_snapshot,
+            function_input=SnapshotIdInput(snapshot_id=snapshot_id),
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=RetryPolicy(maximum_attempts=2),
+            task_queue=TRIGGER_QUEUE,
+        )
+    except Exception as e:
+        log.warning(f"Releasing snapshot {snapshot_id} failed: {e}")
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    RetryPolicy,
+    import_functions,
+    log,
+    workflow,
+    workflow_info,
+)
+from temporalio.workflow import ParentClosePolicy
+
+from src.client import INTERACTIVE_QUEUE, TASK_QUEUE
+
+with import_functions():
+    from src.functions.cache import (
+        CacheLookupInput,
+        CacheStoreInput,
+        lookup_cached_result,
+        store_cached_result,
+    )
+
+# Workflow-side helpers for the result cache. A cache failure never fails the
+# calling workflow: lookups degrade to a miss and stores are only logged.
+
+CACHE_RETRY_POLICY = RetryPolicy(maximum_attempts=2)
+
+
+async def lookup_cache(
+    kind: str,
+    profile_url: str,
+    max_age: int | None,
+    stale_while_revalidate: bool,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """Look up a cached result, projected onto fields in the worker."""
+    try:
+        return await workflow.step(
+            function=lookup_cached_result,
+            function_input=CacheLookupInput(
+                kind=kind,
+                profile_url=profile_url,
+                max_age=max_age,
+                stale_while_revalidate=stale_while_revalidate,
+                fields=fields,
+            ),
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=CACHE_RETRY_POLICY,
+            task_queue=INTERACTIVE_QUEUE,
+        )
+    except Exception as e:
+        log.warning(f"Cache lookup for {kind} failed, scraping instead: {e}")
+        return {"hit": False}
+
+
+async def store_cache(kind: str, profile_url: str, data: Any) -> None:
+    try:
+        await workflow.step(
+            function=store_cached_result,
+            function_input=CacheStoreInput(kind=kind, profile_url=profile_url, data=data),
+            start_to_close_timeout=timedelta(seconds=30),
+            retry_policy=CACHE_RETRY_POLICY,
+            task_queue=INTERACTIVE_QUEUE,
+        )
+    except Exception as e:
+        log.warning(f"Caching {kind} result failed: {e}")
+
+
+def cache_envelope(result: Any, cached: bool, report_cached: bool) -> Any:
+    """Wrap a result as {"cached", "result"} when the caller asked to know whether it came from the cache."""
+    return {"cached": cached, "result": result} if report_cached else result
+
+
+async def refresh_in_background(workflow_class: Any, workflow_input: Any) -> None:
+    """Start a detached child run that re-scrapes and refreshes the cache entry."""
+    try:
+        await workflow.child_start(
+            workflow=workflow_class,
+            workflow_id=f"{workflow_info().workflow_id}-refresh",
+            workflow_input=workflow_input,
+            task_queue=TASK_QUEUE,
+            parent_close_policy=ParentClosePolicy.ABANDON,
+        )
+    except Exception as e:
+        log.warning(f"Background refresh could not be started: {e}")
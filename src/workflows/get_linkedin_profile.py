@@ -0,0 +1,161 @@
+import asyncio
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    ChildWorkflowCancellationType,
+    NonRetryableError,
+    RetryPolicy,
+    import_functions,
+    log,
+    temporal_workflow,
+    workflow,
+    workflow_info,
+)
+
+from src.client import INTERACTIVE_QUEUE, TASK_QUEUE
+from src.workflows.brightdata.get_linkedin_profile import GetLinkedinProfileWorkflowBrightdata
+from src.workflows.phantombuster.get_linkedin_profile import GetLinkedinProfileWorkflowPhantombuster
+
+with import_functions():
+    from src.functions.brightdata.get_linkedin_profile import GetProfileInput as BrightdataProfileInput
+    from src.functions.phantombuster.get_linkedin_profile import GetProfileInput as PhantombusterProfileInput
+    from src.functions.routing import (
+        PROFILE_PROVIDERS,
+        ProviderOutcomeInput,
+        RoutePlanInput,
+        RoutedProfileInput,
+        plan_provider_route,
+        record_provider_outcome,
+    )
+
+PROVIDER_WORKFLOWS = {
+    "brightdata": (GetLinkedinProfileWorkflowBrightdata, BrightdataProfileInput),
+    "phantombuster": (GetLinkedinProfileWorkflowPhantombuster, PhantombusterProfileInput),
+}
+
+
+def provider_records(provider: str, result: Any) -> Any:
+    """A provider workflow's records, as a list or a payload reference, whichever provider answered."""
+    # Phantombuster wraps them as {"status", "containerId", "records", "result"}
+    if provider == "phantombuster" and isinstance(result, dict) and "result" in result:
+        return result["result"]
+    return result
+
+
+@workflow.defn(description="Get a LinkedIn profile from the fastest available provider")
+class GetLinkedinProfileWorkflow:
+    @workflow.run
+    async def run(self, workflow_input: RoutedProfileInput) -> dict[str, Any]:
+        log.info("GetLinkedinProfileWorkflow started")
+        try:
+            # Step 1: Rank the providers by recent latency and errors
+            providers = [workflow_input.provider] if workflow_input.provider else PROFILE_PROVIDERS
+            plan = await workflow.step(
+                function=plan_provider_route,
+                function_input=RoutePlanInput(kind="profile", providers=providers),
+                start_to_close_timeout=timedelta(seconds=30),
+                retry_policy=RetryPolicy(maximum_attempts=2),
+                task_queue=INTERACTIVE_QUEUE,
+            )
+            waiting = list(plan["order"])
+            running: dict[asyncio.Task, tuple[str, float]] = {}
+            errors: dict[str, str] = {}
+            hedged = False
+
+            def start(provider: str) -> None:
+                log.info(f"Fetching profile from {provider}")
+                task = asyncio.create_task(self.fetch(provider, workflow_input))
+                running[task] = (provider, temporal_workflow.time())
+
+            # Step 2: Run the best provider, hedging with the next one if it is
+            # slower than its p90, or failing over to it if it fails
+            start(waiting.pop(0))
+            while running:
+                timeout = plan["hedge_after"] if workflow_input.hedge and waiting and len(running) == 1 else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    log.info(f"No result after {plan['hedge_after']}s, hedging with {waiting[0]}")
+                    start(waiting.pop(0))
+                    hedged = True
+                    continue
+
+                # Several providers can finish in the same wait. Each is recorded
+                # as a real outcome before the rest are cancelled, in plan order
+                # so that replays pick the same winner
+                winner: tuple[str, Any] | None = None
+                for task in sorted(done, key=lambda task: plan["order"].index(running[task][0])):
+                    provider, started_at = running.pop(task)
+                    seconds = temporal_workflow.time() - started_at
+                    if task.exception() is None:
+                        outcome = task.result()
+                        # A cache hit says nothing about the provider's latency
+                        if not outcome["cached"]:
+                            await self.record(provider, seconds, ok=True)
+                        if winner is None:
+                            winner = (provider, outcome["result"])
+                        continue
+
+                    errors[provider] = str(task.exception())
+                    log.warning(f"{provider} failed after {seconds:.0f}s: {errors[provider]}")
+                    await self.record(provider, seconds, ok=False)
+
+                if winner is not None:
+                    provider, provider_result = winner
+                    await self.cancel(running)
+                    result = {
+                        "provider": provider,
+                        "hedged": hedged,
+                        "result": provider_records(provider, provider_result),
+                    }
+                    log.info("get_linkedin_profile done", result=result)
+                    return result
+                if not running and waiting:
+                    start(waiting.pop(0))
+
+            raise NonRetryableError(f"All providers failed: {errors}")
+        except Exception as e:
+            error_message = f"Error during get_linkedin_profile: {e}"
+            raise NonRetryableError(error_message) from e
+
+    async def fetch(self, provider: str, workflow_input: RoutedProfileInput) -> Any:
+        workflow_class, input_class = PROVIDER_WORKFLOWS[provider]
+        return await workflow.child_execute(
+            workflow=workflow_class,
+            workflow_id=f"{workflow_info().workflow_id}-{provider}",
+            workflow_input=input_class(
+                profile_url=workflow_input.profile_url,
+                max_age=workflow_input.max_age,
+                stale_while_revalidate=workflow_input.stale_while_revalidate,
+                fields=workflow_input.fields,
+                report_cached=True,
+            ),
+            task_queue=TASK_QUEUE,
+            # Do not wait for the losing provider to acknowledge the cancellation
+            cancellation_type=ChildWorkflowCancellationType.TRY_CANCEL,
+        )
+
+    async def cancel(self, running: dict[asyncio.Task, tuple[str, float]]) -> None:
+        # A loser's latency is only known to exceed the time it ran, so it is
+        # recorded as a censored sample
+        cancelled_at = temporal_workflow.time()
+        for task, (provider, _) in running.items():
+            log.info(f"Cancelling {provider}")
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        for provider, started_at in running.values():
+            await self.record(provider, cancelled_at - started_at, ok=True, censored=True)
+
+    async def record(self, provider: str, seconds: float, ok: bool, censored: bool = False) -> None:
+        try:
+            await workflow.step(
+                function=record_provider_outcome,
+                function_input=ProviderOutcomeInput(
+                    kind="profile", provider=provider, seconds=seconds, ok=ok, censored=censored
+                ),
+                start_to_close_timeout=timedelta(seconds=30),
+                retry_policy=RetryPolicy(maximum_attempts=2),
+                task_queue=INTERACTIVE_QUEUE,
+            )
+        except Exception as e:
+            log.warning(f"Recording {provider} outcome failed: {e}")
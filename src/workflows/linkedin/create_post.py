@@ -8,7 +8,7 @@ from restack_ai.workflow import (
     workflow,
 )
 
-from src.client import TASK_QUEUE
+from src.client import INTERACTIVE_QUEUE, UPLOAD_QUEUE
 
 with import_functions():
     from src.functions.linkedin.create_post import (
@@ -17,17 +17,35 @@ with import_functions():
     )
 
 
+def post_step_options(media_path: str | None) -> tuple[str, timedelta]:
+    """Task queue and timeout of the step publishing a post.
+
+    A post with media uploads it first, which for a large video takes far
+    longer than a text post, so it runs on the uploads queue and its slots.
+    """
+    if media_path is None:
+        return INTERACTIVE_QUEUE, timedelta(seconds=120)
+    return UPLOAD_QUEUE, timedelta(seconds=1800)
+
+
 @workflow.defn(description="Create a post on LinkedIn")
 class CreatePostOnLinkedinWorkflow:
     @workflow.run
     async def run(self, workflow_input: CreatePostInput) -> dict[str, Any]:
         log.info("CreatePostOnLinkedinWorkflow started")
         try:
+            task_queue, timeout = post_step_options(workflow_input.media_path)
             result = await workflow.step(
                 function=create_post_on_linkedin,
-                function_input=CreatePostInput(text=workflow_input.text),
-                start_to_close_timeout=timedelta(seconds=120),
-                task_queue=TASK_QUEUE,
+                function_input=CreatePostInput(
+                    text=workflow_input.text,
+                    author_urn=workflow_input.author_urn,
+                    media_path=workflow_input.media_path,
+                    media_category=workflow_input.media_category,
+                    media_title=workflow_input.media_title,
+                ),
+                start_to_close_timeout=timeout,
+                task_queue=task_queue,
             )
         except Exception as e:
             error_message = f"Error during create_post_on_linkedin: {e}"
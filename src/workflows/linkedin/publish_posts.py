@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+
+from restack_ai.workflow import (
+    NonRetryableError,
+    RetryPolicy,
+    import_functions,
+    log,
+    temporal_workflow,
+    workflow,
+)
+
+from src.workflows.linkedin.create_post import post_step_options
+
+with import_functions():
+    from src.functions.linkedin.create_post import (
+        CreatePostInput,
+        PublishPostsInput,
+        ScheduledPostInput,
+        create_post_on_linkedin,
+    )
+
+
+@workflow.defn(description="Publish many LinkedIn posts, now or at scheduled times")
+class PublishPostsOnLinkedinWorkflow:
+    def __init__(self) -> None:
+        self._results: dict[int, dict[str, Any]] = {}
+
+    @temporal_workflow.query
+    def progress(self) -> dict[str, Any]:
+        """Posts published or failed so far, available while the workflow is still running."""
+        return {"done": len(self._results), "results": [self._results[index] for index in sorted(self._results)]}
+
+    @workflow.run
+    async def run(self, workflow_input: PublishPostsInput) -> dict[str, Any]:
+        log.info("PublishPostsOnLinkedinWorkflow started")
+        try:
+            # Each author's posts are published in order of publish time, at least
+            # author_interval apart; authors proceed independently of each other
+            lanes: dict[str | None, list[int]] = {}
+            for index, post in enumerate(workflow_input.posts):
+                lanes.setdefault(post.author_urn, []).append(index)
+            for indexes in lanes.values():
+                indexes.sort(key=lambda index: workflow_input.posts[index].publish_timestamp or 0.0)
+            log.info(f"Publishing {len(workflow_input.posts)} post(s) for {len(lanes)} author(s)")
+
+            # At most max_concurrency posts are being published at any time
+            slots = asyncio.Semaphore(workflow_input.max_concurrency)
+            await asyncio.gather(
+                *(
+                    self.publish_lane(workflow_input.posts, indexes, workflow_input.author_interval, slots)
+                    for indexes in lanes.values()
+                )
+            )
+
+            results = [self._results[index] for index in range(len(workflow_input.posts))]
+            failed = sum(1 for result in results if result["status"] == "error")
+            result = {"published": len(results) - failed, "failed": failed, "results": results}
+        except Exception as e:
+            error_message = f"Error during publish_posts_on_linkedin: {e}"
+            raise NonRetryableError(error_message) from e
+        else:
+            log.info("publish_posts_on_linkedin done", published=result["published"], failed=failed)
+            return result
+
+    async def publish_lane(
+        self, posts: list[ScheduledPostInput], indexes: list[int], interval: int, slots: asyncio.Semaphore
+    ) -> None:
+        last_published_at: float | None = None
+        for index in indexes:
+            post = posts[index]
+            # Step 1: Sleep durably until the publish time, and the author's interval, have passed
+            due = max(
+                post.publish_timestamp or 0.0,
+                last_published_at + interval if last_published_at is not None else 0.0,
+            )
+            delay = due - temporal_workflow.time()
+            if delay > 0:
+                await workflow.sleep(int(delay + 0.999))
+
+            # Step 2: Publish, recording a failure without stopping the other posts
+            task_queue, timeout = post_step_options(post.media_path)
+            async with slots:
+                try:
+                    published = await workflow.step(
+                        function=create_post_on_linkedin,
+                        function_input=CreatePostInput(
+                            text=post.text,
+                            author_urn=post.author_urn,
+                            media_path=post.media_path,
+                            media_category=post.media_category,
+                            media_title=post.media_title,
+                        ),
+                        start_to_close_timeout=timeout,
+                        # A retry after a timeout could publish the post twice
+                        retry_policy=RetryPolicy(maximum_attempts=1),
+                        task_queue=task_queue,
+                    )
+                except Exception as e:
+                    log.warning(f"Post {index} failed: {e}")
+                    # A failed attempt may still have published the post (e.g. on
+                    # a timeout), so the author's next post keeps its distance
+                    last_published_at = temporal_workflow.time()
+                    self._results[index] = {
+                        "index": index,
+                        "author_urn": post.author_urn,
+                        "status": "error",
+                        "error": str(e),
+                    }
+                    continue
+            last_published_at = temporal_workflow.time()
+            self._results[index] = {
+                "index": index,
+                "author_urn": post.author_urn,
+                "status": "success",
+                "post_id": published["post_id"],
+                "published_at": datetime.fromtimestamp(last_published_at, timezone.utc).isoformat(),
+            }
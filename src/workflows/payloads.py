@@ -0,0 +1,37 @@
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    NonRetryableError,
+    import_functions,
+    log,
+    workflow,
+)
+
+from src.client import DOWNLOAD_QUEUE
+
+with import_functions():
+    from src.functions.payloads import (
+        ResolvePayloadInput,
+        resolve_payload,
+    )
+
+
+@workflow.defn(description="Resolve payload references returned by other workflows into their data")
+class ResolvePayloadWorkflow:
+    @workflow.run
+    async def run(self, workflow_input: ResolvePayloadInput) -> Any:
+        log.info("ResolvePayloadWorkflow started")
+        try:
+            result = await workflow.step(
+                function=resolve_payload,
+                function_input=ResolvePayloadInput(value=workflow_input.value),
+                start_to_close_timeout=timedelta(minutes=5),
+                task_queue=DOWNLOAD_QUEUE,
+            )
+        except Exception as e:
+            error_message = f"Error during resolve_payload: {e}"
+            raise NonRetryableError(error_message) from e
+        else:
+            log.info("resolve_payload done")
+            return result
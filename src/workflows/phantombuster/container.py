@@ -0,0 +1,90 @@
+from datetime import timedelta
+from typing import Any
+
+from restack_ai.workflow import (
+    NonRetryableError,
+    RetryPolicy,
+    import_functions,
+    log,
+    workflow,
+)
+
+from src.client import DOWNLOAD_QUEUE, SUPERVISION_QUEUE
+
+with import_functions():
+    from src.functions.phantombuster.containers import (
+        ContainerPollInput,
+        fetch_phantombuster_container,
+    )
+    from src.functions.phantombuster.results import (
+        ContainerResultInput,
+        collect_phantombuster_results,
+    )
+
+
+async def wait_for_container(launch_result: dict[str, Any], dataset: str, max_wait: int) -> dict[str, Any]:
+    """Wait until a launched container finishes and return its final status.
+
+    The workflow sleeps durably between short status checks, on the schedule
+    learned from past run times for this dataset, giving up after max_wait
+    seconds.
+    """
+    container_id = launch_result["container_id"]
+    triggered_at = launch_result["triggered_at"]
+    check_retry_policy = RetryPolicy(initial_interval=timedelta(seconds=5), maximum_attempts=3)
+    last_check_at = triggered_at
+    next_check_in = launch_result["next_check_in"]
+    checks = 0
+
+    while True:
+        await workflow.sleep(next_check_in)
+        check = await workflow.step(
+            function=fetch_phantombuster_container,
+            function_input=ContainerPollInput(
+                container_id=container_id,
+                dataset=dataset,
+                triggered_at=triggered_at,
+                last_check_at=last_check_at,
+                checks=checks,
+                max_wait_seconds=max_wait,
+            ),
+            start_to_close_timeout=timedelta(seconds=60),
+            retry_policy=check_retry_policy,
+            task_queue=SUPERVISION_QUEUE,
+        )
+        if check["status"] == "finished":
+            return check
+        if check["give_up"]:
+            raise NonRetryableError(f"Container {container_id} did not finish after {max_wait} seconds")
+        log.info(f"Container {container_id} is {check['status']}, checking again in {check['next_check_in']}s")
+        last_check_at = check["checked_at"]
+        checks += 1
+        next_check_in = check["next_check_in"]
+
+
+async def collect_results(
+    container_id: str,
+    dataset: str,
+    fields: list[str] | None = None,
+    cache_kind: str | None = None,
+    profile_url: str | None = None,
+) -> dict[str, Any]:
+    """Return a finished container's parsed records, inline or as a payload reference.
+
+    With cache_kind, the worker caches the full result and returns only fields.
+    """
+    return await workflow.step(
+        function=collect_phantombuster_results,
+        function_input=ContainerResultInput(
+            container_id=container_id,
+            dataset=dataset,
+            fields=fields,
+            cache_kind=cache_kind,
+            profile_url=profile_url,
+        ),
+        start_to_close_timeout=timedelta(minutes=10),
+        # The output file can appear in storage shortly after the container finishes
+        retry_policy=RetryPolicy(initial_interval=timedelta(seconds=5), maximum_attempts=5, backoff_coefficient=2.0),
+        task_queue=DOWNLOAD_QUEUE,
+    )
+
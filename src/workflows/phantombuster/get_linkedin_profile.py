@@ -8,12 +8,14 @@ from restack_ai.workflow import (
     workflow,
 )
 
-from src.client import TASK_QUEUE
+from src.client import TRIGGER_QUEUE
+from src.workflows.phantombuster.container import collect_results, wait_for_container
+from src.workflows.cache import cache_envelope, lookup_cache, refresh_in_background
 
 with import_functions():
     from src.functions.phantombuster.get_linkedin_profile import (
         GetProfileInput,
-        get_linkedin_profile_phantombuster,
+        launch_linkedin_profile_phantombuster,
     )
 
 
@@ -23,16 +25,50 @@ class GetLinkedinProfileWorkflowPhantombuster:
     async def run(self, workflow_input: GetProfileInput) -> dict[str, Any]:
         log.info("GetLinkedinProfileWorkflowPhantombuster started")
         try:
-            result = await workflow.step(
-                function=get_linkedin_profile_phantombuster,
-                function_input=GetProfileInput(profile_url=workflow_input.profile_url),
-                start_to_close_timeout=timedelta(seconds=120),
-                task_queue=TASK_QUEUE,
+            cached = await lookup_cache(
+                "phantombuster:profile",
+                workflow_input.profile_url,
+                workflow_input.max_age,
+                workflow_input.stale_while_revalidate,
+                workflow_input.fields,
             )
+            if cached["hit"]:
+                if not cached["fresh"]:
+                    log.info("Returning stale cached result, refreshing in the background")
+                    await refresh_in_background(
+                        GetLinkedinProfileWorkflowPhantombuster,
+                        GetProfileInput(profile_url=workflow_input.profile_url, max_age=0),
+                    )
+                return cache_envelope(cached["data"], True, workflow_input.report_cached)
+
+            # Step 1: Launch the agent and get its container_id
+            launch_result = await workflow.step(
+                function=launch_linkedin_profile_phantombuster,
+                function_input=GetProfileInput(profile_url=workflow_input.profile_url, max_age=workflow_input.max_age),
+                start_to_close_timeout=timedelta(seconds=30),
+                task_queue=TRIGGER_QUEUE,
+            )
+            container_id = launch_result["container_id"]
+            log.info(f"Agent launched, container_id: {container_id}")
+
+            # Step 2: Check the container on the learned schedule, sleeping durably in between
+            await wait_for_container(launch_result, dataset="phantombuster:profile", max_wait=1800)
+            log.info(f"Phantombuster job for container {container_id} finished successfully.")
+
+            # Step 3: Parse the container's results, streaming its output file when there is one
+            # The worker caches the full result; only the requested fields are returned
+            results = await collect_results(
+                container_id,
+                dataset="phantombuster:profile",
+                fields=workflow_input.fields,
+                cache_kind="phantombuster:profile",
+                profile_url=workflow_input.profile_url,
+            )
+            result = {"status": "success", "containerId": container_id, **results}
         except Exception as e:
             error_message = f"Error during get_linkedin_profile_phantombuster: {e}"
             raise NonRetryableError(error_message) from e
         else:
             log.info("get_linkedin_profile_phantombuster done", result=result)
 
-            return result
+            return cache_envelope(result, False, workflow_input.report_cached)
@@ -8,12 +8,13 @@ from restack_ai.workflow import (
     workflow,
 )
 
-from src.client import TASK_QUEUE
+from src.client import TRIGGER_QUEUE
+from src.workflows.phantombuster.container import collect_results, wait_for_container
 
 with import_functions():
     from src.functions.phantombuster.get_linkedin_profile_reactions import (
         GetProfileReactionsInput,
-        get_linkedin_profile_reactions_phantombuster,
+        launch_linkedin_profile_reactions_phantombuster,
     )
 
 
@@ -23,12 +24,23 @@ class GetLinkedinProfileReactionsWorkflowPhantombuster:
     async def run(self, workflow_input: GetProfileReactionsInput) -> dict[str, Any]:
         log.info("GetLinkedinProfileReactionsWorkflowPhantombuster started")
         try:
-            result = await workflow.step(
-                function=get_linkedin_profile_reactions_phantombuster,
+            # Step 1: Launch the agent and get its container_id
+            launch_result = await workflow.step(
+                function=launch_linkedin_profile_reactions_phantombuster,
                 function_input=GetProfileReactionsInput(profile_url=workflow_input.profile_url),
-                start_to_close_timeout=timedelta(seconds=120),
-                task_queue=TASK_QUEUE,
+                start_to_close_timeout=timedelta(seconds=30),
+                task_queue=TRIGGER_QUEUE,
             )
+            container_id = launch_result["container_id"]
+            log.info(f"Agent launched, container_id: {container_id}")
+
+            # Step 2: Check the container on the learned schedule, sleeping durably in between
+            await wait_for_container(launch_result, dataset="phantombuster:reactions", max_wait=3600)
+            log.info(f"Phantombuster job for container {container_id} finished successfully.")
+
+            # Step 3: Parse the container's results, streaming its output file when there is one
+            results = await collect_results(container_id, dataset="phantombuster:reactions")
+            result = {"status": "success", "containerId": container_id, **results}
         except Exception as e:
             error_message = f"Error during get_linkedin_profile_reactions_phantombuster: {e}"
             raise NonRetryableError(error_message) from e